@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Single-Pass A/B Harness
+-----------------------
+같은 수집/규칙 필터 결과에 대해 3단계 LLM 파이프라인과 단일 호출 모드를 모두 실행하여
+최종 선정 결과(URL 기준)와 LLM 호출 수/토큰/소요 시간을 비교합니다.
+(완화된 기준의 재평가는 비교 대상에서 제외)
+
+사용법:
+    python ab_single_pass.py [--companies=삼성,SK] [--category=Anchor] [--output=logs/ab_single_pass.json]
+"""
+
+import os
+import sys
+import json
+import copy
+import time
+from datetime import datetime
+
+from config import COMPANY_CATEGORIES, COMPANY_KEYWORD_MAP, SINGLE_PASS_SETTINGS
+from auto_news_mail import KST, build_company_context, run_rule_filters, run_llm_stages
+from llm_stats import get_llm_usage, reset_llm_usage
+
+ARMS = ("three_stage", "single_pass")
+
+
+def _usage_totals(usage):
+    totals = {"calls": 0, "input_tokens": 0, "cached_tokens": 0, "output_tokens": 0}
+    for stats in usage.values():
+        for key in totals:
+            totals[key] += stats.get(key, 0)
+    return totals
+
+
+def run_arm(rule_state, single_pass):
+    """규칙 필터 결과 사본으로 한 가지 방식을 실행하고 선정 결과/사용량을 반환"""
+    SINGLE_PASS_SETTINGS["enabled"] = single_pass
+    state = copy.deepcopy(rule_state)
+    reset_llm_usage()
+    started = time.perf_counter()
+    final_state = run_llm_stages(state)
+    elapsed = time.perf_counter() - started
+    selection = {
+        news.get("url", ""): {"title": news.get("title", ""), "importance": news.get("importance", "")}
+        for news in final_state.get("final_selection", [])
+    }
+    return {
+        "seconds": round(elapsed, 2),
+        "usage": _usage_totals(get_llm_usage()),
+        "selection": selection
+    }
+
+
+def compare_arms(results):
+    """두 방식의 선정 결과 비교 (3단계 결과를 기준으로 한 재현율/정밀도)"""
+    baseline = set(results["three_stage"]["selection"])
+    candidate = set(results["single_pass"]["selection"])
+    overlap = baseline & candidate
+    union = baseline | candidate
+    importance_agreed = sum(
+        results["three_stage"]["selection"][url]["importance"] == results["single_pass"]["selection"][url]["importance"]
+        for url in overlap
+    )
+    return {
+        "three_stage_count": len(baseline),
+        "single_pass_count": len(candidate),
+        "overlap": len(overlap),
+        "jaccard": round(len(overlap) / len(union), 3) if union else 1.0,
+        "recall": round(len(overlap) / len(baseline), 3) if baseline else 1.0,
+        "precision": round(len(overlap) / len(candidate), 3) if candidate else 1.0,
+        "importance_agreement": round(importance_agreed / len(overlap), 3) if overlap else 1.0,
+        "only_three_stage": sorted(baseline - candidate),
+        "only_single_pass": sorted(candidate - baseline)
+    }
+
+
+def run_company(company):
+    """회사 1곳의 A/B 비교"""
+    print(f"\n{'=' * 50}\nA/B 비교: {company}\n{'=' * 50}")
+    ctx = build_company_context(company, COMPANY_KEYWORD_MAP.get(company, [company]))
+    rule_state = run_rule_filters(ctx["initial_state"])
+    results = {}
+    for arm in ARMS:
+        print(f"\n--- {arm} 실행 ---")
+        results[arm] = run_arm(rule_state, single_pass=(arm == "single_pass"))
+    comparison = compare_arms(results)
+    return {"company": company, "arms": results, "comparison": comparison}
+
+
+def _category_companies(name):
+    """카테고리명(Corporate) 또는 섹션명(Anchor)으로 회사 목록 반환"""
+    if name in COMPANY_CATEGORIES:
+        return [company for section in COMPANY_CATEGORIES[name].values() for company in section]
+    for sections in COMPANY_CATEGORIES.values():
+        if name in sections:
+            return list(sections[name])
+    print(f"경고: {name}는 유효하지 않은 카테고리입니다.")
+    return []
+
+
+def print_report(reports):
+    """회사별/전체 비교 결과 출력"""
+    print(f"\n=== 단일 호출 A/B 결과 ===")
+    totals = {arm: {"seconds": 0.0, "calls": 0, "input_tokens": 0, "output_tokens": 0} for arm in ARMS}
+    for report in reports:
+        comparison = report["comparison"]
+        print(f"- {report['company']}: 3단계 {comparison['three_stage_count']}개, 단일 {comparison['single_pass_count']}개, "
+              f"겹침 {comparison['overlap']}개 (Jaccard {comparison['jaccard']}, 재현율 {comparison['recall']}, "
+              f"정밀도 {comparison['precision']}, 중요도 일치 {comparison['importance_agreement']})")
+        for arm in ARMS:
+            totals[arm]["seconds"] += report["arms"][arm]["seconds"]
+            for key in ("calls", "input_tokens", "output_tokens"):
+                totals[arm][key] += report["arms"][arm]["usage"][key]
+    for arm in ARMS:
+        total = totals[arm]
+        print(f"[{arm}] 소요 {total['seconds']:.1f}초, 호출 {total['calls']}회, "
+              f"입력 {total['input_tokens']} 토큰, 출력 {total['output_tokens']} 토큰")
+
+
+def main():
+    companies = []
+    output_path = os.path.join("logs", "ab_single_pass.json")
+    for arg in sys.argv[1:]:
+        if arg.startswith("--companies="):
+            companies = [c.strip() for c in arg.split("=", 1)[1].split(",") if c.strip()]
+        elif arg.startswith("--category="):
+            companies.extend(_category_companies(arg.split("=", 1)[1].strip()))
+        elif arg.startswith("--output="):
+            output_path = arg.split("=", 1)[1]
+    if not companies:
+        print(__doc__)
+        return
+
+    original_setting = SINGLE_PASS_SETTINGS.get("enabled", False)
+    try:
+        reports = [run_company(company) for company in companies]
+    finally:
+        SINGLE_PASS_SETTINGS["enabled"] = original_setting
+
+    print_report(reports)
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump({"run_at": datetime.now(KST).isoformat(), "reports": reports}, f, ensure_ascii=False, indent=2)
+    print(f"결과 저장: {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,4 @@
 import streamlit as st
-import re
 
 
 # ✅ 무조건 첫 Streamlit 명령어
@@ -13,20 +12,29 @@ st.set_page_config(
 
 from datetime import datetime, timedelta, timezone
 import os
+import time
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait
 from PIL import Image
 #import docx
 #from docx.shared import Pt, RGBColor, Inches
 import io
 from urllib.parse import urlparse
 from googlenews import GoogleNews
+from title_normalizer import clean_title
 from news_ai import (
     collect_news,
     filter_valid_press,
     filter_excluded_keywords,  # 새로운 키워드 필터링 함수 추가
+    score_company_relevance,
     filter_excluded_news,
     group_and_select_news,
     evaluate_importance,
+    attach_first_pass,
 )
+from llm_streaming import stream_listener, StreamProgress
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 # Import centralized configuration
 from config import (
@@ -62,12 +70,66 @@ from config import (
     # 재평가용 완화 기준들
     RELAXED_EXCLUSION_CRITERIA,
     RELAXED_DUPLICATE_HANDLING,
-    RELAXED_SELECTION_CRITERIA
+    RELAXED_SELECTION_CRITERIA,
+    # LLM 스트리밍 설정
+    LLM_STREAMING_SETTINGS
 )
 
 # 한국 시간대(KST) 정의
 KST = timezone(timedelta(hours=9))
 
+# 스트리밍 진행 상황 표시용 결과 항목 이름
+STREAM_FIELD_LABELS = {
+    "excluded": "제외", "borderline": "보류", "retained": "유지",
+    "groups": "그룹", "final_selection": "선정", "not_selected": "미선정"
+}
+
+
+def run_stage_with_progress(label, stage_fn, state):
+    """
+    LLM 단계 실행 (스트리밍 사용 시 완성된 결과 항목 수와 첫 결과까지 시간을 실시간 표시)
+
+    스트리밍 항목은 분할 호출/헤징 작업 스레드(ScriptRunContext 없음)에서도 전달되므로
+    수신기는 항목 수만 기록하고, 단계는 작업 스레드에서 실행하며 화면은 스크립트 스레드에서 갱신합니다.
+    """
+    placeholder = st.empty()
+    placeholder.write(label)
+    if not LLM_STREAMING_SETTINGS.get("enabled", False):
+        return stage_fn(state)
+
+    started = time.perf_counter()
+    lock = threading.Lock()
+    progress = {"counts": None, "first_result": None}
+
+    def record(counts):
+        with lock:
+            if progress["first_result"] is None:
+                progress["first_result"] = time.perf_counter() - started
+            progress["counts"] = counts
+
+    def render():
+        with lock:
+            counts, first_result = progress["counts"], progress["first_result"]
+        if counts is None:
+            return
+        totals = {}
+        for (_, field), count in counts.items():
+            if field in STREAM_FIELD_LABELS:
+                totals[field] = totals.get(field, 0) + count
+        summary = ", ".join(f"{STREAM_FIELD_LABELS[field]} {count}개" for field, count in totals.items())
+        placeholder.write(f"{label} ({summary} / 첫 결과 {first_result:.1f}초)")
+
+    with stream_listener(StreamProgress(record)):
+        context = contextvars.copy_context()
+    # 단계 안의 st.error 등은 작업 스레드에서도 화면에 표시되도록 ScriptRunContext 연결
+    script_ctx = get_script_run_ctx()
+    with ThreadPoolExecutor(max_workers=1, initializer=lambda: add_script_run_ctx(threading.current_thread(), script_ctx)) as executor:
+        future = executor.submit(context.run, stage_fn, state)
+        while not future.done():
+            wait([future], timeout=0.2)
+            render()
+    return future.result()
+
 
 def format_date(date_str):
     """Format date to MM/DD format with proper timezone handling"""
@@ -93,27 +155,6 @@ def format_date(date_str):
                 # Return original if parsing fails
                 return date_str if date_str else '날짜 정보 없음'
 
-def clean_title(title):
-    """Clean title by removing the press name pattern at the end"""
-    if not title:
-        return ""
-    # 0. [] 제거
-    title = re.sub(r'^\s*\[.*?\]\s*', '', title).strip()  # 제목 맨 앞에만
-    #title = re.sub(r'\[.*?\]', '', title).strip() # 제목 안에 다  
-    # 1. 특정 패턴 먼저 처리: "- 조선비즈 - Chosun Biz" (정확히 이 문자열만)
-    title = re.sub(r'\s*-\s*조선비즈\s*-\s*Chosun Biz\s*$', '', title, flags=re.IGNORECASE)
-    
-    # 1-2. 특정 패턴 처리: "- 조선비즈 - Chosunbiz" (B가 소문자인 경우)
-    title = re.sub(r'\s*-\s*조선비즈\s*-\s*Chosunbiz\s*$', '', title, flags=re.IGNORECASE)
-    
-    # 2. 특정 패턴 처리: "- fnnews.com"
-    title = re.sub(r'\s*-\s*fnnews\.com\s*$', '', title, flags=re.IGNORECASE)
-    
-    # 3. 일반적인 언론사 패턴 처리 (기존 로직)
-    title = re.sub(r"\s*-\s*[가-힣A-Za-z0-9\s]+$", "", title).strip()
-    
-    return title.strip()
-
 def create_pwc_html_email(all_results, selected_companies, selected_category=None, category_mode=None, main_category=None):
     """Create PwC-styled HTML email content from results with sections"""
     html_email_content = """
@@ -1631,6 +1672,7 @@ if st.button("뉴스 분석 시작", type="primary"):
                 "filtered_news": [], 
                 "analysis": "", 
                 "keyword": company_keywords,  # 회사별 확장 키워드 리스트 전달
+                "company": company,
                 "model": selected_model,
                 "excluded_news": [],
                 "borderline_news": [],
@@ -1683,17 +1725,18 @@ if st.button("뉴스 분석 시작", type="primary"):
             st.write("2.5단계: Rule 기반 키워드 필터링 중...")
             state_after_keyword_filter = filter_excluded_keywords(state_after_press_filter)
             
+            # 2.7단계: 회사 언급 연관성 사전 필터
+            st.write("2.7단계: 회사 언급 연관성 사전 필터링 중...")
+            state_after_keyword_filter = score_company_relevance(state_after_keyword_filter)
+            
             # 3단계: 제외 판단
-            st.write("3단계: 제외 판단 중...")
-            state_after_exclusion = filter_excluded_news(state_after_keyword_filter)
+            state_after_exclusion = run_stage_with_progress("3단계: 제외 판단 중...", filter_excluded_news, state_after_keyword_filter)
             
             # 4단계: 그룹핑
-            st.write("4단계: 그룹핑 중...")
-            state_after_grouping = group_and_select_news(state_after_exclusion)
+            state_after_grouping = run_stage_with_progress("4단계: 그룹핑 중...", group_and_select_news, state_after_exclusion)
             
             # 5단계: 중요도 평가
-            st.write("5단계: 중요도 평가 중...")
-            final_state = evaluate_importance(state_after_grouping)
+            final_state = run_stage_with_progress("5단계: 중요도 평가 중...", evaluate_importance, state_after_grouping)
 
             # 6단계: 0개 선택 시 완화된 기준으로 처음부터 재평가
             if len(final_state["final_selection"]) == 0:
@@ -1727,6 +1770,7 @@ if st.button("뉴스 분석 시작", type="primary"):
                         "filtered_news": [], 
                         "analysis": "", 
                         "keyword": company_keywords,
+                        "company": company,
                         "model": selected_model,
                         "excluded_news": [],
                         "borderline_news": [],
@@ -1759,6 +1803,8 @@ if st.button("뉴스 분석 시작", type="primary"):
                         "start_datetime": datetime.combine(start_date, start_time, KST),
                         "end_datetime": datetime.combine(end_date, end_time, KST)
                     }
+                    # 증분 재평가 사용 시 1차 결과(유지 판단, 그룹) 재사용
+                    attach_first_pass(relaxed_initial_state, final_state)
                     
                     st.write("- 1단계: 기존 수집된 뉴스 재사용 (재평가)")
                     # 뉴스 수집 단계 건너뛰고 기존 데이터 사용
@@ -1770,14 +1816,20 @@ if st.button("뉴스 분석 시작", type="primary"):
                     st.write("- 2.5단계: Rule 기반 키워드 필터링 (재평가) 중...")
                     relaxed_state_after_keyword_filter = filter_excluded_keywords(relaxed_state_after_press_filter)
                     
-                    st.write("- 3단계: 완화된 제외 판단 (재평가) 중...")
-                    relaxed_state_after_exclusion = filter_excluded_news(relaxed_state_after_keyword_filter)
+                    st.write("- 2.7단계: 회사 언급 연관성 사전 필터링 (재평가) 중...")
+                    relaxed_state_after_keyword_filter = score_company_relevance(relaxed_state_after_keyword_filter)
                     
-                    st.write("- 4단계: 완화된 그룹핑 (재평가) 중...")
-                    relaxed_state_after_grouping = group_and_select_news(relaxed_state_after_exclusion)
+                    relaxed_state_after_exclusion = run_stage_with_progress(
+                        "- 3단계: 완화된 제외 판단 (재평가) 중...", filter_excluded_news, relaxed_state_after_keyword_filter
+                    )
+                    
+                    relaxed_state_after_grouping = run_stage_with_progress(
+                        "- 4단계: 완화된 그룹핑 (재평가) 중...", group_and_select_news, relaxed_state_after_exclusion
+                    )
                     
-                    st.write("- 5단계: 완화된 중요도 평가 (재평가) 중...")
-                    relaxed_final_state = evaluate_importance(relaxed_state_after_grouping)
+                    relaxed_final_state = run_stage_with_progress(
+                        "- 5단계: 완화된 중요도 평가 (재평가) 중...", evaluate_importance, relaxed_state_after_grouping
+                    )
                     
                     # 재평가 결과가 있으면 최종 상태 업데이트
                     if "final_selection" in relaxed_final_state and relaxed_final_state["final_selection"]:
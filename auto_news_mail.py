@@ -9,26 +9,47 @@ with the results. It bypasses the Streamlit UI to work as a standalone script.
 Supports GitHub Actions integration with PowerAutomate.
 """
 
-import re
 import os
 import json
 import sys
+import copy
+import time
+import asyncio
+import threading
 import requests
 import urllib.parse
 from datetime import datetime, timedelta, timezone
 from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, TypedDict, Optional
 
 from googlenews import GoogleNews
+from title_normalizer import clean_title
 from news_ai import (
     collect_news,
     filter_valid_press,
     filter_excluded_keywords,  # 새로운 키워드 필터링 함수 추가
+    score_company_relevance,
     filter_excluded_news,
     group_and_select_news,
     evaluate_importance,
+    afilter_excluded_news,
+    agroup_and_select_news,
+    aevaluate_importance,
+    run_llm_stages_batch,
+    run_llm_stages_packed,
+    attach_first_pass,
 )
 from automailing import send_email
+from batch_filter import batch_filter_companies
+from llm_cache import print_cache_summary
+from verdict_cache import print_verdict_cache_summary
+from llm_stats import print_llm_usage_report, usage_scope, get_scope_usage, estimate_scope_cost
+from selection_history import record_selection, is_zero_yield_prone
+from llm_hedging import print_latency_report
+from llm_retry import print_retry_summary
+from llm_streaming import print_streaming_report
+from llm_pool import close_llm_clients, aclose_loop_llm_clients
 from config import (
     DEFAULT_COMPANIES,
     COMPANY_KEYWORD_MAP,
@@ -64,7 +85,24 @@ from config import (
     # 재평가용 완화 기준들
     RELAXED_EXCLUSION_CRITERIA,
     RELAXED_DUPLICATE_HANDLING,
-    RELAXED_SELECTION_CRITERIA
+    RELAXED_SELECTION_CRITERIA,
+    # 컬럼형 배치 필터 설정
+    BATCH_FILTER_SETTINGS,
+    # 비동기 파이프라인 설정
+    ASYNC_PIPELINE_SETTINGS,
+    # LLM 응답 캐시 설정
+    LLM_CACHE_SETTINGS,
+    STAGE1_VERDICT_CACHE_SETTINGS,
+    # 프롬프트 레이아웃 설정
+    PROMPT_LAYOUT_SETTINGS,
+    # 배치 API 실행 모드 설정
+    BATCH_API_SETTINGS,
+    # 완화 기준 재평가 추측 실행 설정
+    SPECULATIVE_RELAXED_SETTINGS,
+    # 회사 묶음 호출 설정
+    COMPANY_PACKING_SETTINGS,
+    # LLM 스트리밍 설정
+    LLM_STREAMING_SETTINGS
 )
 
 # 한국 시간대(KST) 정의
@@ -102,28 +140,6 @@ class AgentState(TypedDict, total=False):
     end_datetime: datetime
     is_reevaluated: bool
 
-def clean_title(title):
-    """Clean title by removing the press name pattern at the end and news tags at the beginning"""
-    if not title:
-        return ""
-    
-    # 0. 제목 앞의 특정 뉴스 태그 제거 (단독, 특징주, 속보만)
-    title = re.sub(r'\[.*?\]', '', title).strip()  # 제목 안에 있는 모든 대괄호 제거 
-    
-    # 1. 특정 패턴 먼저 처리: "- 조선비즈 - Chosun Biz" (정확히 이 문자열만)
-    title = re.sub(r'\s*-\s*조선비즈\s*-\s*Chosun Biz\s*$', '', title, flags=re.IGNORECASE)
-    
-    # 1-2. 특정 패턴 처리: "- 조선비즈 - Chosunbiz" (B가 소문자인 경우)
-    title = re.sub(r'\s*-\s*조선비즈\s*-\s*Chosunbiz\s*$', '', title, flags=re.IGNORECASE)
-    
-    # 2. 특정 패턴 처리: "- fnnews.com"
-    title = re.sub(r'\s*-\s*fnnews\.com\s*$', '', title, flags=re.IGNORECASE)
-    
-    # 3. 일반적인 언론사 패턴 처리 (기존 로직)
-    title = re.sub(r"\s*-\s*[가-힣A-Za-z0-9\s]+$", "", title).strip()
-    
-    return title.strip()
-
 def get_company_category(company):
     """
     회사명으로부터 해당하는 카테고리를 찾는 함수
@@ -208,7 +224,7 @@ def create_html_email_with_sections(category_results, category_structure, catego
                 news_list = category_results.get(company, [])
                 for news in news_list:
                     url = news.get('url', '')
-                    title = clean_title(news.get('title', ''))
+                    title = clean_title(news.get('title', ''), strip_all_brackets=True)
                     
                     # URL 기반 중복 체크 (가장 확실한 방법)
                     if url and url in seen_urls:
@@ -240,7 +256,7 @@ def create_html_email_with_sections(category_results, category_structure, catego
                 for news in all_news_in_section:
                     date_str = format_date(news.get('date', ''))
                     url = news.get('url', '')
-                    title = clean_title(news.get('title', ''))
+                    title = clean_title(news.get('title', ''), strip_all_brackets=True)
                     
                     # Add news item
                     html_email_content += f"""
@@ -295,7 +311,7 @@ def create_html_email_with_sections(category_results, category_structure, catego
                     for news in news_list:
                         date_str = format_date(news.get('date', ''))
                         url = news.get('url', '')
-                        title = clean_title(news.get('title', ''))
+                        title = clean_title(news.get('title', ''), strip_all_brackets=True)
                         
                         # Add news item
                         html_email_content += f"""
@@ -377,7 +393,7 @@ def create_html_email(all_results, selected_companies):
             for news in news_list:
                 date_str = format_date(news.get('date', ''))
                 url = news.get('url', '')
-                title = clean_title(news.get('title', ''))
+                title = clean_title(news.get('title', ''), strip_all_brackets=True)
                 
                 # Add news item
                 html_email_content += f"""
@@ -410,8 +426,58 @@ def create_html_email(all_results, selected_companies):
     
     return html_email_content
 
-def process_company_news(company, keywords):
-    """Process news for a specific company"""
+def get_company_date_range(company, now=None):
+    """회사별 뉴스 검색 날짜 범위 (한국 시간 08:00 기준, Financial 카테고리 월요일 특별 처리)"""
+    now = now or datetime.now(KST)
+    main_category = get_main_category_for_company(company)
+    if main_category == "Financial" and now.weekday() == 0:  # 월요일 (0=월요일)
+        # Financial 카테고리 월요일: 토요일부터 검색 (토, 일, 월)
+        default_start_date = now - timedelta(days=3)  # 3일 전 (금요일)
+    else:
+        # 기본: 어제부터 검색
+        default_start_date = now - timedelta(days=1)
+    
+    # Set time to 8:00 AM for both start and end - 한국 시간 기준
+    start_datetime = datetime.combine(default_start_date.date(), 
+                                     datetime.strptime("08:00", "%H:%M").time(), KST)
+    end_datetime = datetime.combine(now.date(), 
+                                   datetime.strptime("08:00", "%H:%M").time(), KST)
+    return start_datetime, end_datetime
+
+def compose_company_criteria(base_criteria, company_keywords_info, company_additional, keyword_placeholder=None, keyword_line=""):
+    """
+    카테고리 공통 기준에 회사별 키워드 정보와 특화 기준을 결합하는 함수
+
+    Returns:
+        tuple: (기준, 회사별 기준)
+               기본 레이아웃은 모두 기준 안에 결합하고 회사별 기준은 빈 문자열,
+               prefix 캐시 레이아웃/회사 묶음 호출은 기준을 카테고리 공통으로 유지하고 회사별 부분을 분리
+    """
+    has_placeholder = bool(keyword_placeholder) and keyword_placeholder in base_criteria
+    if PROMPT_LAYOUT_SETTINGS.get("prefix_cache", False) or COMPANY_PACKING_SETTINGS.get("enabled", False):
+        criteria = base_criteria
+        company_criteria = company_additional
+        if has_placeholder:
+            criteria = base_criteria.replace(keyword_placeholder, "• 해당 기업의 키워드는 아래 [분석 대상 기업 기준] 참조")
+            company_criteria = company_keywords_info.strip() + "\n" + company_additional
+        return criteria, company_criteria
+    criteria = base_criteria.replace(keyword_placeholder, keyword_line) if has_placeholder else base_criteria
+    return criteria + company_additional, ""
+
+def compose_company_exclusion_criteria(company, main_category=None):
+    """회사별 1단계 제외 기준 (기준, 회사별 기준) - 로컬 분류기 학습도 같은 기준 해시를 사용"""
+    main_category = main_category or get_main_category_for_company(company)
+    company_keywords = COMPANY_KEYWORD_MAP.get(company, [company])
+    company_keywords_info = f"\n\n[분석 대상 기업별 키워드 목록]\n• {company}: {', '.join(company_keywords)}\n"
+    return compose_company_criteria(
+        get_exclusion_criteria_for_category(main_category), company_keywords_info,
+        COMPANY_ADDITIONAL_EXCLUSION_CRITERIA.get(company, ""),
+        "• 각 회사별 키워드 목록은 COMPANY_KEYWORD_MAP 참조",
+        f"- 해당 기업의 키워드: {company_keywords_info.strip()}"
+    )
+
+def build_company_context(company, keywords):
+    """회사별 날짜 범위/특화 기준/초기 상태를 구성하는 함수 (재평가에 필요한 정보 포함)"""
     print(f"\n===== 분석 시작: {company} =====")
     
     # Calculate default date ranges - 한국 시간 기준
@@ -433,18 +499,8 @@ def process_company_news(company, keywords):
     
     # 날짜 범위 설정 - Financial 카테고리 월요일 특별 처리
     if main_category == "Financial" and now.weekday() == 0:  # 월요일 (0=월요일)
-        # Financial 카테고리 월요일: 토요일부터 검색 (토, 일, 월)
-        default_start_date = now - timedelta(days=3)  # 3일 전 (금요일)
         print(f"📅 Financial 카테고리 월요일 특별 처리: 토요일부터 검색")
-    else:
-        # 기본: 어제부터 검색
-        default_start_date = now - timedelta(days=1)
-    
-    # Set time to 8:00 AM for both start and end - 한국 시간 기준
-    start_datetime = datetime.combine(default_start_date.date(), 
-                                     datetime.strptime("08:00", "%H:%M").time(), KST)
-    end_datetime = datetime.combine(now.date(), 
-                                   datetime.strptime("08:00", "%H:%M").time(), KST)
+    start_datetime, end_datetime = get_company_date_range(company, now)
     
     # 날짜 범위 상세 출력
     print(f"\n=== 날짜 범위 설정 ===")
@@ -477,7 +533,6 @@ def process_company_news(company, keywords):
     dynamic_system_prompt_3 = get_system_prompt_3(company)
     
     # 4. 회사별 특화 기준 적용 (카테고리별 제외 기준 사용)
-    base_exclusion = get_exclusion_criteria_for_category(main_category)
     base_duplicate = DUPLICATE_HANDLING
     base_selection = SELECTION_CRITERIA
     
@@ -494,24 +549,22 @@ def process_company_news(company, keywords):
     company_keywords = COMPANY_KEYWORD_MAP.get(company, [company])
     company_keywords_info = f"\n\n[분석 대상 기업별 키워드 목록]\n• {company}: {', '.join(company_keywords)}\n"
     
-    # 키워드 연관성 체크 기준을 동적으로 업데이트
-    updated_base_exclusion = base_exclusion.replace(
-        "• 각 회사별 키워드 목록은 COMPANY_KEYWORD_MAP 참조",
-        f"- 해당 기업의 키워드: {company_keywords_info.strip()}"
-    )
-    updated_base_selection = base_selection.replace(
-        "• 각 회사별 키워드 목록은 COMPANY_KEYWORD_MAP 참조",
-        f"- 해당 기업의 키워드: {company_keywords_info.strip()}"
-    )
     # 해당 회사의 추가 특화 기준 가져오기
     company_additional_exclusion = COMPANY_ADDITIONAL_EXCLUSION_CRITERIA.get(company, "")
     company_additional_duplicate = COMPANY_ADDITIONAL_DUPLICATE_HANDLING.get(company, "")
     company_additional_selection = COMPANY_ADDITIONAL_SELECTION_CRITERIA.get(company, "")
     
-    # 기본 기준 + 회사별 특화 기준 결합
-    enhanced_exclusion_criteria = updated_base_exclusion + company_additional_exclusion
-    enhanced_duplicate_handling = base_duplicate + company_additional_duplicate  
-    enhanced_selection_criteria = updated_base_selection + company_additional_selection
+    # 기본 기준 + 키워드 정보 + 회사별 특화 기준 결합
+    # (prefix 캐시 레이아웃에서는 회사별 부분을 company_criteria로 분리)
+    enhanced_exclusion_criteria, company_criteria_1 = compose_company_exclusion_criteria(company, main_category)
+    enhanced_duplicate_handling, company_criteria_2 = compose_company_criteria(
+        base_duplicate, company_keywords_info, company_additional_duplicate
+    )
+    enhanced_selection_criteria, company_criteria_3 = compose_company_criteria(
+        base_selection, company_keywords_info, company_additional_selection,
+        "• 각 회사별 키워드 목록은 COMPANY_KEYWORD_MAP 참조",
+        f"- 해당 기업의 키워드: {company_keywords_info.strip()}"
+    )
     
     # 특화 기준 적용 여부 로깅
     if company_additional_exclusion:
@@ -527,6 +580,7 @@ def process_company_news(company, keywords):
         "filtered_news": [], 
         "analysis": "", 
         "keyword": keywords,
+        "company": company,
         "model": DEFAULT_GPT_MODEL,
         "excluded_news": [],
         "borderline_news": [],
@@ -537,6 +591,9 @@ def process_company_news(company, keywords):
         "exclusion_criteria": enhanced_exclusion_criteria,
         "duplicate_handling": enhanced_duplicate_handling,
         "selection_criteria": enhanced_selection_criteria,
+        "company_criteria_1": company_criteria_1,
+        "company_criteria_2": company_criteria_2,
+        "company_criteria_3": company_criteria_3,
         "system_prompt_1": SYSTEM_PROMPT_1,
         "user_prompt_1": "",
         "llm_response_1": "",
@@ -555,126 +612,363 @@ def process_company_news(company, keywords):
         "end_datetime": end_datetime,
         "excluded_keywords": excluded_keywords # 카테고리별 키워드 적용
     }
+
+    return {
+        "company": company,
+        "keywords": keywords,
+        "company_category": company_category,
+        "initial_state": initial_state,
+        "category_press_aliases": category_press_aliases,
+        "company_keywords_info": company_keywords_info,
+        "company_additional_exclusion": company_additional_exclusion,
+        "company_additional_duplicate": company_additional_duplicate,
+        "company_additional_selection": company_additional_selection,
+        "dynamic_system_prompt_3": dynamic_system_prompt_3,
+        "start_datetime": start_datetime,
+        "end_datetime": end_datetime,
+        "excluded_keywords": excluded_keywords
+    }
+
+def run_rule_filters(initial_state, prefiltered=None):
+    """1~2.7단계: 뉴스 수집 및 규칙 기반 필터 (prefiltered: 배치 필터 결과가 있으면 수집/규칙 필터 단계 생략)"""
+    if prefiltered is not None:
+        print("1~2.5단계: 컬럼형 배치 필터 결과 사용 (수집/언론사/키워드 필터 완료)")
+        state_after_keyword_filter = {**initial_state, **prefiltered}
+    else:
+        print("1단계: 뉴스 수집 중...")
+        state_after_collection = collect_news(initial_state)
+        
+        print("2단계: 유효 언론사 필터링 중...")
+        state_after_press_filter = filter_valid_press(state_after_collection)
+        
+        print("2.5단계: Rule 기반 키워드 필터링 중...")
+        state_after_keyword_filter = filter_excluded_keywords(state_after_press_filter)
     
-    # Process news through pipeline
-    print("1단계: 뉴스 수집 중...")
-    state_after_collection = collect_news(initial_state)
+    print("2.7단계: 회사 언급 연관성 사전 필터링 중...")
+    return score_company_relevance(state_after_keyword_filter)
+
+def run_relaxed_rule_filters(relaxed_initial_state):
+    """재평가용 규칙 기반 필터 (기존 수집된 뉴스 재사용)"""
+    print("- 1단계: 기존 수집된 뉴스 재사용 (재평가)")
+    # 뉴스 수집 단계 건너뛰고 기존 데이터 사용
+    relaxed_state_after_collection = relaxed_initial_state
     
-    print("2단계: 유효 언론사 필터링 중...")
-    state_after_press_filter = filter_valid_press(state_after_collection)
+    print("- 2단계: 확장된 언론사 필터링 (재평가) 중...")
+    relaxed_state_after_press_filter = filter_valid_press(relaxed_state_after_collection)
     
-    print("2.5단계: Rule 기반 키워드 필터링 중...")
-    state_after_keyword_filter = filter_excluded_keywords(state_after_press_filter)
+    print("- 2.5단계: Rule 기반 키워드 필터링 (재평가) 중...")
+    relaxed_state_after_keyword_filter = filter_excluded_keywords(relaxed_state_after_press_filter)
     
-    print("3단계: 제외 판단 중...")
-    state_after_exclusion = filter_excluded_news(state_after_keyword_filter)
+    print("- 2.7단계: 회사 언급 연관성 사전 필터링 (재평가) 중...")
+    return score_company_relevance(relaxed_state_after_keyword_filter)
+
+# LLM 단계별 진행 메시지 (기본 / 재평가)
+LLM_STAGE_MESSAGES = {
+    False: ["3단계: 제외 판단 중...", "4단계: 그룹핑 중...", "5단계: 중요도 평가 중..."],
+    True: ["- 3단계: 완화된 제외 판단 (재평가) 중...", "- 4단계: 완화된 그룹핑 (재평가) 중...", "- 5단계: 완화된 중요도 평가 (재평가) 중..."]
+}
+
+def run_llm_stages(state, relaxed=False):
+    """3~5단계: LLM 제외 판단 → 그룹핑 → 중요도 평가"""
+    messages = LLM_STAGE_MESSAGES[relaxed]
+    print(messages[0])
+    state_after_exclusion = filter_excluded_news(state)
     
-    print("4단계: 그룹핑 중...")
+    print(messages[1])
     state_after_grouping = group_and_select_news(state_after_exclusion)
     
-    print("5단계: 중요도 평가 중...")
-    final_state = evaluate_importance(state_after_grouping)
+    print(messages[2])
+    return evaluate_importance(state_after_grouping)
 
-    # 6단계: 0개 선택 시 완화된 기준으로 처음부터 재평가
-    if len(final_state["final_selection"]) == 0:
-        # Financial 카테고리는 재평가를 수행하지 않음
-        if company_category == "금융지주" or company_category == "비지주금융그룹" or company_category == "핀테크":
-            print(f"6단계: [{company}] Financial 카테고리는 재평가를 수행하지 않습니다. (카테고리: {company_category})")
-        else:
-            print("6단계: 선택된 뉴스가 없어 완화된 기준으로 처음부터 재평가를 시작합니다...")
-            
-            # 추가 언론사를 포함한 확장된 언론사 설정 (카테고리별 언론사 + 추가 언론사)
-            expanded_valid_press_dict = {**category_press_aliases, **ADDITIONAL_PRESS_ALIASES}
-            
-            # 회사별 키워드 정보를 완화된 기준에도 동적으로 추가
-            # 카테고리에 따라 다른 완화된 기준 사용 (Financial의 경우 일반 인사/내부 운영 제외)
-            category_relaxed_exclusion = RELAXED_EXCLUSION_CRITERIA  # 기본 완화 기준 사용 (모든 카테고리 동일)
-            updated_relaxed_exclusion = category_relaxed_exclusion.replace(
-                "- 각 회사별 키워드 목록은 COMPANY_KEYWORD_MAP 참조",
-                f"- 해당 기업의 키워드: {company_keywords_info.strip()}"
-            )
-            
-            # selection_criteria에도 키워드 정보 반영
-            updated_relaxed_selection = RELAXED_SELECTION_CRITERIA.replace(
-                "• 각 회사별 키워드 목록은 COMPANY_KEYWORD_MAP 참조",
-                f" - 해당 기업의 키워드: {company_keywords_info.strip()}"
-            )
-            
-            # 회사별 완화된 특화 기준 생성
-            relaxed_exclusion_criteria = updated_relaxed_exclusion + company_additional_exclusion
-            relaxed_duplicate_handling = RELAXED_DUPLICATE_HANDLING + company_additional_duplicate
-            relaxed_selection_criteria = updated_relaxed_selection + company_additional_selection
-            
-            # 완화된 기준으로 새로운 초기 상태 생성 (기존 수집된 뉴스 재사용)
-            relaxed_initial_state = {
-                "news_data": final_state.get("original_news_data", []),  # 기존 수집된 뉴스를 news_data로 복사
-                "filtered_news": [], 
-                "analysis": "", 
-                "keyword": keywords,
-                "model": DEFAULT_GPT_MODEL,
-                "excluded_news": [],
-                "borderline_news": [],
-                "retained_news": [],
-                "grouped_news": [],
-                "final_selection": [],
-                # 완화된 기준들 적용
-                "exclusion_criteria": relaxed_exclusion_criteria,
-                "duplicate_handling": relaxed_duplicate_handling,
-                "selection_criteria": relaxed_selection_criteria,
-                "system_prompt_1": SYSTEM_PROMPT_1,
-                "user_prompt_1": "",
-                "llm_response_1": "",
-                "system_prompt_2": SYSTEM_PROMPT_2,
-                "user_prompt_2": "",
-                "llm_response_2": "",
-                "system_prompt_3": dynamic_system_prompt_3,
-                "user_prompt_3": "",
-                "llm_response_3": "",
-                "not_selected_news": [],
-                # 기존 수집된 뉴스 데이터 재사용
-                "original_news_data": final_state.get("original_news_data", []),
-                # 확장된 언론사 설정 적용 (추가 언론사 포함)
-                "valid_press_dict": expanded_valid_press_dict,
-                # 추가 언론사는 빈 딕셔너리로 (이미 valid_press_dict에 포함됨)
-                "additional_press_dict": {},
-                # 날짜 필터 정보
-                "start_datetime": start_datetime,
-                "end_datetime": end_datetime,
-                "excluded_keywords": excluded_keywords # 카테고리별 키워드 적용
-            }
-            
-            print("- 1단계: 기존 수집된 뉴스 재사용 (재평가)")
-            # 뉴스 수집 단계 건너뛰고 기존 데이터 사용
-            relaxed_state_after_collection = relaxed_initial_state
-            
-            print("- 2단계: 확장된 언론사 필터링 (재평가) 중...")
-            relaxed_state_after_press_filter = filter_valid_press(relaxed_state_after_collection)
-            
-            print("- 2.5단계: Rule 기반 키워드 필터링 (재평가) 중...")
-            relaxed_state_after_keyword_filter = filter_excluded_keywords(relaxed_state_after_press_filter)
-            
-            print("- 3단계: 완화된 제외 판단 (재평가) 중...")
-            relaxed_state_after_exclusion = filter_excluded_news(relaxed_state_after_keyword_filter)
-            
-            print("- 4단계: 완화된 그룹핑 (재평가) 중...")
-            relaxed_state_after_grouping = group_and_select_news(relaxed_state_after_exclusion)
-            
-            print("- 5단계: 완화된 중요도 평가 (재평가) 중...")
-            relaxed_final_state = evaluate_importance(relaxed_state_after_grouping)
-            
-            # 재평가 결과가 있으면 최종 상태 업데이트
-            if "final_selection" in relaxed_final_state and relaxed_final_state["final_selection"]:
-                final_state.update(relaxed_final_state)
-                final_state["is_reevaluated"] = True
-                print(f"완화된 기준으로 재평가 후 {len(final_state['final_selection'])}개의 뉴스가 선택되었습니다.")
-            else:
-                print("완화된 기준으로 재평가 후에도 선정할 수 있는 뉴스가 없습니다.")
+async def arun_llm_stages(state, relaxed=False):
+    """run_llm_stages의 비동기 버전 (전역 요청 제한기 공유)"""
+    messages = LLM_STAGE_MESSAGES[relaxed]
+    print(messages[0])
+    state_after_exclusion = await afilter_excluded_news(state)
+    
+    print(messages[1])
+    state_after_grouping = await agroup_and_select_news(state_after_exclusion)
+    
+    print(messages[2])
+    return await aevaluate_importance(state_after_grouping)
+
+def build_relaxed_state(ctx, final_state, speculative=False):
+    """6단계: 0개 선택 시 완화된 기준의 재평가 초기 상태를 만드는 함수 (재평가하지 않으면 None, speculative: 추측 실행용)"""
+    company = ctx["company"]
+    keywords = ctx["keywords"]
+    company_category = ctx["company_category"]
+    category_press_aliases = ctx["category_press_aliases"]
+    company_keywords_info = ctx["company_keywords_info"]
+    company_additional_exclusion = ctx["company_additional_exclusion"]
+    company_additional_duplicate = ctx["company_additional_duplicate"]
+    company_additional_selection = ctx["company_additional_selection"]
+    dynamic_system_prompt_3 = ctx["dynamic_system_prompt_3"]
+    start_datetime = ctx["start_datetime"]
+    end_datetime = ctx["end_datetime"]
+    excluded_keywords = ctx["excluded_keywords"]
+
+    # Financial 카테고리는 재평가를 수행하지 않음
+    if company_category == "금융지주" or company_category == "비지주금융그룹" or company_category == "핀테크":
+        print(f"6단계: [{company}] Financial 카테고리는 재평가를 수행하지 않습니다. (카테고리: {company_category})")
+        return None
+    
+    if speculative:
+        print(f"6단계: [{company}] 선정 0개가 잦은 회사라 완화된 기준 재평가를 동시에 시작합니다 (추측 실행)...")
+    else:
+        print("6단계: 선택된 뉴스가 없어 완화된 기준으로 처음부터 재평가를 시작합니다...")
+
+    # 추가 언론사를 포함한 확장된 언론사 설정 (카테고리별 언론사 + 추가 언론사)
+    expanded_valid_press_dict = {**category_press_aliases, **ADDITIONAL_PRESS_ALIASES}
+
+    # 회사별 키워드 정보를 완화된 기준에도 동적으로 추가
+    # 카테고리에 따라 다른 완화된 기준 사용 (Financial의 경우 일반 인사/내부 운영 제외)
+    category_relaxed_exclusion = RELAXED_EXCLUSION_CRITERIA  # 기본 완화 기준 사용 (모든 카테고리 동일)
+    relaxed_exclusion_criteria, relaxed_company_criteria_1 = compose_company_criteria(
+        category_relaxed_exclusion, company_keywords_info, company_additional_exclusion,
+        "- 각 회사별 키워드 목록은 COMPANY_KEYWORD_MAP 참조",
+        f"- 해당 기업의 키워드: {company_keywords_info.strip()}"
+    )
+
+    # 회사별 완화된 특화 기준 생성 (selection_criteria에도 키워드 정보 반영)
+    relaxed_duplicate_handling, relaxed_company_criteria_2 = compose_company_criteria(
+        RELAXED_DUPLICATE_HANDLING, company_keywords_info, company_additional_duplicate
+    )
+    relaxed_selection_criteria, relaxed_company_criteria_3 = compose_company_criteria(
+        RELAXED_SELECTION_CRITERIA, company_keywords_info, company_additional_selection,
+        "• 각 회사별 키워드 목록은 COMPANY_KEYWORD_MAP 참조",
+        f" - 해당 기업의 키워드: {company_keywords_info.strip()}"
+    )
+
+    # 완화된 기준으로 새로운 초기 상태 생성 (기존 수집된 뉴스 재사용)
+    relaxed_initial_state = {
+        "news_data": final_state.get("original_news_data", []),  # 기존 수집된 뉴스를 news_data로 복사
+        "filtered_news": [], 
+        "analysis": "", 
+        "keyword": keywords,
+        "company": company,
+        "model": DEFAULT_GPT_MODEL,
+        "excluded_news": [],
+        "borderline_news": [],
+        "retained_news": [],
+        "grouped_news": [],
+        "final_selection": [],
+        # 완화된 기준들 적용
+        "exclusion_criteria": relaxed_exclusion_criteria,
+        "duplicate_handling": relaxed_duplicate_handling,
+        "selection_criteria": relaxed_selection_criteria,
+        "company_criteria_1": relaxed_company_criteria_1,
+        "company_criteria_2": relaxed_company_criteria_2,
+        "company_criteria_3": relaxed_company_criteria_3,
+        "system_prompt_1": SYSTEM_PROMPT_1,
+        "user_prompt_1": "",
+        "llm_response_1": "",
+        "system_prompt_2": SYSTEM_PROMPT_2,
+        "user_prompt_2": "",
+        "llm_response_2": "",
+        "system_prompt_3": dynamic_system_prompt_3,
+        "user_prompt_3": "",
+        "llm_response_3": "",
+        "not_selected_news": [],
+        # 기존 수집된 뉴스 데이터 재사용
+        "original_news_data": final_state.get("original_news_data", []),
+        # 확장된 언론사 설정 적용 (추가 언론사 포함)
+        "valid_press_dict": expanded_valid_press_dict,
+        # 추가 언론사는 빈 딕셔너리로 (이미 valid_press_dict에 포함됨)
+        "additional_press_dict": {},
+        # 날짜 필터 정보
+        "start_datetime": start_datetime,
+        "end_datetime": end_datetime,
+        "excluded_keywords": excluded_keywords # 카테고리별 키워드 적용
+    }
     
+    # 증분 재평가 사용 시 1차 결과(유지 판단, 그룹) 재사용 (추측 실행은 1차 결과 전에 시작하므로 제외)
+    if speculative:
+        return relaxed_initial_state
+    return attach_first_pass(relaxed_initial_state, final_state)
+
+def merge_relaxed_result(final_state, relaxed_final_state):
+    """재평가 결과가 있으면 최종 상태를 갱신하는 함수"""
+    if "final_selection" in relaxed_final_state and relaxed_final_state["final_selection"]:
+        final_state.update(relaxed_final_state)
+        final_state["is_reevaluated"] = True
+        print(f"완화된 기준으로 재평가 후 {len(final_state['final_selection'])}개의 뉴스가 선택되었습니다.")
+    else:
+        print("완화된 기준으로 재평가 후에도 선정할 수 있는 뉴스가 없습니다.")
+    return final_state
+
+# 6단계 추측 실행 결과 (실행 후 리포트용)
+_SPECULATIVE_RESULTS = []
+
+def build_speculative_relaxed_state(ctx, state_after_rule_filters):
+    """추측 실행 대상 회사면 완화된 기준 재평가 초기 상태를 만드는 함수 (대상이 아니면 None)"""
+    if not SPECULATIVE_RELAXED_SETTINGS.get("enabled", False) or not is_zero_yield_prone(ctx["company"]):
+        return None
+    # 두 파이프라인이 기사 dict를 동시에 수정하지 않도록 수집된 뉴스를 복사해서 사용
+    snapshot = {"original_news_data": copy.deepcopy(state_after_rule_filters.get("original_news_data", []))}
+    return build_relaxed_state(ctx, snapshot, speculative=True)
+
+def run_speculative_relaxed(relaxed_initial_state, cancel_event, scope):
+    """추측 실행 재평가 (별도 스레드, 단계 사이마다 취소 여부 확인) - (최종 상태 또는 None, 소요 시간) 반환"""
+    started = time.perf_counter()
+    with usage_scope(scope):
+        state = run_relaxed_rule_filters(relaxed_initial_state)
+        for stage_fn, message in zip((filter_excluded_news, group_and_select_news, evaluate_importance), LLM_STAGE_MESSAGES[True]):
+            if cancel_event.is_set():
+                print(f"[추측 실행] 엄격 기준에서 선정되어 재평가 중단 ({message.lstrip('- ')} 전)")
+                return None, time.perf_counter() - started
+            print(f"[추측 실행] {message}")
+            state = stage_fn(state)
+    return state, time.perf_counter() - started
+
+async def arun_speculative_relaxed(relaxed_initial_state, scope):
+    """run_speculative_relaxed의 비동기 버전 (취소는 태스크 취소로 처리)"""
+    started = time.perf_counter()
+    with usage_scope(scope):
+        state = await asyncio.to_thread(run_relaxed_rule_filters, relaxed_initial_state)
+        state = await arun_llm_stages(state, relaxed=True)
+    return state, time.perf_counter() - started
+
+def record_speculative_result(company, scope, used, strict_seconds, relaxed_seconds=0.0, wait_seconds=0.0):
+    """추측 실행 결과 기록 (사용 시 절약 시간 = 재평가 소요 시간 - 엄격 기준 종료 후 대기 시간)"""
+    saved = max(relaxed_seconds - wait_seconds, 0.0) if used else 0.0
+    _SPECULATIVE_RESULTS.append({
+        "company": company, "scope": scope, "used": used,
+        "strict_seconds": strict_seconds, "relaxed_seconds": relaxed_seconds, "saved_seconds": saved
+    })
+    if used:
+        print(f"[추측 실행] [{company}] 완화된 기준 결과 사용 (대기 {wait_seconds:.1f}초, 절약 {saved:.1f}초)")
+    else:
+        print(f"[추측 실행] [{company}] 엄격 기준에서 선정되어 재평가 취소")
+
+def run_with_speculative_relaxed(company, state, relaxed_initial_state):
+    """엄격 기준 LLM 단계와 완화된 기준 재평가를 동시에 실행 (엄격 기준 선정이 있으면 재평가 취소)"""
+    scope = f"speculative:{company}"
+    cancel_event = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="speculative-relaxed")
+    future = executor.submit(run_speculative_relaxed, relaxed_initial_state, cancel_event, scope)
+    executor.shutdown(wait=False)
+
+    started = time.perf_counter()
+    final_state = run_llm_stages(state)
+    strict_seconds = time.perf_counter() - started
+    if final_state["final_selection"]:
+        cancel_event.set()
+        record_speculative_result(company, scope, False, strict_seconds)
+        return final_state
+
+    wait_started = time.perf_counter()
+    try:
+        relaxed_final_state, relaxed_seconds = future.result()
+    except Exception as e:
+        print(f"[추측 실행] [{company}] 재평가 중 오류가 발생했습니다: {str(e)}")
+        return final_state
+    record_speculative_result(company, scope, True, strict_seconds, relaxed_seconds, time.perf_counter() - wait_started)
+    return merge_relaxed_result(final_state, relaxed_final_state)
+
+async def arun_with_speculative_relaxed(company, state, relaxed_initial_state):
+    """run_with_speculative_relaxed의 비동기 버전"""
+    scope = f"speculative:{company}"
+    task = asyncio.create_task(arun_speculative_relaxed(relaxed_initial_state, scope))
+
+    started = time.perf_counter()
+    final_state = await arun_llm_stages(state)
+    strict_seconds = time.perf_counter() - started
+    if final_state["final_selection"]:
+        task.cancel()
+        record_speculative_result(company, scope, False, strict_seconds)
+        return final_state
+
+    wait_started = time.perf_counter()
+    try:
+        relaxed_final_state, relaxed_seconds = await task
+    except Exception as e:
+        print(f"[추측 실행] [{company}] 재평가 중 오류가 발생했습니다: {str(e)}")
+        return final_state
+    record_speculative_result(company, scope, True, strict_seconds, relaxed_seconds, time.perf_counter() - wait_started)
+    return merge_relaxed_result(final_state, relaxed_final_state)
+
+def print_speculative_report():
+    """추측 실행 리포트 (절약 시간, 취소된 추측 실행의 추가 호출/비용)"""
+    if not _SPECULATIVE_RESULTS:
+        return
+    print(f"\n=== 완화 기준 재평가 추측 실행 리포트 ===")
+    total_saved = 0.0
+    extra_calls = 0
+    extra_cost = 0.0
+    for result in _SPECULATIVE_RESULTS:
+        if result["used"]:
+            total_saved += result["saved_seconds"]
+            print(f"- {result['company']}: 사용, 절약 {result['saved_seconds']:.1f}초 "
+                  f"(엄격 {result['strict_seconds']:.1f}초, 재평가 {result['relaxed_seconds']:.1f}초)")
+        else:
+            calls = sum(stats["calls"] for stats in get_scope_usage(result["scope"]).values())
+            cost = estimate_scope_cost(result["scope"])
+            extra_calls += calls
+            extra_cost += cost
+            print(f"- {result['company']}: 취소, 추가 호출 {calls}회, 추가 비용 ${cost:.4f}")
+    used = sum(1 for result in _SPECULATIVE_RESULTS if result["used"])
+    print(f"- 전체: {len(_SPECULATIVE_RESULTS)}개 회사 중 사용 {used}개, 절약 {total_saved:.1f}초, "
+          f"추가 호출 {extra_calls}회, 추가 비용 ${extra_cost:.4f} (취소 시점에 진행 중이던 호출 포함)")
+
+def finish_company_news(company, final_state):
+    """회사별 분석 완료 로그 출력 후 최종 선정 뉴스 반환"""
     print(f"===== 분석 완료: {company} =====")
     print(f"선정된 뉴스: {len(final_state['final_selection'])}개")
     
+    # 추측 실행 대상 선정용 일일 기록 (재평가했으면 엄격 기준 선정 0개)
+    if SPECULATIVE_RELAXED_SETTINGS.get("enabled", False):
+        strict_zero = final_state.get("is_reevaluated", False) or not final_state["final_selection"]
+        record_selection(company, strict_zero, len(final_state["final_selection"]))
+    
     return final_state["final_selection"]
 
+def process_company_news(company, keywords, prefiltered=None):
+    """Process news for a specific company (prefiltered: 배치 필터 결과가 있으면 수집/규칙 필터 단계 생략)"""
+    ctx = build_company_context(company, keywords)
+    
+    # Process news through pipeline
+    state_after_rule_filters = run_rule_filters(ctx["initial_state"], prefiltered)
+
+    # 6단계 추측 실행: 선정 0개가 잦은 회사는 완화된 기준 재평가를 동시에 시작
+    speculative_state = build_speculative_relaxed_state(ctx, state_after_rule_filters)
+    if speculative_state is not None:
+        final_state = run_with_speculative_relaxed(company, state_after_rule_filters, speculative_state)
+        return finish_company_news(company, final_state)
+
+    final_state = run_llm_stages(state_after_rule_filters)
+
+    # 6단계: 0개 선택 시 완화된 기준으로 처음부터 재평가
+    if len(final_state["final_selection"]) == 0:
+        relaxed_initial_state = build_relaxed_state(ctx, final_state)
+        if relaxed_initial_state is not None:
+            relaxed_state_after_rule_filters = run_relaxed_rule_filters(relaxed_initial_state)
+            relaxed_final_state = run_llm_stages(relaxed_state_after_rule_filters, relaxed=True)
+            merge_relaxed_result(final_state, relaxed_final_state)
+    
+    return finish_company_news(company, final_state)
+
+async def aprocess_company_news(company, keywords, prefiltered=None):
+    """process_company_news의 비동기 버전 (수집/규칙 필터는 스레드에서, LLM 단계는 ainvoke로 실행)"""
+    ctx = await asyncio.to_thread(build_company_context, company, keywords)
+    
+    state_after_rule_filters = await asyncio.to_thread(run_rule_filters, ctx["initial_state"], prefiltered)
+
+    speculative_state = build_speculative_relaxed_state(ctx, state_after_rule_filters)
+    if speculative_state is not None:
+        final_state = await arun_with_speculative_relaxed(company, state_after_rule_filters, speculative_state)
+        return finish_company_news(company, final_state)
+
+    final_state = await arun_llm_stages(state_after_rule_filters)
+
+    if len(final_state["final_selection"]) == 0:
+        relaxed_initial_state = build_relaxed_state(ctx, final_state)
+        if relaxed_initial_state is not None:
+            relaxed_state_after_rule_filters = await asyncio.to_thread(run_relaxed_rule_filters, relaxed_initial_state)
+            relaxed_final_state = await arun_llm_stages(relaxed_state_after_rule_filters, relaxed=True)
+            merge_relaxed_result(final_state, relaxed_final_state)
+    
+    return finish_company_news(company, final_state)
+
 # 현재 날짜를 가져오는 함수 추가
 def get_current_date_str():
     """현재 날짜를 YYYY-MM-DD 형식으로 반환합니다. (한국 시간 기준)"""
@@ -824,7 +1118,7 @@ def create_sharepoint_list_items(company, news_list, current_date, sharepoint_co
     if news_list:
         for news in news_list:
             url = news.get('url', '')
-            title = clean_title(news.get('title', ''))
+            title = clean_title(news.get('title', ''), strip_all_brackets=True)
             
             # SharePoint Hyperlink 컬럼 제한에 맞게 URL 처리 (TinyURL 기본 사용)
             truncated_url = truncate_url_for_sharepoint(url)
@@ -1058,13 +1352,58 @@ def output_github_actions_result_by_category(category, all_results, category_str
         return {"category": category, "mode": mode, "status": "skipped"}
 
 # 카테고리별 뉴스 처리 함수
-def process_category_news(category, category_structure):
-    """특정 카테고리의 뉴스를 처리합니다 (새로운 섹션 구조)"""
+def prefilter_category_companies(category_structure):
+    """컬럼형 배치 필터: 카테고리 내 모든 회사의 수집/규칙 필터를 한 번에 처리 (비활성화 시 빈 dict)"""
+    prefiltered_by_company = {}
+    if BATCH_FILTER_SETTINGS.get("enabled", False):
+        company_specs = {}
+        for companies in category_structure.values():
+            for company in companies:
+                main_category = get_main_category_for_company(company)
+                start_datetime, end_datetime = get_company_date_range(company)
+                company_specs[company] = {
+                    "keywords": COMPANY_KEYWORD_MAP.get(company, [company]),
+                    "start_datetime": start_datetime,
+                    "end_datetime": end_datetime,
+                    "valid_press_dict": get_trusted_press_aliases_for_category(main_category),
+                    "excluded_press_aliases": get_excluded_press_aliases_for_category(main_category),
+                    "excluded_keywords": get_excluded_keywords_for_category(main_category)
+                }
+        prefiltered_by_company = batch_filter_companies(company_specs)
+    return prefiltered_by_company
+
+def process_category_news(category, category_structure, batch_results=None):
+    """특정 카테고리의 뉴스를 처리합니다 (새로운 섹션 구조, batch_results: 배치 API 모드에서 미리 처리한 회사별 결과)"""
     print(f"\n====== {category} 카테고리 처리 시작 ======")
     
+    # 배치 API 모드: 전체 카테고리를 미리 단계별 배치로 처리한 결과 사용
+    if batch_results is not None:
+        category_results = {
+            company: batch_results.get(company, [])
+            for section_companies in category_structure.values() for company in section_companies
+        }
+        print(f"====== {category} 카테고리 처리 완료 (배치 API) ======")
+        return category_results
+    
     # Store results for all companies in this category
     category_results = {}
     
+    prefiltered_by_company = prefilter_category_companies(category_structure)
+    
+    # 비동기 모드: 카테고리 내 회사들의 파이프라인을 동시에 실행 (LLM 호출은 전역 요청 제한기 적용)
+    if ASYNC_PIPELINE_SETTINGS.get("enabled", False):
+        companies = [company for section_companies in category_structure.values() for company in section_companies]
+        category_results = asyncio.run(aprocess_companies(companies, prefiltered_by_company))
+        print(f"====== {category} 카테고리 처리 완료 (비동기) ======")
+        return category_results
+    
+    # 회사 묶음 호출 모드: 카테고리 내 회사들의 LLM 단계를 단계별로 묶어서 실행 (추측 재평가는 사용하지 않음)
+    if COMPANY_PACKING_SETTINGS.get("enabled", False):
+        companies = [company for section_companies in category_structure.values() for company in section_companies]
+        category_results = process_companies_packed(companies, prefiltered_by_company)
+        print(f"====== {category} 카테고리 처리 완료 (회사 묶음 호출) ======")
+        return category_results
+    
     # Process each section in the category
     for section_name, companies in category_structure.items():
         print(f"\n--- {section_name} 섹션 처리 중 ---")
@@ -1075,7 +1414,7 @@ def process_category_news(category, category_structure):
             company_keywords = COMPANY_KEYWORD_MAP.get(company, [company])
             
             # Process news for this company
-            final_selection = process_company_news(company, company_keywords)
+            final_selection = process_company_news(company, company_keywords, prefiltered_by_company.get(company))
             
             # Store the results
             category_results[company] = final_selection
@@ -1083,6 +1422,74 @@ def process_category_news(category, category_structure):
     print(f"====== {category} 카테고리 처리 완료 ======")
     return category_results
 
+async def aprocess_companies(companies, prefiltered_by_company=None):
+    """여러 회사의 뉴스를 동시에 처리합니다 (최대 동시 회사 수 제한)"""
+    prefiltered_by_company = prefiltered_by_company or {}
+    semaphore = asyncio.Semaphore(ASYNC_PIPELINE_SETTINGS["max_concurrent_companies"])
+
+    async def process(company):
+        async with semaphore:
+            company_keywords = COMPANY_KEYWORD_MAP.get(company, [company])
+            final_selection = await aprocess_company_news(company, company_keywords, prefiltered_by_company.get(company))
+            return company, final_selection
+
+    try:
+        results = await asyncio.gather(*(process(company) for company in companies))
+    finally:
+        # 이 이벤트 루프에 묶인 연결 정리 (다음 카테고리의 asyncio.run에서 재사용되지 않도록)
+        await aclose_loop_llm_clients()
+    return dict(results)
+
+def process_companies_by_stage(companies, prefiltered_by_company, run_stages, label):
+    """회사별 규칙 필터 후 모든 회사의 LLM 단계를 run_stages(states)로 단계별 실행합니다 (0개 선택 회사의 재평가도 동일)"""
+    prefiltered_by_company = prefiltered_by_company or {}
+    contexts = {}
+    states = {}
+    for company in companies:
+        company_keywords = COMPANY_KEYWORD_MAP.get(company, [company])
+        contexts[company] = build_company_context(company, company_keywords)
+        states[company] = run_rule_filters(contexts[company]["initial_state"], prefiltered_by_company.get(company))
+    
+    print(f"3~5단계: {len(states)}개 회사 단계별 {label} 실행 중...")
+    run_stages(states)
+    
+    # 6단계: 0개 선택 회사만 완화된 기준으로 재평가 (재평가도 단계별 실행)
+    relaxed_states = {}
+    for company, final_state in states.items():
+        if len(final_state["final_selection"]) == 0:
+            relaxed_initial_state = build_relaxed_state(contexts[company], final_state)
+            if relaxed_initial_state is not None:
+                relaxed_states[company] = run_relaxed_rule_filters(relaxed_initial_state)
+    if relaxed_states:
+        print(f"- 3~5단계: {len(relaxed_states)}개 회사 완화된 기준 재평가 {label} 실행 중...")
+        run_stages(relaxed_states)
+        for company, relaxed_final_state in relaxed_states.items():
+            merge_relaxed_result(states[company], relaxed_final_state)
+    
+    return {company: finish_company_news(company, final_state) for company, final_state in states.items()}
+
+def process_companies_batch(companies, prefiltered_by_company=None):
+    """배치 API 모드: 회사별 규칙 필터 후 모든 회사의 LLM 단계를 단계별 배치로 실행합니다"""
+    return process_companies_by_stage(companies, prefiltered_by_company, run_llm_stages_batch, "배치")
+
+def process_companies_packed(companies, prefiltered_by_company=None):
+    """회사 묶음 호출 모드: 입력 기사가 적은 회사끼리 단계별 LLM 호출을 묶어서 실행합니다"""
+    return process_companies_by_stage(companies, prefiltered_by_company, run_llm_stages_packed, "묶음 호출")
+
+def process_categories_batch(selected_categories):
+    """선택된 모든 카테고리의 회사를 한 번에 배치 API로 처리합니다 (카테고리별 배치 필터 결과 사용)"""
+    companies = []
+    prefiltered_by_company = {}
+    for category in selected_categories:
+        if category not in COMPANY_CATEGORIES:
+            continue
+        category_structure = COMPANY_CATEGORIES[category]
+        prefiltered_by_company.update(prefilter_category_companies(category_structure))
+        for section_companies in category_structure.values():
+            companies.extend(company for company in section_companies if company not in companies)
+    print(f"\n====== 배치 API 모드: {len(companies)}개 회사 처리 시작 ======")
+    return process_companies_batch(companies, prefiltered_by_company)
+
 def format_sharepoint_hyperlink(url):
     """SharePoint 하이퍼링크 필드 형태로 URL을 포맷합니다."""
     if not url:
@@ -1116,6 +1523,30 @@ def main():
                 elif mode == "email":
                     execution_mode = "email"
                     print("이메일 모드로 실행합니다.")
+            elif arg == '--async':
+                ASYNC_PIPELINE_SETTINGS["enabled"] = True
+                print("비동기 파이프라인 모드로 실행합니다.")
+            elif arg == '--batch-filter':
+                BATCH_FILTER_SETTINGS["enabled"] = True
+                print("컬럼형 배치 필터 모드로 실행합니다.")
+            elif arg == '--llm-cache':
+                LLM_CACHE_SETTINGS["enabled"] = True
+                print("LLM 응답 캐시를 사용합니다.")
+            elif arg == '--prefix-cache-prompts':
+                PROMPT_LAYOUT_SETTINGS["prefix_cache"] = True
+                print("prefix 캐시 프롬프트 레이아웃을 사용합니다.")
+            elif arg == '--batch-api':
+                BATCH_API_SETTINGS["enabled"] = True
+                print("배치 API 실행 모드로 실행합니다.")
+            elif arg == '--pack-companies':
+                COMPANY_PACKING_SETTINGS["enabled"] = True
+                print("회사 묶음 호출 모드로 실행합니다.")
+            elif arg == '--stream':
+                LLM_STREAMING_SETTINGS["enabled"] = True
+                print("LLM 응답 스트리밍을 사용합니다.")
+            elif arg == '--verdict-cache':
+                STAGE1_VERDICT_CACHE_SETTINGS["enabled"] = True
+                print("1단계 기사 단위 판단 캐시를 사용합니다.")
             elif arg.startswith('--categories='):
                 # 카테고리 선택 처리 (쉼표로 구분)
                 categories = arg.split('=', 1)[1].split(',')
@@ -1132,6 +1563,9 @@ def main():
     # 선택된 카테고리만 처리
     all_summaries = {}
     
+    # 배치 API 모드: 모든 카테고리의 회사를 단계별 배치로 먼저 처리
+    batch_results = process_categories_batch(selected_categories) if BATCH_API_SETTINGS.get("enabled", False) else None
+    
     # 선택된 카테고리만 실행
     for category in selected_categories:
         if category not in COMPANY_CATEGORIES:
@@ -1145,7 +1579,7 @@ def main():
         print(f"{'='*50}")
         
         # 카테고리별 뉴스 처리 (새로운 구조)
-        category_results = process_category_news(category, category_structure)
+        category_results = process_category_news(category, category_structure, batch_results)
         
         # GitHub Actions 모드인 경우 - PowerAutomate로만 전송하고 직접 이메일 발송하지 않음
         if github_actions_mode:
@@ -1191,6 +1625,16 @@ def main():
             print(f"\n====== {category} SharePoint List 처리 ======")
             sharepoint_success = process_sharepoint_list_by_category(category, category_results)
     
+    # LLM 응답/판단 캐시 통계 (캐시 사용 시)
+    print_cache_summary()
+    print_verdict_cache_summary()
+    print_llm_usage_report()
+    print_latency_report()
+    print_retry_summary()
+    print_streaming_report()
+    print_speculative_report()
+    close_llm_clients()
+    
     # GitHub Actions 모드인 경우 전체 요약 반환
     if github_actions_mode:
         print("\n====== 전체 실행 완료 ======")
@@ -0,0 +1,248 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Columnar Batch Filter
+-----------------------
+카테고리 내 모든 회사의 수집 기사를 컬럼 배열(NumPy)로 모아 규칙 기반 필터를 일괄 적용하는 모듈입니다.
+(날짜 범위, 유효 언론사, 제외 언론사, 제외 키워드)
+
+- 기사 컬럼: epoch(발행 시각), press_id(언론사 ID), title(제목), url
+- 회사 소속 비트맵: 기사 × 회사 bool 행렬 (여러 회사 검색에 걸린 기사는 한 번만 판정)
+- 언론사 매칭은 고유 언론사마다 1회, 제외 키워드는 하나의 정규식으로 1회 판정
+- 결과는 회사별로 다시 분리되며 original_index 등은 회사별 단일 파이프라인과 동일하게 부여됩니다.
+"""
+
+import re
+
+import numpy as np
+
+from news_ai import (
+    collect_news,
+    parse_news_date,
+    normalize_string,
+    parse_valid_press_config,
+    normalize_excluded_press_aliases,
+    match_valid_press,
+    is_excluded_press,
+)
+
+
+def _collect_raw_news(company, keywords):
+    """회사 키워드로 뉴스를 수집 (URL 중복 제거까지만, 날짜 필터는 배치에서 적용)"""
+    print(f"\n[배치 필터] {company} 뉴스 수집 중...")
+    state = collect_news({"keyword": keywords})
+    return state.get("news_data", [])
+
+
+def build_article_table(collected_by_company):
+    """
+    회사별 수집 결과를 컬럼 배열과 회사 소속 비트맵으로 변환하는 함수
+
+    Args:
+        collected_by_company (dict): {회사명: [뉴스, ...]} (회사별 수집 순서 유지)
+
+    Returns:
+        dict: 컬럼 배열, 고유 언론사 목록, 회사 소속 비트맵, 회사별 행 순서
+    """
+    companies = list(collected_by_company.keys())
+    url_to_row = {}
+    articles = []
+    company_rows = {}
+
+    for company in companies:
+        rows = []
+        for news in collected_by_company[company]:
+            url = news.get("url", "")
+            row = url_to_row.get(url)
+            if row is None:
+                row = len(articles)
+                url_to_row[url] = row
+                articles.append(news)
+            rows.append(row)
+        company_rows[company] = np.array(rows, dtype=np.int64)
+
+    n_rows = len(articles)
+    membership = np.zeros((n_rows, len(companies)), dtype=bool)
+    for col, company in enumerate(companies):
+        membership[company_rows[company], col] = True
+
+    # 언론사 ID (고유 언론사 목록 인덱스)
+    press_names = []
+    press_to_id = {}
+    press_ids = np.empty(n_rows, dtype=np.int32)
+    for row, news in enumerate(articles):
+        press = normalize_string(news.get("press", ""))
+        press_id = press_to_id.get(press)
+        if press_id is None:
+            press_id = len(press_names)
+            press_to_id[press] = press_id
+            press_names.append(press)
+        press_ids[row] = press_id
+
+    # 발행 시각 (파싱 실패/날짜 없음은 NaN)
+    epochs = np.full(n_rows, np.nan)
+    for row, news in enumerate(articles):
+        news_date = parse_news_date(news.get("date", ""))
+        if news_date is not None:
+            epochs[row] = news_date.timestamp()
+
+    return {
+        "companies": companies,
+        "articles": articles,
+        "epoch": epochs,
+        "press_id": press_ids,
+        "press_names": press_names,
+        "title": np.array([news.get("content", "") for news in articles], dtype=object),
+        "url": np.array([normalize_string(news.get("url", "")) for news in articles], dtype=object),
+        "membership": membership,
+        "company_rows": company_rows
+    }
+
+
+def _date_mask(table, start_datetime, end_datetime):
+    """날짜 범위 마스크 (날짜 없음/파싱 실패 기사는 포함 - collect_news와 동일)"""
+    epochs = table["epoch"]
+    if not (start_datetime and end_datetime):
+        return np.ones(len(epochs), dtype=bool)
+    with np.errstate(invalid="ignore"):
+        in_range = (epochs >= start_datetime.timestamp()) & (epochs <= end_datetime.timestamp())
+    return np.isnan(epochs) | in_range
+
+
+def _press_lookup(table, valid_press_config):
+    """고유 언론사별 유효 언론사 매칭 결과 (언론사당 1회 판정)"""
+    matches = [match_valid_press(press, valid_press_config, verbose=False) for press in table["press_names"]]
+    valid = np.array([main_press is not None for main_press, _ in matches], dtype=bool)
+    return valid, matches
+
+
+def _excluded_press_mask(table, normalized_excluded_aliases):
+    """제외 언론사 마스크 (언론사명은 고유값마다, URL은 제외 별칭이 있을 때만 판정)"""
+    n_rows = len(table["articles"])
+    if not normalized_excluded_aliases:
+        return np.zeros(n_rows, dtype=bool)
+    press_excluded = np.array(
+        [is_excluded_press(press, "", normalized_excluded_aliases) for press in table["press_names"]],
+        dtype=bool
+    )
+    url_excluded = np.fromiter(
+        (is_excluded_press("", url, normalized_excluded_aliases) for url in table["url"]),
+        dtype=bool, count=n_rows
+    )
+    return press_excluded[table["press_id"]] | url_excluded
+
+
+def _keyword_matches(table, excluded_keywords):
+    """제외 키워드 매칭 결과 (제목별 첫 매칭 키워드, 없으면 None)"""
+    n_rows = len(table["articles"])
+    if not excluded_keywords:
+        return np.full(n_rows, None, dtype=object)
+    # 하나의 정규식으로 후보 제목을 먼저 거르고, 매칭 키워드는 목록 순서 기준으로 결정 (filter_excluded_keywords와 동일)
+    pattern = re.compile("|".join(re.escape(keyword) for keyword in excluded_keywords))
+    matches = np.full(n_rows, None, dtype=object)
+    for row, title in enumerate(table["title"]):
+        if pattern.search(title):
+            matches[row] = next(keyword for keyword in excluded_keywords if keyword in title)
+    return matches
+
+
+def batch_filter_companies(company_specs):
+    """
+    카테고리 내 회사들의 뉴스를 수집하고 규칙 기반 필터를 일괄 적용하는 함수
+
+    Args:
+        company_specs (dict): {회사명: {"keywords", "start_datetime", "end_datetime",
+                                        "valid_press_dict", "excluded_press_aliases", "excluded_keywords"}}
+
+    Returns:
+        dict: {회사명: {"original_news_data", "news_data", "excluded_by_keywords"}}
+              (collect_news → filter_valid_press → filter_excluded_keywords 결과와 동일한 형태)
+    """
+    collected = {
+        company: _collect_raw_news(company, spec["keywords"])
+        for company, spec in company_specs.items()
+    }
+    table = build_article_table(collected)
+    companies = table["companies"]
+    n_rows = len(table["articles"])
+    print(f"\n=== 컬럼형 배치 필터 ===")
+    print(f"회사 수: {len(companies)}, 고유 기사 수: {n_rows}, 고유 언론사 수: {len(table['press_names'])}")
+
+    # 회사별 규칙을 열 단위 마스크 행렬로 구성 (같은 설정은 한 번만 계산)
+    date_matrix = np.zeros((n_rows, len(companies)), dtype=bool)
+    press_matrix = np.zeros((n_rows, len(companies)), dtype=bool)
+    keyword_matrix = np.zeros((n_rows, len(companies)), dtype=bool)
+    press_cache, excluded_cache, keyword_cache, date_cache = {}, {}, {}, {}
+    press_matches_by_company = {}
+    keyword_matches_by_company = {}
+
+    for col, company in enumerate(companies):
+        spec = company_specs[company]
+
+        date_key = (spec.get("start_datetime"), spec.get("end_datetime"))
+        if date_key not in date_cache:
+            date_cache[date_key] = _date_mask(table, *date_key)
+        date_matrix[:, col] = date_cache[date_key]
+
+        valid_press_config = parse_valid_press_config(spec.get("valid_press_dict", ""))
+        press_key = repr(valid_press_config)
+        if press_key not in press_cache:
+            press_cache[press_key] = _press_lookup(table, valid_press_config)
+        press_valid, press_matches = press_cache[press_key]
+        press_matches_by_company[company] = press_matches
+
+        excluded_aliases = tuple(normalize_excluded_press_aliases(spec.get("excluded_press_aliases", {})))
+        if excluded_aliases not in excluded_cache:
+            excluded_cache[excluded_aliases] = _excluded_press_mask(table, list(excluded_aliases))
+        press_matrix[:, col] = press_valid[table["press_id"]] & ~excluded_cache[excluded_aliases]
+
+        keywords_key = tuple(spec.get("excluded_keywords", []) or [])
+        if keywords_key not in keyword_cache:
+            keyword_cache[keywords_key] = _keyword_matches(table, list(keywords_key))
+        keyword_matches_by_company[company] = keyword_cache[keywords_key]
+        keyword_matrix[:, col] = keyword_cache[keywords_key] != None  # noqa: E711 (object 배열 비교)
+
+    # 모든 규칙을 한 번에 적용
+    in_window = table["membership"] & date_matrix
+    press_ok = in_window & press_matrix
+    keep = press_ok & ~keyword_matrix
+
+    # 회사별로 결과 분리
+    results = {}
+    for col, company in enumerate(companies):
+        rows = table["company_rows"][company]
+        window_rows = rows[in_window[rows, col]]
+
+        original_news_data = []
+        news_data = []
+        excluded_by_keywords = []
+        for original_index, row in enumerate(window_rows, 1):
+            # 회사마다 파이프라인에서 기사 dict를 수정하므로 회사별 사본 사용
+            news = dict(table["articles"][row])
+            news["original_index"] = original_index
+            original_news_data.append(news)
+            if not press_ok[row, col]:
+                continue
+            main_press, alias = press_matches_by_company[company][table["press_id"][row]]
+            news["matched_press"] = main_press
+            news["matched_alias"] = alias
+            if keep[row, col]:
+                news_data.append(news)
+            else:
+                excluded_by_keywords.append({
+                    "title": news.get("content", ""),
+                    "url": news.get("url", ""),
+                    "matched_keyword": keyword_matches_by_company[company][row],
+                    "press": news.get("press", "알 수 없음")
+                })
+
+        results[company] = {
+            "original_news_data": original_news_data,
+            "news_data": news_data,
+            "excluded_by_keywords": excluded_by_keywords
+        }
+        print(f"- {company}: 수집 {len(rows)}개 → 날짜 범위 내 {len(window_rows)}개 → "
+              f"유효 언론사 {int(press_ok[rows, col].sum())}개 → 키워드 필터 후 {len(news_data)}개")
+
+    return results
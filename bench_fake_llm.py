@@ -0,0 +1,280 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Fake LLM Benchmark
+-----------------------
+가짜 LLM 서버(fake_llm_server.py)를 같은 프로세스에서 띄우고 OPENAI_BASE_URL로 전환한 뒤,
+같은 합성 기사 목록으로 실행 모드(sync/async/packed/batch)별 소요 시간, LLM 호출 수/토큰, 서버 통계를 비교합니다.
+응답 내용이 결정적이므로 오케스트레이션/동시성/캐시 변경의 효과만 측정할 수 있습니다.
+(뉴스 수집은 하지 않고 회사별 합성 기사를 배치 필터 결과처럼 넘김)
+batch 모드는 로컬 대체 배치 실행기(LocalBatchBackend)로 가짜 서버를 호출하되 단계별 결과 1건은 누락, 1건은 손상시켜
+동기 호출 재처리 경로까지 실행하고, 선정 결과가 sync 모드와 같은지 확인합니다 (다르면 종료 코드 1).
+
+사용법:
+    python bench_fake_llm.py [--companies=삼성,SK] [--category=Anchor] [--articles=20] [--modes=sync,async,packed,batch]
+                             [--latency=lognormal:0.8,0.5] [--error-rate=0.01] [--throttle-rate=0.05] [--seed=0]
+                             [--output=logs/bench_fake_llm.json]
+    python bench_fake_llm.py --check-escalation [--companies=삼성]
+        (2단계 저가 모델 응답 실패 시 기본 모델로 재요청되는지 확인, 실패하면 종료 코드 1)
+"""
+
+import os
+import sys
+import json
+import copy
+import time
+import asyncio
+import tempfile
+import urllib.request
+from datetime import datetime, timezone
+
+from config import (
+    COMPANY_CATEGORIES, COMPANY_KEYWORD_MAP, COMPANY_PACKING_SETTINGS, STAGE_MODEL_SETTINGS, DEFAULT_GPT_MODEL, BATCH_API_SETTINGS
+)
+from auto_news_mail import process_company_news, aprocess_companies, process_companies_packed, process_companies_batch
+from llm_batch import LocalBatchBackend, set_batch_backend
+from fake_llm_server import start_fake_llm_server, parse_server_args
+from llm_stats import get_llm_usage, reset_llm_usage
+
+MODES = ("sync", "async", "packed", "batch")
+SYNTHETIC_PRESSES = ("한국경제", "매일경제", "조선비즈", "연합뉴스", "서울경제")
+SYNTHETIC_TOPICS = (
+    "3분기 실적 발표", "신규 투자 계획 발표", "해외 공장 증설", "최고경영자 인사", "인수합병 추진",
+    "신제품 출시", "사회공헌 봉사활동", "프로야구 구단 우승", "채용 설명회 개최", "지배구조 개편"
+)
+
+
+def build_synthetic_news(company, count):
+    """회사별 결정적 합성 기사 (같은 주제는 언론사만 달리해 중복 기사로 만듦)"""
+    keyword = COMPANY_KEYWORD_MAP.get(company, [company])[0]
+    date = datetime.now(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S GMT")
+    news_data = []
+    for i in range(count):
+        topic = SYNTHETIC_TOPICS[(i // 2) % len(SYNTHETIC_TOPICS)]
+        press = SYNTHETIC_PRESSES[i % len(SYNTHETIC_PRESSES)]
+        round_no = i // (2 * len(SYNTHETIC_TOPICS))
+        title = f"{keyword} {topic}" + (f" {round_no + 1}차" if round_no else "")
+        news_data.append({
+            "url": f"https://fake.news/{company}/{i}",
+            "content": f"{title} - {press}",
+            "press": press,
+            "date": date,
+            "original_index": i + 1,
+            "matched_press": press,
+            "matched_alias": press
+        })
+    return {"original_news_data": list(news_data), "news_data": news_data, "excluded_by_keywords": []}
+
+
+class FlakyLocalBatchBackend(LocalBatchBackend):
+    """배치 결과마다 1건은 누락, 1건은 JSON이 아닌 응답으로 바꾸는 로컬 배치 실행기 (동기 호출 재처리 확인용)"""
+
+    def __init__(self):
+        super().__init__()
+        self.dropped = 0
+        self.corrupted = 0
+
+    def results(self, batch_id: str) -> list:
+        lines = super().results(batch_id)
+        if lines:
+            lines = lines[1:]
+            self.dropped += 1
+        if lines:
+            record = json.loads(lines[0])
+            if record.get("response"):
+                record["response"]["body"]["choices"][0]["message"]["content"] = "응답을 생성할 수 없습니다."
+                lines[0] = json.dumps(record, ensure_ascii=False)
+                self.corrupted += 1
+        return lines
+
+
+def _usage_totals(usage):
+    totals = {"calls": 0, "input_tokens": 0, "cached_tokens": 0, "output_tokens": 0}
+    for stats in usage.values():
+        for key in totals:
+            totals[key] += stats.get(key, 0)
+    return totals
+
+
+def run_mode(mode, companies, prefiltered_by_company, server):
+    """실행 모드 1개를 처음부터 실행하고 소요 시간/사용량/서버 통계 반환"""
+    prefiltered_by_company = copy.deepcopy(prefiltered_by_company)
+    reset_llm_usage()
+    server.reset()
+    original_packing = COMPANY_PACKING_SETTINGS.get("enabled", False)
+    original_batch = dict(BATCH_API_SETTINGS)
+    batch_backend = None
+    started = time.perf_counter()
+    try:
+        if mode == "sync":
+            results = {
+                company: process_company_news(company, COMPANY_KEYWORD_MAP.get(company, [company]), prefiltered_by_company[company])
+                for company in companies
+            }
+        elif mode == "async":
+            results = asyncio.run(aprocess_companies(companies, prefiltered_by_company))
+        elif mode == "packed":
+            COMPANY_PACKING_SETTINGS["enabled"] = True
+            results = process_companies_packed(companies, prefiltered_by_company)
+        else:
+            with tempfile.TemporaryDirectory(prefix="bench_batches_") as directory:
+                BATCH_API_SETTINGS.update({"directory": directory, "poll_interval_seconds": 0.1})
+                batch_backend = FlakyLocalBatchBackend()
+                set_batch_backend(batch_backend)
+                results = process_companies_batch(companies, prefiltered_by_company)
+    finally:
+        COMPANY_PACKING_SETTINGS["enabled"] = original_packing
+        BATCH_API_SETTINGS.update(original_batch)
+        if batch_backend is not None:
+            set_batch_backend(None)
+    elapsed = time.perf_counter() - started
+    report = {
+        "seconds": round(elapsed, 2),
+        "usage": _usage_totals(get_llm_usage()),
+        "server": server.snapshot(),
+        "selected": {company: len(selection) for company, selection in results.items()},
+        "selected_urls": {company: sorted(news.get("url", "") for news in selection) for company, selection in results.items()}
+    }
+    if batch_backend is not None:
+        report["batch_fallbacks"] = {"dropped": batch_backend.dropped, "corrupted": batch_backend.corrupted}
+    return report
+
+
+def check_batch_matches_sync(reports) -> bool:
+    """batch 모드(결과 누락/손상 후 동기 재처리 포함)의 회사별 선정 기사가 sync 모드와 같은지 확인"""
+    fallbacks = reports["batch"]["batch_fallbacks"]
+    passed = reports["batch"]["selected_urls"] == reports["sync"]["selected_urls"] and fallbacks["dropped"] >= 1
+    print("\n=== 배치 모드 확인 ===")
+    print(f"결과 누락 {fallbacks['dropped']}건, 손상 {fallbacks['corrupted']}건 동기 재처리, "
+          f"sync 모드와 선정 결과 {'일치' if passed else '불일치'} → {'통과' if passed else '실패'}")
+    return passed
+
+
+def check_escalation(company, articles, server) -> bool:
+    """2단계만 저가 모델로 지정하고 그 모델 응답을 깨뜨려, 실패한 2단계 호출이 기본 모델로 재요청되는지 확인"""
+    cheap_model = "gpt-4o-mini" if DEFAULT_GPT_MODEL != "gpt-4o-mini" else "gpt-4.1-mini"
+    original_settings = {key: STAGE_MODEL_SETTINGS[key] for key in ("enabled", "stages", "escalation")}
+    original_malformed = server.settings["malformed_models"]
+    STAGE_MODEL_SETTINGS.update({
+        "enabled": True,
+        "stages": {1: None, 2: cheap_model, 3: None},
+        "escalation": {**STAGE_MODEL_SETTINGS["escalation"], "on_failure": True}
+    })
+    server.settings["malformed_models"] = [cheap_model]
+    server.reset()
+    try:
+        process_company_news(company, COMPANY_KEYWORD_MAP.get(company, [company]), build_synthetic_news(company, articles))
+    finally:
+        STAGE_MODEL_SETTINGS.update(original_settings)
+        server.settings["malformed_models"] = original_malformed
+    models = server.snapshot()["models"]
+    cheap_calls = sum(count for key, count in models.items() if key.endswith(f"_2:{cheap_model}"))
+    default_calls = sum(count for key, count in models.items() if key.endswith(f"_2:{DEFAULT_GPT_MODEL}"))
+    passed = cheap_calls >= 1 and default_calls >= 1
+    print(f"\n=== 모델 에스컬레이션 확인 ===")
+    print(f"2단계 호출: {cheap_model} {cheap_calls}회, {DEFAULT_GPT_MODEL} {default_calls}회 → {'통과' if passed else '실패'}")
+    return passed
+
+
+def _category_companies(name):
+    """카테고리명(Corporate) 또는 섹션명(Anchor)으로 회사 목록 반환"""
+    if name in COMPANY_CATEGORIES:
+        return [company for section in COMPANY_CATEGORIES[name].values() for company in section]
+    for sections in COMPANY_CATEGORIES.values():
+        if name in sections:
+            return list(sections[name])
+    print(f"경고: {name}는 유효하지 않은 카테고리입니다.")
+    return []
+
+
+def print_report(reports):
+    """모드별 결과 출력 (선정 결과가 모드마다 다르면 경고)"""
+    print(f"\n=== 가짜 LLM 벤치마크 결과 ===")
+    for mode, report in reports.items():
+        usage = report["usage"]
+        server = report["server"]
+        print(f"[{mode}] 소요 {report['seconds']:.1f}초, 호출 {usage['calls']}회, 입력 {usage['input_tokens']} 토큰 "
+              f"(캐시 {usage['cached_tokens']}), 출력 {usage['output_tokens']} 토큰 / 서버 요청 {server['requests']}회 "
+              f"(요청 제한 {server['throttled']}회, 오류 {server['errors']}회), 선정 {sum(report['selected'].values())}개")
+    selections = {json.dumps(report["selected"], sort_keys=True, ensure_ascii=False) for report in reports.values()}
+    if len(selections) > 1:
+        print("경고: 모드별 회사별 선정 수가 다릅니다. (묶음 호출은 회사 섹션 단위로 응답하므로 다를 수 있음)")
+
+
+def main():
+    companies = []
+    articles = 20
+    modes = list(MODES)
+    output_path = os.path.join("logs", "bench_fake_llm.json")
+    server_args = []
+    escalation_check = False
+    for arg in sys.argv[1:]:
+        if arg.startswith("--companies="):
+            companies = [c.strip() for c in arg.split("=", 1)[1].split(",") if c.strip()]
+        elif arg.startswith("--category="):
+            companies.extend(_category_companies(arg.split("=", 1)[1].strip()))
+        elif arg.startswith("--articles="):
+            articles = int(arg.split("=", 1)[1])
+        elif arg.startswith("--modes="):
+            modes = [m.strip() for m in arg.split("=", 1)[1].split(",") if m.strip() in MODES]
+        elif arg.startswith("--output="):
+            output_path = arg.split("=", 1)[1]
+        elif arg == "--check-escalation":
+            escalation_check = True
+        else:
+            server_args.append(arg)
+    if escalation_check and not companies:
+        companies = [next(iter(COMPANY_KEYWORD_MAP))]
+    if not companies or not modes:
+        print(__doc__)
+        return
+    if "batch" in modes and "sync" not in modes:
+        # batch 모드 결과는 sync 모드와 비교
+        modes.insert(0, "sync")
+
+    overrides = parse_server_args(server_args)
+    server = start_fake_llm_server(overrides, port=0)
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+    os.environ.setdefault("OPENAI_API_KEY", "fake-key")
+    print(f"[가짜 LLM 벤치마크] 서버 {server.base_url}, 회사 {len(companies)}곳, 회사별 기사 {articles}개")
+
+    # 서버 응답 확인
+    with urllib.request.urlopen(f"{server.base_url}/models", timeout=5) as response:
+        response.read()
+
+    if escalation_check:
+        try:
+            passed = check_escalation(companies[0], articles, server)
+        finally:
+            server.shutdown()
+            server.server_close()
+        sys.exit(0 if passed else 1)
+
+    prefiltered_by_company = {company: build_synthetic_news(company, articles) for company in companies}
+    reports = {}
+    try:
+        for mode in modes:
+            print(f"\n--- {mode} 실행 ---")
+            reports[mode] = run_mode(mode, companies, prefiltered_by_company, server)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    print_report(reports)
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "run_at": datetime.now(timezone.utc).isoformat(),
+            "companies": companies,
+            "articles_per_company": articles,
+            "server_settings": server.settings,
+            "reports": reports
+        }, f, ensure_ascii=False, indent=2)
+    print(f"결과 저장: {output_path}")
+    if "batch" in reports and not check_batch_matches_sync(reports):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
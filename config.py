@@ -743,7 +743,303 @@ GPT_MODELS = {
 
 # Default GPT model to use
 #DEFAULT_GPT_MODEL = "gpt-4.1"
-DEFAULT_GPT_MODEL = "gpt-4.1" 
+DEFAULT_GPT_MODEL = "gpt-4.1"
+
+# 모델별 토큰 단가 (USD / 100만 토큰, 사용량 리포트의 비용 추정용 - 공급자 가격 변경 시 갱신)
+# 모델명이 정확히 일치하지 않으면 모델명에 포함된 가장 긴 키 사용 (예: "openai.gpt-4.1-2025-04-14" → "gpt-4.1")
+MODEL_PRICING = {
+    "gpt-4.1": {"input": 2.00, "cached_input": 0.50, "output": 8.00},
+    "gpt-4.1-mini": {"input": 0.40, "cached_input": 0.10, "output": 1.60},
+    "gpt-4.1-nano": {"input": 0.10, "cached_input": 0.025, "output": 0.40},
+    "gpt-4o": {"input": 2.50, "cached_input": 1.25, "output": 10.00},
+    "gpt-4-turbo": {"input": 10.00, "cached_input": 10.00, "output": 30.00},
+    "gpt-3.5-turbo": {"input": 0.50, "cached_input": 0.50, "output": 1.50}
+}
+
+# 로컬 1단계 분류기 설정 (LLM 1단계 판단 로그로 학습한 경량 분류기)
+# mode:
+#   "off"    - 로컬 분류기 사용 안 함 (LLM만 사용)
+#   "shadow" - 로컬 분류기는 예측만 하고 모든 기사는 LLM으로 판단 (일치율 리포트용)
+#   "active" - 신뢰도가 임계값 이상인 기사는 로컬에서 판단하고 나머지만 LLM으로 전달
+# thresholds: 분류별 최소 신뢰도 (None이면 해당 분류는 로컬에서 판단하지 않음)
+# 학습: python local_classifier.py train / 평가: python local_classifier.py evaluate
+LOCAL_CLASSIFIER_SETTINGS = {
+    "mode": "off",
+    "log_enabled": True,  # LLM 1단계 판단 결과를 학습 로그로 기록
+    "log_path": "logs/stage1_verdicts.jsonl",
+    "model_path": "models/stage1_classifier.npz",
+    "thresholds": {
+        "excluded": 0.90,
+        "borderline": None,
+        "retained": 0.95
+    },
+    "n_features": 2 ** 18,  # 해시 특징 차원 수
+    "ngram_range": (2, 4),  # 문자 n-gram 범위
+    "epochs": 200,
+    "learning_rate": 0.05,
+    "l2": 1e-6,
+    "holdout_ratio": 0.2  # 일치율 평가용 검증 데이터 비율
+}
+
+# 회사 언급 연관성 점수 기반 사전 필터 설정 (1단계 LLM 호출 전 적용)
+# 점수: 제목 내 키워드 위치, 등장 횟수, 대표명/계열사명 여부, 다른 회사가 앞서는 제목 감점 (0.0 ~ 1.0)
+RELEVANCE_FILTER_SETTINGS = {
+    "enabled": False,
+    "mode": "demote",  # "drop": 기준 미만 기사 제거 / "demote": 기준 미만 기사를 목록 뒤로 이동
+    "cutoff": 0.3,  # 연관성 점수 기준값
+    "sort_by_relevance": True,  # 연관성 점수 내림차순 정렬 (토큰 예산 내 중요 기사 우선 포함)
+    "max_articles": None,  # 1단계로 넘길 최대 기사 수 (None이면 제한 없음)
+    "weights": {
+        "title_hit": 0.5,  # 제목에 키워드 포함
+        "position": 0.25,  # 키워드가 제목 앞쪽에 위치할수록 가산
+        "hit_count": 0.1,  # 키워드 여러 번 등장 시 가산
+        "main_name": 0.15,  # 대표명(첫 번째 키워드) 일치 시 가산 (계열사명만 일치하면 절반)
+        "other_company_lead": -0.3  # 다른 회사명이 제목 맨 앞에 오는 경우 감점
+    }
+}
+
+# 중복 그룹 대표 기사 로컬 선택 설정 (DUPLICATE_HANDLING의 언론사 우선순위를 컴파일하여 사용)
+# 활성화 시 2단계 LLM은 그룹(indices)만 응답하고 대표 기사(selected_index)는 로컬에서 결정
+REPRESENTATIVE_SELECTION_SETTINGS = {
+    "enabled": False,
+    "tiebreakers": ["press_priority", "title_length", "time"],  # 대표 기사 선택 기준 적용 순서
+    "time_order": "latest"  # "latest": 최신 기사 우선 (DUPLICATE_HANDLING 기준) / "earliest": 최초 보도 우선
+}
+
+# 카테고리 단위 컬럼형 배치 필터 설정 (auto_news_mail.py 전용, --batch-filter 인자로도 활성화)
+# 카테고리 내 모든 회사의 수집 기사를 한 번에 컬럼 배열로 만들어 날짜/언론사/키워드 규칙을 일괄 적용
+BATCH_FILTER_SETTINGS = {
+    "enabled": False
+}
+
+# LLM 클라이언트 풀 설정 (모델/온도/Base URL별 ChatOpenAI 객체와 HTTP 연결 재사용)
+LLM_CLIENT_POOL_SETTINGS = {
+    "enabled": True,
+    "max_connections": 20,  # 최대 동시 연결 수
+    "max_keepalive_connections": 10,  # 유지할 keep-alive 연결 수
+    "keepalive_expiry": 60.0,  # keep-alive 연결 유지 시간 (초)
+    "timeout": 120.0  # HTTP 요청 타임아웃 (초)
+}
+
+# LLM 전역 요청 제한 설정 (동기/비동기 호출 공통, 여러 회사 동시 실행 시 적용)
+LLM_RATE_LIMIT_SETTINGS = {
+    "max_in_flight": 8,  # 최대 동시 요청 수
+    "tokens_per_minute": 450000,  # 분당 토큰 예산 (입력 + 예상 출력)
+    "requests_per_minute": 500,  # 분당 요청 수 예산
+    "expected_output_tokens": 2000  # 요청당 예상 출력 토큰 (예산 계산용)
+}
+
+# 비동기 파이프라인 설정 (auto_news_mail.py, --async 인자로도 활성화)
+ASYNC_PIPELINE_SETTINGS = {
+    "enabled": False,
+    "max_concurrent_companies": 8  # 동시에 처리할 최대 회사 수
+}
+
+# LLM 응답 캐시 설정 (app.py와 auto_news_mail.py가 같은 디렉토리 공유, 환경변수 LLM_CACHE_DIR로 변경 가능)
+LLM_CACHE_SETTINGS = {
+    "enabled": False,
+    "directory": ".llm_cache",  # 상대 경로는 저장소 루트 기준
+    "filename": "llm_cache.sqlite3",
+    "ttl_seconds": 24 * 60 * 60,  # 캐시 유효 시간 (초, 0이면 무제한)
+    "max_bytes": 200 * 1024 * 1024,  # 응답 전체 크기 상한 (초과 시 LRU 삭제)
+    "max_entries": 20000  # 최대 항목 수
+}
+
+# 1단계 기사 단위 판단 캐시 설정 (LLM 응답 캐시와 같은 디렉토리 사용)
+STAGE1_VERDICT_CACHE_SETTINGS = {
+    "enabled": False,
+    "filename": "stage1_verdicts.sqlite3",
+    "ttl_seconds": 3 * 24 * 60 * 60  # 판단 유효 시간 (초, 0이면 무제한)
+}
+
+# 구조화 출력 설정 (단계별 JSON schema로 응답 형식 강제, 파싱 재시도 없음)
+STRUCTURED_OUTPUT_SETTINGS = {
+    "enabled": False,
+    "method": "json_schema",  # json_schema(권장) / function_calling
+    "strict": True  # 스키마 엄격 검증
+}
+
+# 1단계 토큰 예산 분할 설정 (기사 목록을 예산 안의 청크로 나누어 병렬 분류, 카테고리별 20개 제한 없음)
+STAGE1_CHUNK_SETTINGS = {
+    "enabled": False,
+    "max_prompt_tokens": 6000,  # 청크당 프롬프트 토큰 예산 (시스템 + 사용자 프롬프트)
+    "max_articles_per_chunk": 40,  # 청크당 최대 기사 수 (응답 길이 제한)
+    "max_workers": 4  # 동기 실행 시 동시에 처리할 청크 수
+}
+
+# 프롬프트 레이아웃 설정 (prefix_cache: 고정 기준/형식을 앞에, 회사별 기준과 뉴스 목록을 뒤에 배치해 공급자 프롬프트 캐시 적중)
+PROMPT_LAYOUT_SETTINGS = {
+    "prefix_cache": False
+}
+
+# 간결 응답 설정 (지정한 단계는 제목/언론사/날짜 없이 인덱스와 판단만 응답, 제목 등은 로컬에서 복원)
+TERSE_RESPONSE_SETTINGS = {
+    "stages": [],  # 간결 응답을 사용할 단계 (예: [1, 2, 3])
+    "include_reason": True,  # False면 사유 생략
+    "max_reason_chars": 30  # 사유 최대 글자 수
+}
+
+# 단일 호출 모드 설정 (제외 판단/그룹핑/중요도 평가를 LLM 1회 호출로 처리, state 형태는 3단계와 동일)
+SINGLE_PASS_SETTINGS = {
+    "enabled": False
+}
+
+# 단계별 모델 설정 (저가 모델 우선 실행 후 필요한 경우만 기본 모델로 재요청)
+# stages: 단계별 모델 (None이면 화면/실행 인자로 선택한 기본 모델 사용, 모델명은 GPT_MODELS 참고)
+# escalation.on_failure: 저가 모델 응답이 파싱/스키마 검증에 실패하면 기본 모델로 재요청
+# escalation.borderline: 1단계에서 저가 모델이 '보류'로 판단한 기사만 기본 모델로 다시 판단
+STAGE_MODEL_SETTINGS = {
+    "enabled": False,
+    "stages": {1: "gpt-4.1-mini", 2: "gpt-4.1-mini", 3: None},
+    "escalation": {
+        "on_failure": True,
+        "borderline": True
+    }
+}
+
+# LLM 재시도 제어 설정 (llm_retry.py, 429/5xx/연결 오류 재시도 + 전역 동시성 AIMD 조정)
+# 활성화 시 ChatOpenAI 자체 재시도는 끄고 이 컨트롤러가 Retry-After/지수 백오프(전체 지터)로 재시도
+LLM_RETRY_SETTINGS = {
+    "enabled": False,
+    "max_attempts": 6,  # 첫 호출 포함 최대 시도 횟수
+    "base_delay": 1.0,  # 지수 백오프 기본 대기 시간 (초)
+    "max_delay": 60.0,  # 최대 대기 시간 (초)
+    "aimd": {
+        "enabled": True,
+        "min_in_flight": 1,
+        "max_in_flight": 16,
+        "increase_every": 10,  # 연속 성공 N회마다 최대 동시 요청 수 +1
+        "decrease_factor": 0.5,  # 요청 제한(429) 시 최대 동시 요청 수 × 0.5
+        "cooldown_seconds": 5.0  # 감소 후 이 시간 안의 429는 추가 감소 없음 (같은 혼잡에 대한 중복 반영 방지)
+    }
+}
+
+# LLM 호출 데드라인/헤징 설정 (llm_hedging.py)
+# stage_timeouts: 단계별 호출 제한 시간(초, None이면 제한 없음) - 초과 시 timeout_retries 횟수만큼 새 요청으로 재시도
+# hedging: 호출이 단계/모델별 최근 지연 시간의 percentile(p95)을 넘기면 같은 요청을 추가로 보내고 먼저 도착한 응답 사용
+LLM_DEADLINE_SETTINGS = {
+    "enabled": False,
+    "stage_timeouts": {1: 120, 2: 90, 3: 120},
+    "timeout_retries": 1,
+    "hedging": {
+        "enabled": False,
+        "percentile": 95,
+        "min_samples": 20,  # 표본이 이보다 적으면 default_delay 사용
+        "default_delay": 30,  # 초
+        "min_delay": 5,  # 초 (표본이 빠르게 나와도 이보다 빨리 추가 요청하지 않음)
+        "max_hedges": 1,  # 요청당 최대 추가 요청 수
+        "window": 200  # 단계/모델별 최근 지연 시간 표본 수
+    },
+    "max_workers": 16  # 동기 호출용 공유 스레드 수
+}
+
+# 배치 API 실행 모드 설정 (auto_news_mail.py 전용, --batch-api 인자로도 활성화)
+# 모든 회사의 단계별 LLM 요청을 JSONL 배치 1개로 제출하고 완료를 기다린 뒤 다음 단계 진행 (llm_batch.py)
+# 배치에서 실패/누락된 요청은 동기 호출로 재처리
+BATCH_API_SETTINGS = {
+    "enabled": False,
+    "backend": "openai",  # "openai": OpenAI Batch API / "local": 로컬 대체 실행기 (테스트용)
+    "directory": "logs/batches",  # 요청/결과 JSONL 저장 경로
+    "completion_window": "24h",
+    "poll_interval_seconds": 30,
+    "timeout_seconds": 3 * 60 * 60,  # 단계별 최대 대기 시간 (초과 시 남은 요청은 동기 호출)
+    "price_ratio": 0.5,  # 동기 호출 대비 배치 단가 비율 (비용 리포트용)
+    "local_workers": 4  # 로컬 대체 실행기 동시 실행 수
+}
+
+# 2단계 그룹핑 방식 설정 (local_grouping.py)
+# "llm": 기존 LLM 그룹핑 / "local": 문자 n-gram TF-IDF + 숫자/계열사명 겹침 기반 로컬 군집화 (LLM 호출 없음)
+# "hybrid": 로컬 군집화 후 경계가 모호한 군집의 기사만 LLM으로 그룹핑
+# 로컬 군집의 대표 기사는 언론사 우선순위(REPRESENTATIVE_SELECTION_SETTINGS 기준)로 선택
+LOCAL_GROUPING_SETTINGS = {
+    "mode": "llm",
+    "threshold": 0.5,  # 군집 간 평균 유사도가 이 값 이상이면 같은 그룹으로 병합
+    "ambiguous_band": [0.4, 0.5],  # hybrid 모드에서 이 구간의 유사도가 있는 군집은 LLM으로 판단
+    "ngram_range": [2, 3],  # 문자 n-gram 길이 범위
+    "weights": {"text": 0.5, "numbers": 0.3, "entities": 0.2}  # 제목/숫자/계열사명 유사도 가중치
+}
+
+# 단계 생략 설정 (LLM 호출이 의미 없는 경우 해당 단계를 건너뛰고 state["skipped_stages"]에 사유 기록)
+# empty_input: 분석/그룹핑/평가할 기사가 없으면 오류 메시지 없이 해당 단계 생략
+# single_grouping: 그룹핑 대상이 1건이면 그룹핑 호출 없이 단독 그룹으로 처리
+# small_evaluation: 모든 대상이 '유지' 판단(보류 없음)이고 그룹 수가 회사별 최대 기사 수 이하이면
+#                   중요도 평가 호출 없이 전부 선정 (중요도는 default_importance, 최대 기사 수 제한 없음인 회사는 제외)
+STAGE_SHORT_CIRCUIT_SETTINGS = {
+    "enabled": False,
+    "empty_input": True,
+    "single_grouping": True,
+    "small_evaluation": True,
+    "default_importance": "중"
+}
+
+# 6단계 재평가 설정 (선정 기사가 0개인 회사의 완화된 기준 재평가)
+# incremental: 1차 결과 재사용 - 1차에서 '유지'된 기사는 그대로 유지로 두고, 추가 언론사로 새로 포함된 기사와
+#              1차에서 제외/보류된 기사만 다시 판단. 구성원이 모두 남아 있는 1차 그룹은 재사용하고
+#              새 기사만 재사용 그룹의 대표 기사와 함께 그룹핑 (중요도 평가는 완화 기준으로 다시 수행)
+RELAXED_REEVALUATION_SETTINGS = {
+    "incremental": False
+}
+
+# 완화 기준 재평가 추측 실행 설정 (auto_news_mail.py 동기/비동기 파이프라인, 배치 API 모드 제외)
+# 엄격 기준 선정 0개가 잦은 회사는 엄격 기준 LLM 단계와 동시에 완화 기준 재평가를 시작하고,
+# 엄격 기준에서 선정 기사가 있으면 추측 실행을 취소 (비동기: 태스크 취소 / 동기: 다음 단계부터 중단)
+# history_path: 회사별 일일 선정 결과 기록 (활성화 시 매 실행 갱신, selection_history.py)
+# 최근 lookback_days일 기록이 min_days일 이상이고 엄격 기준 0개 비율이 zero_rate_threshold 이상인 회사가 대상
+# companies: 기록과 관계없이 항상 추측 실행할 회사 (증분 재평가는 1차 결과가 필요하므로 추측 실행 시 사용하지 않음)
+SPECULATIVE_RELAXED_SETTINGS = {
+    "enabled": False,
+    "history_path": "logs/selection_history.json",
+    "lookback_days": 14,
+    "min_days": 5,
+    "zero_rate_threshold": 0.5,
+    "companies": []
+}
+
+# 회사 묶음 호출 설정 (auto_news_mail.py 동기 파이프라인, --pack-companies 인자로도 활성화, 비동기/배치 API 모드 제외)
+# 단계 입력 기사가 적은 회사 여러 곳을 단계별 LLM 1회 호출로 묶어 처리 (회사별 섹션 + 회사 구분 ID "A-3")
+# 시스템 프롬프트/모델/공통 기준이 같은 회사끼리만 묶고, 공통 기준은 한 번만 전송
+# (활성화 시 회사별 키워드/특화 기준을 prefix 캐시 레이아웃처럼 분리해 회사 섹션에 배치)
+# 묶음 응답에서 ID 누락/중복/다른 회사 ID 혼입 등 검증에 실패한 회사는 회사별 호출로 다시 처리
+# (단일 호출 모드와 1단계 분할 대상 회사, 구조화 출력/간결 응답 모드가 적용된 단계는 묶지 않음)
+COMPANY_PACKING_SETTINGS = {
+    "enabled": False,
+    "stages": [1, 2, 3],  # 묶음 호출을 사용할 단계
+    "max_articles_per_company": 10,  # 단계 입력 기사가 이 수 이하인 회사만 묶음 대상
+    "max_companies_per_pack": 6,  # 묶음 호출당 최대 회사 수 (최대 26)
+    "max_prompt_tokens": 6000  # 묶음 호출당 프롬프트 토큰 예산 (시스템 + 사용자 프롬프트)
+}
+
+# LLM 스트리밍 설정 (llm_streaming.py, 응답을 스트리밍으로 받아 JSON 결과 항목이 닫히는 즉시 처리)
+# - 화면(app.py)에 단계별 분류/그룹/선정 진행 상황을 실시간 표시
+# - 1단계 유지/보류 기사의 2단계 준비 작업(기사 조회, 로컬 그룹핑용 제목 특징 계산)을 응답 생성과 겹쳐 실행
+# - 첫 토큰까지 시간(TTFT)/첫 결과까지 시간(TTFR)을 기록해 실행 후 리포트 출력
+# 구조화 출력(STRUCTURED_OUTPUT_SETTINGS) 호출은 스트리밍하지 않음
+LLM_STREAMING_SETTINGS = {
+    "enabled": False,
+    "stages": [1, 2, 3],  # 스트리밍을 사용할 단계
+    "log_each_call": True  # 호출마다 첫 결과/전체 시간 로그 출력
+}
+
+# 로컬 가짜 LLM 서버 설정 (fake_llm_server.py, OpenAI 호환 /v1/chat/completions - 벤치마크/테스트용)
+# OPENAI_BASE_URL=http://127.0.0.1:8765/v1 로 지정하면 실제 API 대신 이 서버를 사용 (bench_fake_llm.py는 자동 지정)
+# 응답은 프롬프트의 기사 목록에서 결정적으로 생성 (제목 해시 기반 분류/중요도, 정리된 제목 앞부분 기준 그룹핑)
+# latency: 첫 토큰까지 지연 분포 ("fixed": value / "uniform": low~high / "lognormal": median, sigma) + 출력 토큰당 지연
+FAKE_LLM_SERVER_SETTINGS = {
+    "host": "127.0.0.1",
+    "port": 8765,
+    "seed": 0,  # 지연/오류 주입 난수 시드 (응답 내용은 시드와 관계없이 결정적)
+    "latency": {"distribution": "lognormal", "value": 0.5, "low": 0.2, "high": 1.0, "median": 0.8, "sigma": 0.5},
+    "seconds_per_output_token": 0.002,
+    "error_rate": 0.0,  # 500 서버 오류 주입 비율
+    "throttle_rate": 0.0,  # 429 요청 제한 오류 주입 비율
+    "retry_after_ms": 500,  # 429 응답의 retry-after-ms 헤더
+    "verdict_ratio": {"excluded": 0.2, "borderline": 0.1},  # 1단계 제외/보류 비율 (나머지 유지)
+    "importance_ratio": {"상": 0.3, "중": 0.4},  # 3단계 상/중 비율 (나머지 하)
+    "group_prefix_chars": 10,  # 정리된 제목 앞 N글자가 같으면 같은 그룹
+    "prompt_cache_block_chars": 512,  # 공급자 프롬프트 캐시 흉내 (이미 받은 prefix 블록은 cached_tokens로 집계)
+    "stream_chunk_chars": 16,  # 스트리밍 응답 조각 크기
+    "malformed_models": []  # 이 모델 요청에는 JSON이 아닌 응답 (모델 에스컬레이션 확인용)
+}
 
 # Email settings
 EMAIL_SETTINGS = {
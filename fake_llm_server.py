@@ -0,0 +1,506 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Fake LLM Server
+-----------------------
+실제 API 없이 파이프라인의 오케스트레이션/캐시/동시성 개선을 측정하기 위한 OpenAI 호환 로컬 서버입니다.
+- POST /v1/chat/completions: ChatOpenAI가 사용하는 chat completions 형식 (stream + include_usage 지원)
+- 응답은 프롬프트의 기사 목록에서 결정적으로 생성 (1~3단계, 간결 응답, 단일 호출, 회사 묶음 호출 형식,
+  구조화 출력 스키마를 만족하는 필드 포함)
+- 지연 분포(첫 토큰까지 fixed/uniform/lognormal + 출력 토큰당 지연), 429/500 오류 주입
+- 토큰 집계: 요청/응답 토큰, 이미 받은 프롬프트 prefix 블록은 cached_tokens로 집계 (공급자 캐시 흉내)
+- malformed_models에 지정한 모델에는 JSON이 아닌 응답 (모델 에스컬레이션 확인용)
+- GET /fake/stats: 누적 통계 (요청 종류별/요청 종류:모델별 횟수 포함) / POST /fake/reset: 통계와 prefix 캐시 초기화
+설정은 FAKE_LLM_SERVER_SETTINGS 참고, 클라이언트는 OPENAI_BASE_URL=http://127.0.0.1:8765/v1 로 전환합니다.
+
+사용법:
+    python fake_llm_server.py [--port=8765] [--latency=lognormal:0.8,0.5] [--error-rate=0.01] [--throttle-rate=0.05] [--seed=0]
+"""
+
+import re
+import sys
+import json
+import time
+import uuid
+import random
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import FAKE_LLM_SERVER_SETTINGS
+from llm_limiter import estimate_tokens
+from title_normalizer import clean_title
+
+# 1단계에서 항상 제외로 판단하는 제목 키워드 (스포츠/행사성 기사)
+EXCLUDE_HINTS = ("야구", "축구", "구단", "이벤트", "프로모션", "봉사", "기부", "블로그")
+
+_NEWS_BLOCK_END = re.compile(r"\n\n(?=\[[^\]\n]+\]\n)")
+_LINE_ITEM = re.compile(r"^(\d+)\. (.+)$", re.M)
+_BLOCK_ITEM = re.compile(r"^인덱스: (\d+)\n제목: (.*)$", re.M)
+_PACKED_LINE_ITEM = re.compile(r"^([A-Z]-\d+)\. (.+)$", re.M)
+_PACKED_BLOCK_ITEM = re.compile(r"^ID: ([A-Z]-\d+)\n제목: (.*)$", re.M)
+_MAX_ARTICLES = re.compile(r"최대 (\d+)개")
+
+
+# 결정적 응답 생성
+def _score(salt: str, text: str) -> float:
+    """salt/텍스트별로 고정된 [0, 1) 값"""
+    return int(hashlib.md5(f"{salt}:{text}".encode("utf-8")).hexdigest()[:8], 16) / 0x100000000
+
+
+def _strip_press(line: str) -> str:
+    """1단계 목록 한 줄에서 끝의 "(언론사)" 제거"""
+    cut = line.rfind(" (")
+    return line[:cut] if cut > 0 and line.endswith(")") else line
+
+
+def _news_block(user_prompt: str) -> str:
+    """[뉴스 목록] 블록 (없으면 프롬프트 전체)"""
+    start = user_prompt.find("[뉴스 목록]\n")
+    if start < 0:
+        return user_prompt
+    block = user_prompt[start + len("[뉴스 목록]\n"):]
+    end = _NEWS_BLOCK_END.search(block)
+    return block[:end.start()] if end else block
+
+
+def parse_articles(user_prompt: str, packed: bool = False) -> list:
+    """프롬프트의 기사 목록 [(번호 또는 회사 구분 ID, 제목), ...]"""
+    if packed:
+        block = user_prompt.split("[기업별 뉴스 목록]", 1)[-1]
+        items = [(key, _strip_press(title)) for key, title in _PACKED_LINE_ITEM.findall(block)]
+        return items + _PACKED_BLOCK_ITEM.findall(block)
+    block = _news_block(user_prompt)
+    items = [(int(index), title) for index, title in _BLOCK_ITEM.findall(block)]
+    if items:
+        return items
+    return [(int(index), _strip_press(title)) for index, title in _LINE_ITEM.findall(block)]
+
+
+def detect_request_kind(user_prompt: str) -> str:
+    """프롬프트 형식으로 요청 종류 판별"""
+    packed = "[기업별 뉴스 목록]" in user_prompt
+    if "한 번에 분석" in user_prompt:
+        return "single_pass"
+    if "제외/보류/유지로 분류" in user_prompt:
+        if packed:
+            return "packed_1"
+        return "terse_1" if "excluded/borderline/retained 목록에 포함" in user_prompt else "stage_1"
+    if "그룹으로 묶" in user_prompt:
+        if packed:
+            return "packed_2"
+        return "terse_2" if "첫 번째 인덱스가 대표 기사" in user_prompt else "stage_2"
+    if "중요도를 평가" in user_prompt:
+        if packed:
+            return "packed_3"
+        return "terse_3" if "not_selected에 번호만" in user_prompt else "stage_3"
+    return "unknown"
+
+
+def classify(title: str, settings: dict) -> str:
+    """1단계 판단 (제외 키워드 → 제외, 나머지는 제목 해시 비율)"""
+    if any(hint in title for hint in EXCLUDE_HINTS):
+        return "excluded"
+    ratio = settings["verdict_ratio"]
+    value = _score("verdict", title)
+    if value < ratio["excluded"]:
+        return "excluded"
+    if value < ratio["excluded"] + ratio["borderline"]:
+        return "borderline"
+    return "retained"
+
+
+def group_articles(items: list, settings: dict) -> list:
+    """정리된 제목 앞부분이 같은 기사끼리 그룹 (첫 기사가 대표, 입력 순서 유지)"""
+    groups = {}
+    for key, title in items:
+        prefix = re.sub(r"\W", "", clean_title(title))[:settings["group_prefix_chars"]]
+        groups.setdefault(prefix or str(key), []).append(key)
+    return list(groups.values())
+
+
+def rate_importance(title: str, settings: dict) -> str:
+    ratio = settings["importance_ratio"]
+    value = _score("importance", title)
+    if value < ratio["상"]:
+        return "상"
+    if value < ratio["상"] + ratio["중"]:
+        return "중"
+    return "하"
+
+
+def evaluate(items: list, max_articles, settings: dict):
+    """3단계 평가 ([(번호, 중요도)] 선정, [번호] 미선정) - 최대 기사 수를 넘으면 '상' 우선으로 자름"""
+    rated = [(key, rate_importance(title, settings)) for key, title in items]
+    selected = [(key, importance) for key, importance in rated if importance != "하"]
+    selected.sort(key=lambda pair: pair[1] != "상")
+    if max_articles is not None:
+        selected = selected[:max_articles]
+    chosen = {key for key, _ in selected}
+    return selected, [key for key, _ in rated if key not in chosen]
+
+
+def _keywords(title: str) -> list:
+    return clean_title(title).split()[:2]
+
+
+def _max_articles(system_prompt: str):
+    match = _MAX_ARTICLES.search(system_prompt or "")
+    return int(match.group(1)) if match else None
+
+
+def _full_selection(key, title, importance, id_key="index"):
+    item = {id_key: key, "importance": importance, "reason": "가짜 서버 선정", "keywords": _keywords(title), "affiliates": []}
+    if id_key == "index":
+        item.update({"title": title, "press": "", "date": ""})
+    return item
+
+
+def generate_completion(system_prompt: str, user_prompt: str, settings: dict = None) -> str:
+    """프롬프트에 맞는 결정적 JSON 응답 문자열 (같은 프롬프트는 항상 같은 응답)"""
+    settings = {**FAKE_LLM_SERVER_SETTINGS, **(settings or {})}
+    kind = detect_request_kind(user_prompt)
+    items = parse_articles(user_prompt, packed=kind.startswith("packed"))
+    titles = dict(items)
+    max_articles = _max_articles(system_prompt)
+
+    if kind in ("stage_1", "terse_1", "packed_1", "single_pass"):
+        verdicts = {"excluded": [], "borderline": [], "retained": []}
+        for key, title in items:
+            verdicts[classify(title, settings)].append(key)
+        if kind == "terse_1":
+            return json.dumps({
+                **verdicts,
+                "reasons": [{"index": key, "reason": "가짜 서버 판단"} for key in verdicts["excluded"] + verdicts["borderline"]]
+            }, ensure_ascii=False)
+        if kind == "packed_1":
+            return json.dumps({
+                verdict: [{"id": key, "reason": "가짜 서버 판단"} for key in keys] for verdict, keys in verdicts.items()
+            }, ensure_ascii=False)
+        result = {
+            verdict: [{"index": key, "title": titles[key], "reason": "가짜 서버 판단"} for key in keys]
+            for verdict, keys in verdicts.items()
+        }
+        if kind == "stage_1":
+            return json.dumps(result, ensure_ascii=False)
+        # 단일 호출: 보류/유지 기사 그룹핑 → 대표 기사 평가
+        kept = [(key, titles[key]) for key in verdicts["retained"] + verdicts["borderline"]]
+        groups = group_articles(kept, settings)
+        selected, not_selected = evaluate([(group[0], titles[group[0]]) for group in groups], max_articles, settings)
+        result["groups"] = [{"indices": group, "selected_index": group[0], "reason": "가짜 서버 그룹"} for group in groups]
+        result["final_selection"] = [_full_selection(key, titles[key], importance) for key, importance in selected]
+        result["not_selected"] = [
+            {"index": key, "title": titles[key], "importance": "하", "reason": "가짜 서버 미선정"} for key in not_selected
+        ]
+        return json.dumps(result, ensure_ascii=False)
+
+    if kind in ("stage_2", "terse_2", "packed_2"):
+        if kind == "packed_2":
+            # 회사 섹션 안에서만 그룹핑
+            by_company = {}
+            for key, title in items:
+                by_company.setdefault(key.split("-")[0], []).append((key, title))
+            groups = [group for company_items in by_company.values() for group in group_articles(company_items, settings)]
+            return json.dumps({
+                "groups": [{"ids": group, "selected_id": group[0], "reason": "가짜 서버 그룹"} for group in groups]
+            }, ensure_ascii=False)
+        groups = group_articles(items, settings)
+        if kind == "terse_2":
+            return json.dumps({"groups": groups}, ensure_ascii=False)
+        return json.dumps({
+            "groups": [{"indices": group, "selected_index": group[0], "reason": "가짜 서버 그룹"} for group in groups]
+        }, ensure_ascii=False)
+
+    if kind in ("stage_3", "terse_3", "packed_3"):
+        if kind == "packed_3":
+            by_company = {}
+            for key, title in items:
+                by_company.setdefault(key.split("-")[0], []).append((key, title))
+            final_selection, not_selected = [], []
+            for company_items in by_company.values():
+                selected, rest = evaluate(company_items, max_articles, settings)
+                final_selection += [_full_selection(key, titles[key], importance, "id") for key, importance in selected]
+                not_selected += [{"id": key, "reason": "가짜 서버 미선정"} for key in rest]
+            return json.dumps({"final_selection": final_selection, "not_selected": not_selected}, ensure_ascii=False)
+        selected, not_selected = evaluate(items, max_articles, settings)
+        if kind == "terse_3":
+            return json.dumps({
+                "final_selection": [
+                    {"index": key, "importance": importance, "reason": "가짜 서버 선정", "keywords": _keywords(titles[key]), "affiliates": []}
+                    for key, importance in selected
+                ],
+                "not_selected": not_selected,
+                "reasons": [{"index": key, "reason": "가짜 서버 미선정"} for key in not_selected]
+            }, ensure_ascii=False)
+        return json.dumps({
+            "final_selection": [_full_selection(key, titles[key], importance) for key, importance in selected],
+            "not_selected": [
+                {"index": key, "title": titles[key], "importance": "하", "reason": "가짜 서버 미선정"} for key in not_selected
+            ]
+        }, ensure_ascii=False)
+
+    return json.dumps({"result": "ok"})
+
+
+# 서버
+def sample_latency(rng: random.Random, latency: dict) -> float:
+    """첫 토큰까지 지연 시간 (초)"""
+    distribution = latency.get("distribution", "fixed")
+    if distribution == "uniform":
+        return rng.uniform(latency["low"], latency["high"])
+    if distribution == "lognormal":
+        return rng.lognormvariate(0.0, latency["sigma"]) * latency["median"]
+    return latency.get("value", 0.0)
+
+
+def _empty_stats():
+    return {"requests": 0, "completed": 0, "streamed": 0, "errors": 0, "throttled": 0,
+            "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0, "kinds": {}, "models": {}}
+
+
+class FakeLLMServer(ThreadingHTTPServer):
+    """가짜 LLM 서버 (요청별 스레드, 통계/prefix 캐시는 서버 전역)"""
+    daemon_threads = True
+
+    def __init__(self, address, settings=None, verbose=False):
+        super().__init__(address, FakeLLMHandler)
+        self.settings = {**FAKE_LLM_SERVER_SETTINGS, **(settings or {})}
+        self.verbose = verbose
+        self.rng = random.Random(self.settings["seed"])
+        self.lock = threading.Lock()
+        self.stats = _empty_stats()
+        self._prefix_blocks = set()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def reset(self):
+        with self.lock:
+            self.stats = _empty_stats()
+            self._prefix_blocks = set()
+
+    def draw(self):
+        """요청 1건의 (주입할 오류, 첫 토큰 지연)"""
+        with self.lock:
+            value = self.rng.random()
+            latency = sample_latency(self.rng, self.settings["latency"])
+        if value < self.settings["throttle_rate"]:
+            return "throttle", latency
+        if value < self.settings["throttle_rate"] + self.settings["error_rate"]:
+            return "error", latency
+        return None, latency
+
+    def account(self, prompt_text: str, completion: str, kind: str, model: str, streamed: bool) -> dict:
+        """토큰 집계 (이미 받은 prefix 블록은 cached_tokens, 1024 토큰 미만 프롬프트는 캐시하지 않음)"""
+        block = self.settings["prompt_cache_block_chars"]
+        prompt_tokens = estimate_tokens(prompt_text)
+        hashes = []
+        digest = hashlib.md5()
+        for start in range(0, len(prompt_text) - block + 1, block):
+            digest.update(prompt_text[start:start + block].encode("utf-8"))
+            hashes.append(digest.hexdigest())
+        completion_tokens = estimate_tokens(completion)
+        with self.lock:
+            cached_blocks = 0
+            for value in hashes:
+                if value not in self._prefix_blocks:
+                    break
+                cached_blocks += 1
+            self._prefix_blocks.update(hashes)
+            cached_tokens = estimate_tokens(prompt_text[:cached_blocks * block]) if prompt_tokens >= 1024 else 0
+            stats = self.stats
+            stats["completed"] += 1
+            stats["streamed"] += int(streamed)
+            stats["prompt_tokens"] += prompt_tokens
+            stats["cached_tokens"] += cached_tokens
+            stats["completion_tokens"] += completion_tokens
+            stats["kinds"][kind] = stats["kinds"].get(kind, 0) + 1
+            stats["models"][f"{kind}:{model}"] = stats["models"].get(f"{kind}:{model}", 0) + 1
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached_tokens}
+        }
+
+    def count(self, name):
+        with self.lock:
+            self.stats[name] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return json.loads(json.dumps(self.stats))
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        return json.loads(raw or b"{}")
+
+    def do_GET(self):
+        if self.path.rstrip("/") in ("/fake/stats", "/v1/fake/stats"):
+            self._send_json(200, self.server.snapshot())
+        elif self.path.rstrip("/") in ("/models", "/v1/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "fake", "object": "model", "owned_by": "fake"}]})
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+
+    def do_POST(self):
+        path = self.path.rstrip("/")
+        try:
+            body = self._read_json()
+        except ValueError:
+            self._send_json(400, {"error": {"message": "Invalid JSON body", "type": "invalid_request_error"}})
+            return
+        if path in ("/fake/reset", "/v1/fake/reset"):
+            self.server.reset()
+            self._send_json(200, {"reset": True})
+            return
+        if path not in ("/chat/completions", "/v1/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+            return
+        self._chat_completion(body)
+
+    def _chat_completion(self, body):
+        server = self.server
+        server.count("requests")
+        failure, latency = server.draw()
+        if failure == "throttle":
+            server.count("throttled")
+            self._send_json(429, {"error": {"message": "Rate limit reached (fake server)", "type": "requests",
+                                            "code": "rate_limit_exceeded"}},
+                            {"retry-after-ms": str(server.settings["retry_after_ms"])})
+            return
+        if failure == "error":
+            server.count("errors")
+            time.sleep(latency)
+            self._send_json(500, {"error": {"message": "Fake server error", "type": "server_error"}})
+            return
+
+        messages = body.get("messages", [])
+        system_prompt = "\n".join(m.get("content", "") for m in messages if m.get("role") == "system")
+        user_prompt = "\n".join(m.get("content", "") for m in messages if m.get("role") != "system")
+        kind = detect_request_kind(user_prompt)
+        model = body.get("model", "fake")
+        if model in server.settings["malformed_models"]:
+            content = "응답을 생성할 수 없습니다."
+        else:
+            content = generate_completion(system_prompt, user_prompt, server.settings)
+        streamed = bool(body.get("stream"))
+        usage = server.account(system_prompt + user_prompt, content, kind, model, streamed)
+        completion_id = f"chatcmpl-fake-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        per_token = server.settings["seconds_per_output_token"]
+
+        if not streamed:
+            time.sleep(latency + per_token * usage["completion_tokens"])
+            self._send_json(200, {
+                "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": usage
+            })
+            return
+
+        # 스트리밍: SSE (응답이 끝나면 연결 종료)
+        self.close_connection = True
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+
+        def send_chunk(choices, extra=None):
+            chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                     "choices": choices, **(extra or {})}
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        time.sleep(latency)
+        step = server.settings["stream_chunk_chars"]
+        for start in range(0, len(content), step):
+            piece = content[start:start + step]
+            send_chunk([{"index": 0, "delta": {"role": "assistant", "content": piece}, "finish_reason": None}])
+            time.sleep(per_token * estimate_tokens(piece))
+        send_chunk([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+        if (body.get("stream_options") or {}).get("include_usage"):
+            send_chunk([], {"usage": usage})
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def start_fake_llm_server(settings=None, port=None, verbose=False) -> FakeLLMServer:
+    """백그라운드 스레드에서 가짜 LLM 서버 시작 (port=0이면 빈 포트 자동 선택, server.base_url로 주소 확인)"""
+    settings = {**FAKE_LLM_SERVER_SETTINGS, **(settings or {})}
+    server = FakeLLMServer((settings["host"], settings["port"] if port is None else port), settings, verbose)
+    threading.Thread(target=server.serve_forever, name="fake-llm-server", daemon=True).start()
+    return server
+
+
+def parse_server_args(args) -> dict:
+    """명령행 인자를 FAKE_LLM_SERVER_SETTINGS 덮어쓰기 값으로 변환"""
+    overrides = {}
+    for arg in args:
+        name, _, value = arg.partition("=")
+        if name == "--port":
+            overrides["port"] = int(value)
+        elif name == "--seed":
+            overrides["seed"] = int(value)
+        elif name == "--error-rate":
+            overrides["error_rate"] = float(value)
+        elif name == "--throttle-rate":
+            overrides["throttle_rate"] = float(value)
+        elif name == "--token-seconds":
+            overrides["seconds_per_output_token"] = float(value)
+        elif name == "--latency":
+            # fixed:0.5 / uniform:0.2,1.0 / lognormal:0.8,0.5
+            distribution, _, params = value.partition(":")
+            numbers = [float(number) for number in params.split(",") if number]
+            latency = {**FAKE_LLM_SERVER_SETTINGS["latency"], "distribution": distribution}
+            if distribution == "fixed" and numbers:
+                latency["value"] = numbers[0]
+            elif distribution == "uniform" and len(numbers) == 2:
+                latency["low"], latency["high"] = numbers
+            elif distribution == "lognormal" and len(numbers) == 2:
+                latency["median"], latency["sigma"] = numbers
+            overrides["latency"] = latency
+    return overrides
+
+
+def main():
+    overrides = parse_server_args(sys.argv[1:])
+    settings = {**FAKE_LLM_SERVER_SETTINGS, **overrides}
+    server = FakeLLMServer((settings["host"], settings["port"]), settings, verbose="--verbose" in sys.argv)
+    print(f"[가짜 LLM 서버] {server.base_url} 대기 중 (OPENAI_BASE_URL={server.base_url})")
+    print(f"[가짜 LLM 서버] 지연 {settings['latency']['distribution']}, 오류 {settings['error_rate']}, "
+          f"요청 제한 {settings['throttle_rate']}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"[가짜 LLM 서버] 종료: {json.dumps(server.snapshot(), ensure_ascii=False)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+LLM Batch Runner
+-----------------------
+야간 작업(auto_news_mail.py --batch-api)에서 단계별 LLM 요청을 모아 배치로 실행하는 모듈입니다.
+- 요청은 OpenAI Batch API 입력 형식(JSONL, /v1/chat/completions)으로 저장
+- "openai" 백엔드: 파일 업로드 → 배치 생성 → 완료까지 폴링 → 결과 파일 다운로드
+- "local" 백엔드: 같은 JSONL을 로컬에서 실행하는 대체 실행기 (API 키 없이 배치 흐름 확인/테스트용)
+결과는 custom_id별 응답 문자열과 토큰 사용량으로 반환하며,
+실패/누락된 요청은 호출한 쪽에서 동기 호출로 다시 처리합니다.
+"""
+
+import os
+import json
+import time
+import uuid
+import threading
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from config import BATCH_API_SETTINGS
+from llm_pool import get_llm_client
+
+# 한국 시간대(KST) 정의
+KST = timezone(timedelta(hours=9))
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+def build_batch_request(custom_id: str, model: str, temperature: float, system_prompt: str, user_prompt: str,
+                        json_mode: bool = False) -> dict:
+    """배치 입력 파일의 요청 1건 (OpenAI Batch API 형식)"""
+    body = {
+        "model": model,
+        "temperature": temperature,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+    }
+    if json_mode:
+        # 구조화 출력 단계는 JSON 응답만 받고 스키마 검증은 결과 반영 시 수행
+        body["response_format"] = {"type": "json_object"}
+    return {"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT, "body": body}
+
+
+def write_batch_file(requests: list, label: str) -> str:
+    """요청 목록을 JSONL 파일로 저장하고 경로 반환"""
+    directory = BATCH_API_SETTINGS["directory"]
+    os.makedirs(directory, exist_ok=True)
+    timestamp = datetime.now(KST).strftime("%Y%m%d_%H%M%S")
+    path = os.path.join(directory, f"{timestamp}_{label}_{uuid.uuid4().hex[:6]}.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        for request in requests:
+            f.write(json.dumps(request, ensure_ascii=False) + "\n")
+    return path
+
+
+def parse_batch_output(lines) -> dict:
+    """
+    배치 결과 JSONL을 custom_id별 결과로 변환하는 함수
+
+    Returns:
+        dict: {custom_id: {"content": 응답 문자열, "usage": usage dict}} 또는 {custom_id: {"error": 오류}}
+    """
+    results = {}
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        record = json.loads(line)
+        custom_id = record.get("custom_id")
+        response = record.get("response") or {}
+        body = response.get("body") or {}
+        if record.get("error") or response.get("status_code", 200) != 200 or not body.get("choices"):
+            results[custom_id] = {"error": record.get("error") or body.get("error") or "응답 없음"}
+            continue
+        results[custom_id] = {
+            "content": body["choices"][0]["message"].get("content") or "",
+            "usage": body.get("usage") or {}
+        }
+    return results
+
+
+def to_ai_message(result: dict) -> AIMessage:
+    """배치 결과를 사용량 집계(record_llm_usage)용 AIMessage로 변환"""
+    usage = result.get("usage") or {}
+    prompt_tokens = usage.get("prompt_tokens", 0) or 0
+    completion_tokens = usage.get("completion_tokens", 0) or 0
+    cached_tokens = (usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0) or 0
+    return AIMessage(
+        content=result.get("content", ""),
+        usage_metadata={
+            "input_tokens": prompt_tokens,
+            "output_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "input_token_details": {"cache_read": cached_tokens}
+        }
+    )
+
+
+class OpenAIBatchBackend:
+    """OpenAI Batch API 백엔드"""
+
+    def __init__(self, base_url=None):
+        from openai import OpenAI
+        self.client = OpenAI(base_url=base_url or os.getenv("OPENAI_BASE_URL") or None)
+
+    def submit(self, path: str) -> str:
+        with open(path, "rb") as f:
+            input_file = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=BATCH_API_SETTINGS["completion_window"]
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        return self.client.batches.retrieve(batch_id).status
+
+    def results(self, batch_id: str) -> list:
+        batch = self.client.batches.retrieve(batch_id)
+        lines = []
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                lines.extend(self.client.files.content(file_id).text.splitlines())
+        return lines
+
+    def cancel(self, batch_id: str):
+        self.client.batches.cancel(batch_id)
+
+
+class LocalBatchBackend:
+    """
+    로컬 대체 배치 실행기 (OpenAI Batch API와 같은 입력/출력 형식)
+    제출 즉시 백그라운드 스레드에서 요청을 실행하고, 완료되면 결과 JSONL을 입력 파일 옆에 저장합니다.
+
+    Args:
+        responder: (body) -> 응답 문자열 함수 (None이면 공유 LLM 클라이언트로 동기 호출)
+    """
+
+    def __init__(self, responder=None, max_workers=None):
+        self.responder = responder or self._invoke_llm
+        self.max_workers = max_workers or BATCH_API_SETTINGS["local_workers"]
+        self._jobs = {}
+
+    @staticmethod
+    def _invoke_llm(body):
+        messages = [
+            SystemMessage(content=message["content"]) if message["role"] == "system" else HumanMessage(content=message["content"])
+            for message in body["messages"]
+        ]
+        llm = get_llm_client(body["model"], temperature=body.get("temperature", 0.1))
+        response = llm.invoke(messages)
+        return response.content, getattr(response, "usage_metadata", None) or {}
+
+    def _run_request(self, request):
+        try:
+            output = self.responder(request["body"])
+            content, usage = output if isinstance(output, tuple) else (output, {})
+            return {
+                "id": f"batch_req_{uuid.uuid4().hex[:12]}",
+                "custom_id": request["custom_id"],
+                "response": {
+                    "status_code": 200,
+                    "body": {
+                        "model": request["body"]["model"],
+                        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}}],
+                        "usage": {
+                            "prompt_tokens": usage.get("input_tokens", 0),
+                            "completion_tokens": usage.get("output_tokens", 0),
+                            "prompt_tokens_details": {
+                                "cached_tokens": (usage.get("input_token_details") or {}).get("cache_read", 0)
+                            }
+                        }
+                    }
+                },
+                "error": None
+            }
+        except Exception as e:
+            return {"id": f"batch_req_{uuid.uuid4().hex[:12]}", "custom_id": request["custom_id"],
+                    "response": None, "error": {"message": str(e)}}
+
+    def _run(self, batch_id, path):
+        with open(path, encoding="utf-8") as f:
+            requests = [json.loads(line) for line in f if line.strip()]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            records = list(executor.map(self._run_request, requests))
+        output_path = path.replace(".jsonl", "_output.jsonl")
+        with open(output_path, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._jobs[batch_id]["output_path"] = output_path
+        self._jobs[batch_id]["status"] = "completed"
+
+    def submit(self, path: str) -> str:
+        batch_id = f"local_batch_{uuid.uuid4().hex[:12]}"
+        self._jobs[batch_id] = {"status": "in_progress", "output_path": None}
+        threading.Thread(target=self._run, args=(batch_id, path), daemon=True).start()
+        return batch_id
+
+    def status(self, batch_id: str) -> str:
+        return self._jobs[batch_id]["status"]
+
+    def results(self, batch_id: str) -> list:
+        with open(self._jobs[batch_id]["output_path"], encoding="utf-8") as f:
+            return f.readlines()
+
+    def cancel(self, batch_id: str):
+        self._jobs[batch_id]["status"] = "cancelled"
+
+
+_BACKEND = None
+
+
+def get_batch_backend():
+    """설정된 배치 백엔드 반환 (프로세스 전역, set_batch_backend로 교체 가능)"""
+    global _BACKEND
+    if _BACKEND is None:
+        if BATCH_API_SETTINGS.get("backend") == "local":
+            _BACKEND = LocalBatchBackend()
+        else:
+            _BACKEND = OpenAIBatchBackend()
+    return _BACKEND
+
+
+def set_batch_backend(backend):
+    global _BACKEND
+    _BACKEND = backend
+
+
+def run_batch(requests: list, label: str) -> dict:
+    """
+    요청 목록을 배치로 제출하고 완료될 때까지 기다린 뒤 custom_id별 결과를 반환하는 함수
+    (시간 초과/실패 시 받은 결과만 반환, 나머지는 호출한 쪽에서 동기 처리)
+    """
+    if not requests:
+        return {}
+    backend = get_batch_backend()
+    path = write_batch_file(requests, label)
+    started = time.perf_counter()
+    try:
+        batch_id = backend.submit(path)
+    except Exception as e:
+        print(f"[배치 API] {label} 배치 제출 실패: {str(e)}")
+        return {}
+    print(f"[배치 API] {label}: 요청 {len(requests)}건 제출 (batch_id={batch_id}, 입력={path})")
+
+    poll_interval = BATCH_API_SETTINGS["poll_interval_seconds"]
+    deadline = started + BATCH_API_SETTINGS["timeout_seconds"]
+    status = "in_progress"
+    while True:
+        try:
+            status = backend.status(batch_id)
+        except Exception as e:
+            print(f"[배치 API] {label} 상태 조회 실패: {str(e)}")
+        if status in FINAL_STATUSES:
+            break
+        if time.perf_counter() >= deadline:
+            print(f"[배치 API] {label} 시간 초과, 배치 취소 후 남은 요청은 동기 호출로 처리")
+            try:
+                backend.cancel(batch_id)
+            except Exception as e:
+                print(f"[배치 API] {label} 배치 취소 실패: {str(e)}")
+            break
+        time.sleep(poll_interval)
+
+    results = {}
+    if status in ("completed", "expired", "cancelled"):
+        # 만료/취소된 배치도 완료된 요청의 결과는 받을 수 있음
+        try:
+            results = parse_batch_output(backend.results(batch_id))
+        except Exception as e:
+            print(f"[배치 API] {label} 결과 다운로드 실패: {str(e)}")
+    succeeded = sum(1 for result in results.values() if "error" not in result)
+    print(f"[배치 API] {label}: 상태 {status}, 성공 {succeeded}/{len(requests)}건, "
+          f"{time.perf_counter() - started:.1f}초")
+    return results
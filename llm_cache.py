@@ -0,0 +1,260 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+LLM Response Cache
+-----------------------
+call_llm/acall_llm이 사용하는 영속 프롬프트/응답 캐시입니다. (SQLite)
+- 키: (모델, temperature, 시스템 프롬프트, 사용자 프롬프트)의 SHA-256 해시
+- TTL이 지난 항목은 조회 시 무시하고 정리 시 삭제
+- 전체 크기(바이트)/항목 수 상한을 넘으면 마지막 사용 시각 기준(LRU)으로 삭제
+- 적중/미스 횟수는 프로세스 내 통계와 DB 누적 통계에 함께 기록
+app.py(Streamlit)와 auto_news_mail.py는 같은 캐시 디렉토리(LLM_CACHE_SETTINGS["directory"])를 공유합니다.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from contextlib import contextmanager
+
+from config import LLM_CACHE_SETTINGS
+
+_BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    model TEXT,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache(last_access);
+CREATE TABLE IF NOT EXISTS llm_cache_stats (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def make_cache_key(model: str, temperature: float, system_prompt: str, user_prompt: str) -> str:
+    """요청 내용으로 캐시 키(SHA-256)를 만드는 함수"""
+    payload = json.dumps(
+        [model, round(float(temperature), 4), system_prompt, user_prompt],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """SQLite 기반 LLM 응답 캐시 (TTL + LRU 크기 제한 + 적중/미스 통계)"""
+
+    def __init__(self, path, ttl_seconds, max_bytes, max_entries):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # 호출마다 연결을 열고 닫음 (Streamlit 재실행, 비동기 파이프라인의 to_thread 스레드 대비)
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _is_expired(self, created_at, now):
+        return bool(self.ttl_seconds) and now - created_at > self.ttl_seconds
+
+    def _count(self, conn, name):
+        conn.execute(
+            "INSERT INTO llm_cache_stats(name, value) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (name,)
+        )
+
+    def get(self, key: str):
+        """캐시된 응답 반환 (없거나 만료되었으면 None)"""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or self._is_expired(row[1], now):
+                if row is not None:
+                    conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self.stats["misses"] += 1
+                self._count(conn, "misses")
+                return None
+            conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+            self.stats["hits"] += 1
+            self._count(conn, "hits")
+            return row[0]
+
+    def set(self, key: str, response: str, model: str = ""):
+        """응답 저장 후 크기 상한 적용"""
+        if not response:
+            return
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache(key, model, response, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, size, now, now)
+            )
+            self.stats["stores"] += 1
+            self._evict(conn, now)
+
+    def invalidate(self, key: str):
+        """항목 삭제 (파싱에 실패한 응답이 재시도 때 다시 반환되지 않도록)"""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+
+    def _evict(self, conn, now):
+        """만료 항목 삭제 후 크기/항목 수 상한을 넘으면 오래 사용하지 않은 항목부터 삭제"""
+        evicted = 0
+        if self.ttl_seconds:
+            evicted += conn.execute(
+                "DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+            ).rowcount
+        total_bytes, total_entries = conn.execute(
+            "SELECT COALESCE(SUM(size), 0), COUNT(*) FROM llm_cache"
+        ).fetchone()
+        if (self.max_bytes and total_bytes > self.max_bytes) or (self.max_entries and total_entries > self.max_entries):
+            rows = conn.execute("SELECT key, size FROM llm_cache ORDER BY last_access ASC").fetchall()
+            to_delete = []
+            for key, size in rows:
+                if not ((self.max_bytes and total_bytes > self.max_bytes)
+                        or (self.max_entries and total_entries > self.max_entries)):
+                    break
+                to_delete.append((key,))
+                total_bytes -= size
+                total_entries -= 1
+            conn.executemany("DELETE FROM llm_cache WHERE key = ?", to_delete)
+            evicted += len(to_delete)
+        if evicted:
+            self.stats["evictions"] += evicted
+            print(f"[LLM 캐시] {evicted}개 항목 정리")
+
+    def summary(self) -> dict:
+        """프로세스 내 통계 + DB 누적 통계 + 현재 크기"""
+        with self._lock, self._connect() as conn:
+            total_bytes, total_entries = conn.execute(
+                "SELECT COALESCE(SUM(size), 0), COUNT(*) FROM llm_cache"
+            ).fetchone()
+            lifetime = dict(conn.execute("SELECT name, value FROM llm_cache_stats").fetchall())
+        return {
+            **self.stats,
+            "entries": total_entries,
+            "bytes": total_bytes,
+            "lifetime_hits": lifetime.get("hits", 0),
+            "lifetime_misses": lifetime.get("misses", 0)
+        }
+
+
+_CACHE = None
+_CACHE_FAILED = False
+_CACHE_LOCK = threading.Lock()
+
+
+def get_cache_directory() -> str:
+    """캐시 디렉토리 (상대 경로는 저장소 루트 기준 - 실행 위치와 무관하게 app/auto가 같은 디렉토리 사용)"""
+    directory = os.environ.get("LLM_CACHE_DIR") or LLM_CACHE_SETTINGS["directory"]
+    if not os.path.isabs(directory):
+        directory = os.path.join(_BASE_DIR, directory)
+    return directory
+
+
+def get_cache_path() -> str:
+    """LLM 응답 캐시 DB 경로"""
+    return os.path.join(get_cache_directory(), LLM_CACHE_SETTINGS["filename"])
+
+
+def get_llm_cache():
+    """프로세스 전역 캐시 반환 (비활성화 또는 초기화 실패 시 None)"""
+    global _CACHE, _CACHE_FAILED
+    if not LLM_CACHE_SETTINGS["enabled"] or _CACHE_FAILED:
+        return None
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                try:
+                    _CACHE = LLMResponseCache(
+                        get_cache_path(),
+                        LLM_CACHE_SETTINGS["ttl_seconds"],
+                        LLM_CACHE_SETTINGS["max_bytes"],
+                        LLM_CACHE_SETTINGS["max_entries"]
+                    )
+                except (sqlite3.Error, OSError) as e:
+                    print(f"[LLM 캐시] 초기화 실패, 캐시 없이 진행: {str(e)}")
+                    _CACHE_FAILED = True
+                    return None
+    return _CACHE
+
+
+def lookup_cached_response(model: str, temperature: float, system_prompt: str, user_prompt: str):
+    """
+    캐시 조회 (call_llm용, 캐시 오류는 미스로 처리)
+
+    Returns:
+        tuple: (캐시 키 또는 None, 캐시된 응답 또는 None)
+    """
+    cache = get_llm_cache()
+    if cache is None:
+        return None, None
+    key = make_cache_key(model, temperature, system_prompt, user_prompt)
+    try:
+        return key, cache.get(key)
+    except sqlite3.Error as e:
+        print(f"[LLM 캐시] 조회 실패: {str(e)}")
+        return key, None
+
+
+def store_cached_response(key, response: str, model: str = ""):
+    """응답 저장 (캐시 오류는 무시)"""
+    cache = get_llm_cache()
+    if cache is None or key is None:
+        return
+    try:
+        cache.set(key, response, model)
+    except sqlite3.Error as e:
+        print(f"[LLM 캐시] 저장 실패: {str(e)}")
+
+
+def invalidate_cached_response(key):
+    """파싱 실패 응답 삭제 (캐시 오류는 무시)"""
+    cache = get_llm_cache()
+    if cache is None or key is None:
+        return
+    try:
+        cache.invalidate(key)
+    except sqlite3.Error as e:
+        print(f"[LLM 캐시] 삭제 실패: {str(e)}")
+
+
+def print_cache_summary():
+    """캐시 적중/미스 통계 출력"""
+    cache = get_llm_cache()
+    if cache is None:
+        return
+    summary = cache.summary()
+    lookups = summary["hits"] + summary["misses"]
+    hit_rate = (summary["hits"] / lookups * 100) if lookups else 0.0
+    print(f"\n=== LLM 캐시 통계 ===")
+    print(f"적중: {summary['hits']}회, 미스: {summary['misses']}회 (적중률 {hit_rate:.1f}%)")
+    print(f"저장: {summary['stores']}회, 정리: {summary['evictions']}개")
+    print(f"현재 항목: {summary['entries']}개 ({summary['bytes'] / 1024:.1f} KB)")
+    print(f"누적 적중/미스: {summary['lifetime_hits']}/{summary['lifetime_misses']}")
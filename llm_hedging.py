@@ -0,0 +1,236 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+LLM Deadlines & Hedging
+-----------------------
+LLM 호출에 단계별 제한 시간(데드라인)과 요청 헤징(hedging)을 적용하는 모듈입니다.
+- 데드라인: 단계별 제한 시간을 넘기면 응답을 기다리지 않고 새 요청으로 재시도 (timeout_retries 횟수까지)
+- 헤징: 호출이 단계/모델별 최근 지연 시간의 백분위수(p95)를 넘기면 같은 요청을 한 번 더 보내고
+  먼저 도착한 응답을 사용 (요청당 max_hedges개까지)
+- 단계/모델별 지연 시간 표본을 누적하여 헤징 기준을 갱신하고, 실행 후 꼬리 지연 통계를 출력
+헤징 요청은 요청 제한기를 다시 거치지 않으므로 max_hedges로 추가 호출 수를 제한합니다.
+"""
+
+import time
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+
+from config import LLM_DEADLINE_SETTINGS
+
+
+class LLMTimeoutError(TimeoutError):
+    """단계 제한 시간 안에 응답을 받지 못한 경우"""
+
+
+class LatencyTracker:
+    """단계/모델별 최근 지연 시간 표본과 타임아웃/헤징 횟수"""
+
+    def __init__(self, window):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._counters = {}
+
+    def _counter(self, key):
+        return self._counters.setdefault(key, {"calls": 0, "timeouts": 0, "hedges": 0, "hedge_wins": 0})
+
+    def record(self, key, seconds):
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=self.window)).append(seconds)
+            self._counter(key)["calls"] += 1
+
+    def count(self, key, name):
+        with self._lock:
+            self._counter(key)[name] += 1
+
+    def percentile(self, key, percentile, min_samples):
+        """표본이 min_samples 이상이면 백분위수, 아니면 None"""
+        with self._lock:
+            samples = list(self._samples.get(key, ()))
+        if len(samples) < min_samples:
+            return None
+        return float(np.percentile(samples, percentile))
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                key: {"samples": list(self._samples.get(key, ())), **dict(counter)}
+                for key, counter in self._counters.items()
+            }
+
+
+_TRACKER = LatencyTracker(LLM_DEADLINE_SETTINGS["hedging"]["window"])
+_EXECUTOR = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def _get_executor():
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        with _EXECUTOR_LOCK:
+            if _EXECUTOR is None:
+                _EXECUTOR = ThreadPoolExecutor(
+                    max_workers=LLM_DEADLINE_SETTINGS["max_workers"], thread_name_prefix="llm-hedge"
+                )
+    return _EXECUTOR
+
+
+def get_stage_timeout(stage):
+    """단계 제한 시간 (초, 제한 없으면 None)"""
+    return LLM_DEADLINE_SETTINGS["stage_timeouts"].get(stage)
+
+
+def get_hedge_delay(stage, model):
+    """헤징 요청을 보낼 경과 시간 (최근 지연 시간 백분위수, 헤징 비활성화 시 None)"""
+    hedging = LLM_DEADLINE_SETTINGS["hedging"]
+    if not hedging.get("enabled", False) or hedging["max_hedges"] <= 0:
+        return None
+    observed = _TRACKER.percentile((stage, model), hedging["percentile"], hedging["min_samples"])
+    delay = hedging["default_delay"] if observed is None else observed
+    return max(delay, hedging["min_delay"])
+
+
+def _hedged_call(invoke_fn, stage, model, timeout):
+    """동기 호출 1회 (제한 시간 초과 시 LLMTimeoutError, 필요 시 헤징 요청 추가)"""
+    key = (stage, model)
+    executor = _get_executor()
+    started = time.perf_counter()
+    deadline = started + timeout if timeout else None
+    hedge_delay = get_hedge_delay(stage, model)
+    max_hedges = LLM_DEADLINE_SETTINGS["hedging"]["max_hedges"]
+    primary = executor.submit(invoke_fn)
+    pending = {primary}
+    hedges = 0
+    error = None
+
+    while pending:
+        next_hedge = started + hedge_delay * (hedges + 1) if hedge_delay is not None and hedges < max_hedges else None
+        wake_at = min(t for t in (deadline, next_hedge) if t is not None) if (deadline or next_hedge) else None
+        remaining = None if wake_at is None else max(wake_at - time.perf_counter(), 0)
+        done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                for other in pending:
+                    other.cancel()
+                _TRACKER.record(key, time.perf_counter() - started)
+                if future is not primary:
+                    _TRACKER.count(key, "hedge_wins")
+                    print(f"[LLM 헤징] {stage}단계 ({model}): 헤징 요청 응답 사용")
+                return future.result()
+            error = future.exception()
+
+        now = time.perf_counter()
+        if deadline is not None and now >= deadline:
+            for other in pending:
+                other.cancel()
+            raise LLMTimeoutError(f"{stage}단계 LLM 호출이 {timeout}초 안에 끝나지 않았습니다.")
+        if next_hedge is not None and now >= next_hedge and pending:
+            hedges += 1
+            _TRACKER.count(key, "hedges")
+            print(f"[LLM 헤징] {stage}단계 ({model}): {now - started:.1f}초 경과, 추가 요청 {hedges}/{max_hedges}")
+            pending.add(executor.submit(invoke_fn))
+    # 모든 요청이 실패한 경우 마지막 오류 전달
+    raise error
+
+
+def invoke_with_deadline(invoke_fn, stage, model):
+    """
+    단계 제한 시간/헤징을 적용해 invoke_fn()을 실행하는 함수 (설정이 꺼져 있으면 그대로 호출)
+
+    Args:
+        invoke_fn: 인자 없이 LLM을 호출하고 응답을 반환하는 함수
+    """
+    if not LLM_DEADLINE_SETTINGS.get("enabled", False):
+        return invoke_fn()
+    timeout = get_stage_timeout(stage)
+    retries = LLM_DEADLINE_SETTINGS["timeout_retries"]
+    for attempt in range(retries + 1):
+        try:
+            return _hedged_call(invoke_fn, stage, model, timeout)
+        except LLMTimeoutError as e:
+            _TRACKER.count((stage, model), "timeouts")
+            print(f"[LLM 데드라인] {str(e)} (시도 {attempt + 1}/{retries + 1})")
+            if attempt == retries:
+                raise
+
+
+async def _ahedged_call(ainvoke_fn, stage, model, timeout):
+    """_hedged_call의 비동기 버전 (늦은 요청은 태스크 취소)"""
+    key = (stage, model)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    deadline = started + timeout if timeout else None
+    hedge_delay = get_hedge_delay(stage, model)
+    max_hedges = LLM_DEADLINE_SETTINGS["hedging"]["max_hedges"]
+    primary = asyncio.ensure_future(ainvoke_fn())
+    pending = {primary}
+    hedges = 0
+    error = None
+
+    try:
+        while pending:
+            next_hedge = started + hedge_delay * (hedges + 1) if hedge_delay is not None and hedges < max_hedges else None
+            wake_at = min(t for t in (deadline, next_hedge) if t is not None) if (deadline or next_hedge) else None
+            remaining = None if wake_at is None else max(wake_at - loop.time(), 0)
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    _TRACKER.record(key, loop.time() - started)
+                    if task is not primary:
+                        _TRACKER.count(key, "hedge_wins")
+                        print(f"[LLM 헤징] {stage}단계 ({model}): 헤징 요청 응답 사용")
+                    return task.result()
+                error = task.exception()
+
+            now = loop.time()
+            if deadline is not None and now >= deadline:
+                raise LLMTimeoutError(f"{stage}단계 LLM 호출이 {timeout}초 안에 끝나지 않았습니다.")
+            if next_hedge is not None and now >= next_hedge and pending:
+                hedges += 1
+                _TRACKER.count(key, "hedges")
+                print(f"[LLM 헤징] {stage}단계 ({model}): {now - started:.1f}초 경과, 추가 요청 {hedges}/{max_hedges}")
+                pending.add(asyncio.ensure_future(ainvoke_fn()))
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def ainvoke_with_deadline(ainvoke_fn, stage, model):
+    """invoke_with_deadline의 비동기 버전 (ainvoke_fn: 인자 없이 코루틴을 반환하는 함수)"""
+    if not LLM_DEADLINE_SETTINGS.get("enabled", False):
+        return await ainvoke_fn()
+    timeout = get_stage_timeout(stage)
+    retries = LLM_DEADLINE_SETTINGS["timeout_retries"]
+    for attempt in range(retries + 1):
+        try:
+            return await _ahedged_call(ainvoke_fn, stage, model, timeout)
+        except LLMTimeoutError as e:
+            _TRACKER.count((stage, model), "timeouts")
+            print(f"[LLM 데드라인] {str(e)} (시도 {attempt + 1}/{retries + 1})")
+            if attempt == retries:
+                raise
+
+
+def print_latency_report():
+    """단계/모델별 꼬리 지연 시간(p50/p95/p99)과 타임아웃/헤징 횟수 출력"""
+    if not LLM_DEADLINE_SETTINGS.get("enabled", False):
+        return
+    snapshot = _TRACKER.snapshot()
+    if not snapshot:
+        return
+    print(f"\n=== LLM 지연 시간 리포트 ===")
+    for (stage, model), stats in sorted(snapshot.items(), key=lambda item: (item[0][0], item[0][1] or "")):
+        samples = stats["samples"]
+        if samples:
+            p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+            latency = f"p50 {p50:.1f}초, p95 {p95:.1f}초, p99 {p99:.1f}초, 최대 {max(samples):.1f}초"
+        else:
+            latency = "표본 없음"
+        print(f"- {stage}단계 ({model}): 성공 {stats['calls']}회, {latency}, "
+              f"타임아웃 {stats['timeouts']}회, 헤징 {stats['hedges']}회 (헤징 응답 사용 {stats['hedge_wins']}회)")
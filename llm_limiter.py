@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+LLM Rate Limiter
+-----------------------
+여러 회사의 LLM 단계를 동시에 실행할 때 사용하는 프로세스 전역 요청 제한기입니다.
+- 최대 동시 요청 수 (max in-flight)
+- 분당 토큰 수 (TPM), 분당 요청 수 (RPM) - 최근 60초 슬라이딩 윈도우 기준
+동기(스레드) 호출과 비동기(asyncio) 호출이 같은 제한기를 공유합니다.
+"""
+
+import time
+import asyncio
+import threading
+from collections import deque
+from contextlib import contextmanager, asynccontextmanager
+
+from config import LLM_RATE_LIMIT_SETTINGS
+
+_WINDOW_SECONDS = 60.0
+_ENCODER = None
+_ENCODER_LOADED = False
+
+
+def estimate_tokens(text: str) -> int:
+    """텍스트의 토큰 수 추정 (tiktoken 사용, 불가 시 문자 수 기반 근사)"""
+    global _ENCODER, _ENCODER_LOADED
+    if not text:
+        return 0
+    if not _ENCODER_LOADED:
+        _ENCODER_LOADED = True
+        try:
+            import tiktoken
+            _ENCODER = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            print(f"[요청 제한기] tiktoken 사용 불가, 문자 수 기반 추정 사용: {str(e)}")
+    if _ENCODER is not None:
+        return len(_ENCODER.encode(text))
+    # 한글은 대략 1~2자당 1토큰
+    return len(text) // 2 + 1
+
+
+class LLMRateLimiter:
+    """최대 동시 요청 수 + TPM/RPM 예산을 관리하는 제한기"""
+
+    def __init__(self, max_in_flight, tokens_per_minute, requests_per_minute):
+        self.max_in_flight = max_in_flight
+        self.tokens_per_minute = tokens_per_minute
+        self.requests_per_minute = requests_per_minute
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._requests = deque()  # (시각, 토큰 수)
+        self._window_tokens = 0
+        self.stats = {"requests": 0, "tokens": 0, "wait_seconds": 0.0}
+
+    def _expire(self, now):
+        while self._requests and now - self._requests[0][0] >= _WINDOW_SECONDS:
+            _, tokens = self._requests.popleft()
+            self._window_tokens -= tokens
+
+    def _try_acquire(self, tokens):
+        """예산이 있으면 슬롯을 확보하고 0을, 없으면 대기할 시간(초)을 반환"""
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            if self.max_in_flight and self._in_flight >= self.max_in_flight:
+                return 0.05
+            wait = 0.0
+            if self.requests_per_minute and len(self._requests) >= self.requests_per_minute:
+                wait = max(wait, _WINDOW_SECONDS - (now - self._requests[0][0]))
+            # 요청 하나가 TPM보다 큰 경우에도 윈도우가 비어 있으면 통과 (무한 대기 방지)
+            if self.tokens_per_minute and self._requests and self._window_tokens + tokens > self.tokens_per_minute:
+                freed = 0
+                for timestamp, request_tokens in self._requests:
+                    freed += request_tokens
+                    if self._window_tokens - freed + tokens <= self.tokens_per_minute:
+                        wait = max(wait, _WINDOW_SECONDS - (now - timestamp))
+                        break
+                else:
+                    # 윈도우가 모두 비워질 때까지 대기
+                    wait = max(wait, _WINDOW_SECONDS - (now - self._requests[-1][0]))
+            if wait > 0:
+                return wait
+            self._in_flight += 1
+            self._requests.append((now, tokens))
+            self._window_tokens += tokens
+            self.stats["requests"] += 1
+            self.stats["tokens"] += tokens
+            return 0.0
+
+    def set_max_in_flight(self, max_in_flight):
+        """최대 동시 요청 수 변경 (재시도 컨트롤러의 AIMD 조정용, 이미 진행 중인 요청은 유지)"""
+        with self._lock:
+            self.max_in_flight = max_in_flight
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    @contextmanager
+    def limit(self, tokens):
+        """동기 호출용 슬롯 확보"""
+        while True:
+            wait = self._try_acquire(tokens)
+            if wait <= 0:
+                break
+            self.stats["wait_seconds"] += wait
+            time.sleep(wait)
+        try:
+            yield
+        finally:
+            self._release()
+
+    @asynccontextmanager
+    async def alimit(self, tokens):
+        """비동기 호출용 슬롯 확보"""
+        while True:
+            wait = self._try_acquire(tokens)
+            if wait <= 0:
+                break
+            self.stats["wait_seconds"] += wait
+            await asyncio.sleep(wait)
+        try:
+            yield
+        finally:
+            self._release()
+
+
+_LIMITER = None
+_LIMITER_LOCK = threading.Lock()
+
+
+def get_llm_limiter() -> LLMRateLimiter:
+    """프로세스 전역 제한기 반환"""
+    global _LIMITER
+    if _LIMITER is None:
+        with _LIMITER_LOCK:
+            if _LIMITER is None:
+                _LIMITER = LLMRateLimiter(
+                    LLM_RATE_LIMIT_SETTINGS["max_in_flight"],
+                    LLM_RATE_LIMIT_SETTINGS["tokens_per_minute"],
+                    LLM_RATE_LIMIT_SETTINGS["requests_per_minute"]
+                )
+    return _LIMITER
+
+
+def estimate_request_tokens(system_prompt: str, user_prompt: str) -> int:
+    """요청 하나의 예상 토큰 수 (입력 + 예상 출력)"""
+    return (estimate_tokens(system_prompt) + estimate_tokens(user_prompt)
+            + LLM_RATE_LIMIT_SETTINGS["expected_output_tokens"])
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+LLM Client Pool
+-----------------------
+프로세스 전체에서 재사용하는 ChatOpenAI 클라이언트 레지스트리입니다.
+(모델, 온도, Base URL) 조합마다 클라이언트를 한 번만 만들고,
+keep-alive 연결 풀을 가진 httpx 클라이언트를 공유하여 회사/단계별 호출 간 연결을 재사용합니다.
+여러 스레드에서 동시에 호출해도 안전합니다.
+비동기 httpx 클라이언트의 연결은 만든 이벤트 루프에 묶이므로 이벤트 루프마다 따로 만들고,
+asyncio.run이 끝나기 전에 aclose_loop_llm_clients()로 정리합니다.
+"""
+
+import os
+import asyncio
+import threading
+
+import httpx
+from langchain_openai import ChatOpenAI
+
+from config import LLM_CLIENT_POOL_SETTINGS, LLM_RETRY_SETTINGS
+
+_LOCK = threading.Lock()
+_CLIENTS = {}
+_HTTP_CLIENTS = {}
+_ASYNC_HTTP_CLIENTS = {}
+
+
+def _http_client_options():
+    limits = httpx.Limits(
+        max_connections=LLM_CLIENT_POOL_SETTINGS["max_connections"],
+        max_keepalive_connections=LLM_CLIENT_POOL_SETTINGS["max_keepalive_connections"],
+        keepalive_expiry=LLM_CLIENT_POOL_SETTINGS["keepalive_expiry"]
+    )
+    return {"limits": limits, "timeout": httpx.Timeout(LLM_CLIENT_POOL_SETTINGS["timeout"])}
+
+
+def _get_http_client(base_url):
+    """Base URL별 공유 httpx 동기 클라이언트 (keep-alive 연결 풀)"""
+    client = _HTTP_CLIENTS.get(base_url)
+    if client is None:
+        client = httpx.Client(**_http_client_options())
+        _HTTP_CLIENTS[base_url] = client
+    return client
+
+
+def _get_async_http_client(base_url, loop):
+    """(Base URL, 이벤트 루프)별 httpx 비동기 클라이언트 (이벤트 루프 밖이면 None - SDK 기본 클라이언트 사용)"""
+    if loop is None:
+        return None
+    client = _ASYNC_HTTP_CLIENTS.get((base_url, loop))
+    if client is None:
+        client = httpx.AsyncClient(**_http_client_options())
+        _ASYNC_HTTP_CLIENTS[(base_url, loop)] = client
+    return client
+
+
+def _running_loop():
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def _client_max_retries():
+    """재시도 컨트롤러 사용 시 ChatOpenAI 자체 재시도는 끔 (429 신호를 컨트롤러가 받도록, None이면 기본값)"""
+    return 0 if LLM_RETRY_SETTINGS.get("enabled", False) else None
+
+
+def get_llm_client(model, temperature=0.1, base_url=None):
+    """
+    (모델, 온도, Base URL) 조합의 공유 ChatOpenAI 클라이언트를 반환하는 함수
+    (이벤트 루프 안에서 호출하면 그 루프 전용 클라이언트 반환)
+
+    Args:
+        model (str): 모델명
+        temperature (float): 온도
+        base_url (str): OpenAI 호환 API 주소 (None이면 OPENAI_BASE_URL 환경변수 또는 기본 주소)
+    """
+    base_url = base_url or os.getenv("OPENAI_BASE_URL") or None
+    if not LLM_CLIENT_POOL_SETTINGS.get("enabled", True):
+        return ChatOpenAI(
+            model_name=model, temperature=temperature, openai_api_base=base_url,
+            request_timeout=LLM_CLIENT_POOL_SETTINGS["timeout"], max_retries=_client_max_retries()
+        )
+
+    loop = _running_loop()
+    key = (model, temperature, base_url, loop)
+    client = _CLIENTS.get(key)
+    if client is not None:
+        return client
+
+    with _LOCK:
+        client = _CLIENTS.get(key)
+        if client is None:
+            client = ChatOpenAI(
+                model_name=model,
+                temperature=temperature,
+                openai_api_base=base_url,
+                request_timeout=LLM_CLIENT_POOL_SETTINGS["timeout"],
+                max_retries=_client_max_retries(),
+                http_client=_get_http_client(base_url),
+                http_async_client=_get_async_http_client(base_url, loop)
+            )
+            _CLIENTS[key] = client
+            print(f"[LLM 풀] 클라이언트 생성: model={model}, temperature={temperature}, base_url={base_url or '기본'}")
+    return client
+
+
+async def aclose_loop_llm_clients():
+    """현재 이벤트 루프의 비동기 HTTP 연결을 닫고 해당 루프용 클라이언트를 풀에서 제거 (asyncio.run이 끝나기 전에 호출)"""
+    loop = asyncio.get_running_loop()
+    with _LOCK:
+        async_clients = [_ASYNC_HTTP_CLIENTS.pop(key) for key in list(_ASYNC_HTTP_CLIENTS) if key[1] is loop]
+        for key in [key for key in _CLIENTS if key[3] is loop]:
+            del _CLIENTS[key]
+    for http_async_client in async_clients:
+        await http_async_client.aclose()
+
+
+def close_llm_clients():
+    """공유 HTTP 연결을 정리하는 함수 (프로세스 종료 시 호출, 이벤트 루프용 클라이언트는 aclose_loop_llm_clients로 정리)"""
+    with _LOCK:
+        for http_client in _HTTP_CLIENTS.values():
+            http_client.close()
+        _HTTP_CLIENTS.clear()
+        _ASYNC_HTTP_CLIENTS.clear()
+        _CLIENTS.clear()
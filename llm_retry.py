@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+LLM Retry Controller
+-----------------------
+LLM 호출의 일시적 오류(429 요청 제한, 5xx, 연결/HTTP 타임아웃)를 재시도하는 프로세스 전역 컨트롤러입니다.
+(단계 제한 시간 초과는 llm_hedging의 timeout_retries로 재시도)
+- Retry-After(retry-after-ms / retry-after 헤더)가 있으면 그 시간만큼 대기
+- 없으면 지수 백오프 + 전체 지터(full jitter): uniform(0, min(max_delay, base_delay * 2^n))
+- AIMD 동시성 제어: 요청 제한(429) 신호마다 전역 최대 동시 요청 수를 곱셈 감소,
+  연속 성공마다 1씩 덧셈 증가 (요청 제한기 max_in_flight 조정)
+동기(스레드) 호출과 비동기(asyncio) 호출이 같은 컨트롤러를 공유합니다.
+"""
+
+import time
+import random
+import asyncio
+import threading
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+
+import openai
+
+from config import LLM_RETRY_SETTINGS, LLM_RATE_LIMIT_SETTINGS
+from llm_limiter import get_llm_limiter
+
+# 재시도 대상 오류 (요청 제한 / 서버 오류 / 연결 오류, APITimeoutError 포함)
+_THROTTLE_ERRORS = (openai.RateLimitError,)
+_TRANSIENT_ERRORS = (openai.InternalServerError, openai.APIConnectionError)
+
+
+def is_throttle_error(error) -> bool:
+    """요청 제한(429) 오류 여부"""
+    return isinstance(error, _THROTTLE_ERRORS) or getattr(error, "status_code", None) == 429
+
+
+def is_retryable_error(error) -> bool:
+    """재시도할 수 있는 일시적 오류 여부"""
+    if is_throttle_error(error) or isinstance(error, _TRANSIENT_ERRORS):
+        return True
+    status_code = getattr(error, "status_code", None)
+    return status_code is not None and status_code >= 500
+
+
+def get_retry_after(error):
+    """오류 응답의 Retry-After 대기 시간 (초, 없으면 None)"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        pass
+    # HTTP 날짜 형식
+    try:
+        return max((parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryController:
+    """재시도 대기 시간 계산 + AIMD 전역 동시성 조정"""
+
+    def __init__(self, settings, initial_in_flight):
+        self.settings = settings
+        self._lock = threading.Lock()
+        aimd = settings["aimd"]
+        # 요청 제한기에 동시 요청 제한이 없으면(0) AIMD 상한에서 시작
+        initial_in_flight = initial_in_flight or aimd["max_in_flight"]
+        self.concurrency = max(aimd["min_in_flight"], min(aimd["max_in_flight"], initial_in_flight))
+        self._successes = 0
+        self._last_decrease = 0.0
+        self.stats = {"retries": 0, "throttled": 0, "increases": 0, "decreases": 0, "gave_up": 0,
+                      "min_concurrency": self.concurrency, "max_concurrency": self.concurrency}
+        self._apply_concurrency()
+
+    def backoff_delay(self, attempt: int, retry_after=None) -> float:
+        """attempt번째(0부터) 재시도 전 대기 시간"""
+        if retry_after is not None:
+            # 서버가 알려준 시간 + 작은 지터 (동시에 재시도가 몰리지 않도록)
+            return min(retry_after, self.settings["max_delay"]) + random.uniform(0, self.settings["base_delay"])
+        cap = min(self.settings["max_delay"], self.settings["base_delay"] * (2 ** attempt))
+        return random.uniform(0, cap)
+
+    def _apply_concurrency(self):
+        if self.settings["aimd"].get("enabled", True):
+            get_llm_limiter().set_max_in_flight(int(self.concurrency))
+
+    def on_success(self):
+        """성공 신호: increase_every번 연속 성공마다 동시성 1 증가"""
+        aimd = self.settings["aimd"]
+        if not aimd.get("enabled", True):
+            return
+        with self._lock:
+            self._successes += 1
+            if self._successes < aimd["increase_every"] or self.concurrency >= aimd["max_in_flight"]:
+                return
+            self._successes = 0
+            self.concurrency += 1
+            self.stats["increases"] += 1
+            self.stats["max_concurrency"] = max(self.stats["max_concurrency"], self.concurrency)
+            self._apply_concurrency()
+
+    def on_throttle(self):
+        """요청 제한 신호: 동시성을 decrease_factor배로 감소 (cooldown 안의 연속 신호는 한 번만 반영)"""
+        aimd = self.settings["aimd"]
+        with self._lock:
+            self.stats["throttled"] += 1
+            self._successes = 0
+            if not aimd.get("enabled", True):
+                return
+            now = time.monotonic()
+            if now - self._last_decrease < aimd["cooldown_seconds"]:
+                return
+            self._last_decrease = now
+            decreased = max(aimd["min_in_flight"], int(self.concurrency * aimd["decrease_factor"]))
+            if decreased < self.concurrency:
+                print(f"[재시도 제어] 요청 제한 감지: 최대 동시 요청 {self.concurrency} → {decreased}")
+                self.concurrency = decreased
+                self.stats["decreases"] += 1
+                self.stats["min_concurrency"] = min(self.stats["min_concurrency"], self.concurrency)
+                self._apply_concurrency()
+
+    def _next_delay(self, error, attempt, label):
+        """재시도 여부 판단 후 대기 시간 반환 (재시도하지 않으면 None)"""
+        if not is_retryable_error(error) or attempt >= self.settings["max_attempts"] - 1:
+            if is_retryable_error(error):
+                self.stats["gave_up"] += 1
+            return None
+        if is_throttle_error(error):
+            self.on_throttle()
+        delay = self.backoff_delay(attempt, get_retry_after(error))
+        self.stats["retries"] += 1
+        print(f"[재시도 제어] {label} {type(error).__name__}: {delay:.1f}초 후 재시도 "
+              f"({attempt + 1}/{self.settings['max_attempts'] - 1})")
+        return delay
+
+    def call(self, fn, label=""):
+        """fn()을 일시적 오류에 대해 재시도하며 실행"""
+        attempt = 0
+        while True:
+            try:
+                result = fn()
+                self.on_success()
+                return result
+            except Exception as e:
+                delay = self._next_delay(e, attempt, label)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+
+    async def acall(self, afn, label=""):
+        """call의 비동기 버전 (afn: 인자 없이 코루틴을 반환하는 함수)"""
+        attempt = 0
+        while True:
+            try:
+                result = await afn()
+                self.on_success()
+                return result
+            except Exception as e:
+                delay = self._next_delay(e, attempt, label)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+
+
+_CONTROLLER = None
+_CONTROLLER_LOCK = threading.Lock()
+
+
+def get_retry_controller():
+    """프로세스 전역 재시도 컨트롤러 (비활성화 시 None)"""
+    global _CONTROLLER
+    if not LLM_RETRY_SETTINGS.get("enabled", False):
+        return None
+    if _CONTROLLER is None:
+        with _CONTROLLER_LOCK:
+            if _CONTROLLER is None:
+                _CONTROLLER = RetryController(LLM_RETRY_SETTINGS, LLM_RATE_LIMIT_SETTINGS["max_in_flight"])
+    return _CONTROLLER
+
+
+def call_with_retry(fn, label=""):
+    """재시도 컨트롤러가 켜져 있으면 재시도를 적용해 fn() 실행"""
+    controller = get_retry_controller()
+    return fn() if controller is None else controller.call(fn, label)
+
+
+async def acall_with_retry(afn, label=""):
+    """call_with_retry의 비동기 버전"""
+    controller = get_retry_controller()
+    return await afn() if controller is None else await controller.acall(afn, label)
+
+
+def parse_retry_delay(attempt: int) -> float:
+    """응답 파싱 실패 후 재시도 대기 시간 (컨트롤러가 꺼져 있으면 기존과 같은 1초)"""
+    controller = get_retry_controller()
+    return 1.0 if controller is None else controller.backoff_delay(attempt)
+
+
+def print_retry_summary():
+    """재시도/동시성 조정 통계 출력"""
+    controller = get_retry_controller()
+    if controller is None:
+        return
+    stats = controller.stats
+    print(f"\n=== LLM 재시도 제어 통계 ===")
+    print(f"재시도: {stats['retries']}회 (요청 제한 {stats['throttled']}회), 재시도 포기: {stats['gave_up']}회")
+    print(f"최대 동시 요청: 현재 {controller.concurrency} (최소 {stats['min_concurrency']}, 최대 {stats['max_concurrency']}), "
+          f"증가 {stats['increases']}회, 감소 {stats['decreases']}회")
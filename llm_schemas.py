@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+LLM Stage Schemas
+-----------------------
+구조화 출력(Structured Output) 모드에서 사용하는 단계별 응답 스키마입니다. (pydantic)
+각 단계 프롬프트의 JSON 형식 예시와 같은 필드를 가지며,
+OpenAI strict JSON schema 제약에 맞춰 모든 필드를 필수로 정의합니다.
+"""
+
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel, ValidationError
+
+from config import STRUCTURED_OUTPUT_SETTINGS
+
+
+# 1단계: 제외/보류/유지 분류
+class ClassifiedNews(BaseModel):
+    index: int
+    title: str
+    reason: str
+
+
+class ExclusionResult(BaseModel):
+    excluded: List[ClassifiedNews]
+    borderline: List[ClassifiedNews]
+    retained: List[ClassifiedNews]
+
+
+# 2단계: 그룹핑 + 대표 기사 선택
+class NewsGroup(BaseModel):
+    indices: List[int]
+    selected_index: int
+    reason: str
+
+
+class GroupingResult(BaseModel):
+    groups: List[NewsGroup]
+
+
+# 2단계 (대표 기사 로컬 선택 시): 그룹핑만
+class NewsGroupIndices(BaseModel):
+    indices: List[int]
+
+
+class GroupingIndicesResult(BaseModel):
+    groups: List[NewsGroupIndices]
+
+
+# 3단계: 중요도 평가 + 최종 선정
+class SelectedNews(BaseModel):
+    index: int
+    title: str
+    importance: Literal["상", "중", "하"]
+    reason: str
+    keywords: List[str]
+    affiliates: List[str]
+    press: str
+    date: str
+
+
+class NotSelectedNews(BaseModel):
+    index: int
+    title: str
+    importance: Literal["상", "중", "하"]
+    reason: str
+
+
+class EvaluationResult(BaseModel):
+    final_selection: List[SelectedNews]
+    not_selected: List[NotSelectedNews]
+
+
+# 간결 응답(terse) 모드: 제목/언론사/날짜 없이 인덱스와 판단 코드만 응답 (제목 등은 로컬에서 복원)
+class IndexReason(BaseModel):
+    index: int
+    reason: str
+
+
+class TerseExclusionResult(BaseModel):
+    excluded: List[int]
+    borderline: List[int]
+    retained: List[int]
+    reasons: List[IndexReason]
+
+
+class TerseGroupingResult(BaseModel):
+    # 각 그룹의 첫 번째 인덱스가 대표 기사
+    groups: List[List[int]]
+
+
+class TerseSelectedNews(BaseModel):
+    index: int
+    importance: Literal["상", "중"]
+    reason: str
+    keywords: List[str]
+    affiliates: List[str]
+
+
+class TerseEvaluationResult(BaseModel):
+    final_selection: List[TerseSelectedNews]
+    not_selected: List[int]
+    reasons: List[IndexReason]
+
+
+def get_stage_schema(stage: int, local_representative: bool = False, terse: bool = False) -> Optional[type]:
+    """단계별 응답 스키마 반환 (구조화 출력 모드가 꺼져 있으면 None)"""
+    if not STRUCTURED_OUTPUT_SETTINGS.get("enabled", False):
+        return None
+    if stage == 1:
+        return TerseExclusionResult if terse else ExclusionResult
+    if stage == 2:
+        if terse:
+            return TerseGroupingResult
+        return GroupingIndicesResult if local_representative else GroupingResult
+    if stage == 3:
+        return TerseEvaluationResult if terse else EvaluationResult
+    return None
+
+
+# 단일 호출 모드: 분류 + 그룹핑 + 중요도 평가
+class SinglePassSelectedNews(BaseModel):
+    index: int
+    title: str
+    importance: Literal["상", "중"]
+    reason: str
+    keywords: List[str]
+    affiliates: List[str]
+
+
+class SinglePassResult(BaseModel):
+    excluded: List[ClassifiedNews]
+    borderline: List[ClassifiedNews]
+    retained: List[ClassifiedNews]
+    groups: List[NewsGroup]
+    final_selection: List[SinglePassSelectedNews]
+    not_selected: List[NotSelectedNews]
+
+
+def get_single_pass_schema() -> Optional[type]:
+    """단일 호출 모드 응답 스키마 반환 (구조화 출력 모드가 꺼져 있으면 None)"""
+    if not STRUCTURED_OUTPUT_SETTINGS.get("enabled", False):
+        return None
+    return SinglePassResult
+
+
+def decode_cached_result(schema: type, text: str) -> Optional[dict]:
+    """캐시된 응답 문자열을 스키마로 검증해 dict로 변환 (스키마와 맞지 않으면 None)"""
+    try:
+        return schema.model_validate_json(text).model_dump()
+    except ValidationError:
+        return None
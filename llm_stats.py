@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+LLM Usage Stats
+-----------------------
+LLM 응답의 토큰 사용량(usage_metadata)을 단계별로 집계하는 모듈입니다.
+- 입력/출력 토큰, 공급자 프롬프트 캐시 적중 토큰(cached tokens), 호출 수, 응답 시간
+- 프롬프트 prefix 캐시 레이아웃 적용 전후의 비용/지연 비교에 사용
+- 모델(티어)별 호출 수/지연/추정 비용 (MODEL_PRICING 기준)
+- 집계 범위(usage_scope) 안의 호출은 범위별로도 따로 집계 (추측 실행 재평가의 추가 비용 계산 등)
+"""
+
+import threading
+import contextvars
+from contextlib import contextmanager
+
+from config import MODEL_PRICING, BATCH_API_SETTINGS
+
+# 배치 API로 처리한 호출의 모델명 표시 (배치 단가 적용)
+BATCH_MODEL_SUFFIX = "@batch"
+
+_LOCK = threading.Lock()
+_STATS = {}
+_MODEL_STATS = {}
+_SCOPE_STATS = {}
+_SCOPE = contextvars.ContextVar("llm_usage_scope", default=None)
+
+
+def _empty_stats():
+    return {"calls": 0, "input_tokens": 0, "cached_tokens": 0, "output_tokens": 0, "seconds": 0.0}
+
+
+def extract_usage(message) -> dict:
+    """AIMessage의 usage_metadata에서 입력/캐시/출력 토큰 수를 추출 (정보가 없으면 0)"""
+    usage = getattr(message, "usage_metadata", None) or {}
+    details = usage.get("input_token_details") or {}
+    return {
+        "input_tokens": usage.get("input_tokens", 0) or 0,
+        "cached_tokens": details.get("cache_read", 0) or 0,
+        "output_tokens": usage.get("output_tokens", 0) or 0
+    }
+
+
+def get_model_pricing(model: str):
+    """모델 단가 (정확히 일치하는 키가 없으면 모델명에 포함된 가장 긴 키, 없으면 None)"""
+    if model in MODEL_PRICING:
+        return MODEL_PRICING[model]
+    candidates = [key for key in MODEL_PRICING if key in (model or "")]
+    return MODEL_PRICING[max(candidates, key=len)] if candidates else None
+
+
+def estimate_cost(model: str, stats: dict):
+    """사용량의 추정 비용 (USD, 단가를 모르는 모델이면 None)"""
+    ratio = 1.0
+    if model and model.endswith(BATCH_MODEL_SUFFIX):
+        model = model[:-len(BATCH_MODEL_SUFFIX)]
+        ratio = BATCH_API_SETTINGS["price_ratio"]
+    pricing = get_model_pricing(model)
+    if pricing is None:
+        return None
+    uncached = max(stats["input_tokens"] - stats["cached_tokens"], 0)
+    return (uncached * pricing["input"] + stats["cached_tokens"] * pricing["cached_input"]
+            + stats["output_tokens"] * pricing["output"]) / 1_000_000 * ratio
+
+
+def record_llm_usage(stage: int, message, seconds: float, model: str = "") -> dict:
+    """LLM 호출 1건의 사용량을 단계별/모델별 통계에 추가하고 사용량 dict를 반환"""
+    usage = extract_usage(message)
+    scope = _SCOPE.get()
+    with _LOCK:
+        targets = [_STATS.setdefault(stage, _empty_stats()), _MODEL_STATS.setdefault(model, _empty_stats())]
+        if scope is not None:
+            targets.append(_SCOPE_STATS.setdefault(scope, {}).setdefault(model, _empty_stats()))
+        for stats in targets:
+            stats["calls"] += 1
+            stats["seconds"] += seconds
+            for key, value in usage.items():
+                stats[key] += value
+    if usage["input_tokens"]:
+        print(f"[LLM 사용량] {stage}단계 ({model}): 입력 {usage['input_tokens']} (캐시 {usage['cached_tokens']}), "
+              f"출력 {usage['output_tokens']} 토큰, {seconds:.1f}초")
+    return usage
+
+
+def get_llm_usage() -> dict:
+    """단계별 누적 사용량 사본 반환"""
+    with _LOCK:
+        return {stage: dict(stats) for stage, stats in _STATS.items()}
+
+
+def get_llm_usage_by_model() -> dict:
+    """모델별 누적 사용량 사본 반환"""
+    with _LOCK:
+        return {model: dict(stats) for model, stats in _MODEL_STATS.items()}
+
+
+@contextmanager
+def usage_scope(name: str):
+    """이 범위(같은 컨텍스트의 스레드/태스크) 안의 LLM 호출을 name으로 따로 집계"""
+    token = _SCOPE.set(name)
+    try:
+        yield
+    finally:
+        _SCOPE.reset(token)
+
+
+def get_scope_usage(name: str) -> dict:
+    """집계 범위의 모델별 사용량 사본 반환"""
+    with _LOCK:
+        return {model: dict(stats) for model, stats in _SCOPE_STATS.get(name, {}).items()}
+
+
+def estimate_scope_cost(name: str) -> float:
+    """집계 범위의 추정 비용 (USD, 단가를 모르는 모델은 제외)"""
+    return sum(estimate_cost(model, stats) or 0.0 for model, stats in get_scope_usage(name).items())
+
+
+def reset_llm_usage():
+    with _LOCK:
+        _STATS.clear()
+        _MODEL_STATS.clear()
+        _SCOPE_STATS.clear()
+
+
+def print_llm_usage_report():
+    """단계별 토큰 사용량과 프롬프트 캐시 적중률 출력"""
+    usage = get_llm_usage()
+    if not usage:
+        return
+    print(f"\n=== LLM 사용량 리포트 ===")
+    total = _empty_stats()
+    for stage in sorted(usage):
+        stats = usage[stage]
+        for key in total:
+            total[key] += stats[key]
+        _print_stats_line(f"{stage}단계", stats)
+    _print_stats_line("전체", total)
+
+    # 모델(티어)별 지연/비용
+    by_model = get_llm_usage_by_model()
+    total_cost = 0.0
+    for model in sorted(by_model):
+        stats = by_model[model]
+        cost = estimate_cost(model, stats)
+        _print_stats_line(f"모델 {model or '알 수 없음'}", stats)
+        if cost is None:
+            print(f"  추정 비용: 단가 정보 없음 (MODEL_PRICING에 추가 필요)")
+        else:
+            total_cost += cost
+            print(f"  추정 비용: ${cost:.4f}, 총 응답 시간 {stats['seconds']:.1f}초")
+    if len(by_model) > 1:
+        print(f"- 전체 추정 비용: ${total_cost:.4f}")
+
+
+def _print_stats_line(label, stats):
+    cached_ratio = (stats["cached_tokens"] / stats["input_tokens"] * 100) if stats["input_tokens"] else 0.0
+    avg_seconds = stats["seconds"] / stats["calls"] if stats["calls"] else 0.0
+    print(f"- {label}: 호출 {stats['calls']}회, 입력 {stats['input_tokens']} 토큰 "
+          f"(캐시 {stats['cached_tokens']}, {cached_ratio:.1f}%), 출력 {stats['output_tokens']} 토큰, "
+          f"평균 {avg_seconds:.1f}초")
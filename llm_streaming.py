@@ -0,0 +1,276 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+LLM Streaming
+-----------------------
+LLM 응답을 스트리밍으로 받아 JSON 결과 항목을 완성되는 즉시 전달하는 모듈입니다.
+- 증분 JSON 파서: 최상위 객체의 배열 필드("excluded", "retained", "groups", "final_selection" 등)에서
+  항목(객체/숫자/문자열)이 닫히는 즉시 (필드, 항목)으로 전달
+- 수신기(stream_listener): 이 범위(같은 컨텍스트) 안의 스트리밍 항목을 받는 함수 (화면 진행 상황 표시 등)
+- 첫 토큰까지 시간(TTFT), 첫 결과까지 시간(TTFR), 전체 응답 시간을 단계/모델별로 기록하고 실행 후 리포트 출력
+재시도/헤징으로 같은 항목이 여러 번 전달될 수 있으므로 수신기는 중복 항목을 무시해야 합니다. (StreamProgress 참고)
+"""
+
+import json
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+
+import numpy as np
+
+from config import LLM_STREAMING_SETTINGS
+
+_LISTENER = contextvars.ContextVar("llm_stream_listener", default=None)
+_LOCK = threading.Lock()
+_STATS = {}
+
+
+class IncrementalJSONParser:
+    """
+    조각 단위로 들어오는 JSON 응답에서 최상위 배열 필드의 항목을 완성되는 즉시 꺼내는 파서
+    (첫 "{" 이전의 코드 블록 표시 등은 무시, 항목 JSON이 깨져 있으면 건너뜀)
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._started = False
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._last_key = None
+        self._array_key = None
+        self._item_start = None
+
+    def _emit(self, text, items):
+        try:
+            items.append((self._array_key, json.loads(text)))
+        except ValueError:
+            pass
+        self._item_start = None
+
+    def feed(self, text: str) -> list:
+        """응답 조각을 추가하고 새로 완성된 [(필드, 항목), ...] 반환"""
+        self.buffer += text
+        items = []
+        buffer = self.buffer
+        for i in range(self._pos, len(buffer)):
+            c = buffer[i]
+            if not self._started:
+                if c == "{":
+                    self._started = True
+                    self._depth = 1
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_key = buffer[self._string_start + 1:i]
+                continue
+            in_array = self._depth == 2 and self._array_key is not None
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+                if in_array and self._item_start is None:
+                    self._item_start = i
+            elif c in "{[":
+                if in_array and self._item_start is None:
+                    self._item_start = i
+                self._depth += 1
+                if self._depth == 2:
+                    self._array_key = self._last_key if c == "[" else None
+            elif c in "}]":
+                self._depth -= 1
+                if self._depth == 2 and self._array_key is not None and self._item_start is not None:
+                    self._emit(buffer[self._item_start:i + 1], items)
+                elif self._depth == 1:
+                    # 배열이 닫힐 때 마지막 숫자/문자열 항목
+                    if self._item_start is not None:
+                        self._emit(buffer[self._item_start:i].strip(), items)
+                    self._array_key = None
+            elif c == ",":
+                if in_array and self._item_start is not None:
+                    self._emit(buffer[self._item_start:i].strip(), items)
+            elif in_array and self._item_start is None and not c.isspace():
+                # 숫자/true/false/null 항목 시작
+                self._item_start = i
+        self._pos = len(buffer)
+        return items
+
+
+def streaming_enabled(stage: int) -> bool:
+    """스트리밍 적용 단계 여부"""
+    return LLM_STREAMING_SETTINGS.get("enabled", False) and stage in LLM_STREAMING_SETTINGS.get("stages", [])
+
+
+@contextmanager
+def stream_listener(fn):
+    """이 범위(같은 컨텍스트의 스레드/태스크) 안의 스트리밍 항목을 fn(stage, field, item)으로 전달"""
+    token = _LISTENER.set(fn)
+    try:
+        yield
+    finally:
+        _LISTENER.reset(token)
+
+
+def get_stream_listener():
+    return _LISTENER.get()
+
+
+def combine_listeners(*listeners):
+    """여러 수신기를 하나로 합침 (None은 제외, 모두 None이면 None)"""
+    listeners = [listener for listener in listeners if listener is not None]
+    if not listeners:
+        return None
+    if len(listeners) == 1:
+        return listeners[0]
+
+    def combined(stage, field, item):
+        for listener in listeners:
+            listener(stage, field, item)
+    return combined
+
+
+def _notify(listener, stage, items):
+    for field, item in items:
+        try:
+            listener(stage, field, item)
+        except Exception as e:
+            # 진행 표시/사전 준비 실패가 LLM 호출을 중단시키지 않도록
+            print(f"[LLM 스트리밍] 항목 처리 오류 무시: {str(e)}")
+
+
+def replay_text(text: str, stage: int, listener):
+    """캐시 적중 등 스트리밍 없이 받은 응답도 같은 수신기로 항목 전달"""
+    if listener is not None and isinstance(text, str):
+        _notify(listener, stage, IncrementalJSONParser().feed(text))
+
+
+class _StreamRun:
+    """스트리밍 호출 1회의 조각 누적/항목 전달/시간 기록"""
+
+    def __init__(self, stage, model, listener):
+        self.stage = stage
+        self.model = model
+        self.listener = listener
+        self.parser = IncrementalJSONParser()
+        self.message = None
+        self.items = 0
+        self.started = time.perf_counter()
+        self.first_token = None
+        self.first_result = None
+
+    def add(self, chunk):
+        self.message = chunk if self.message is None else self.message + chunk
+        text = chunk.content if isinstance(chunk.content, str) else ""
+        if not text:
+            return
+        if self.first_token is None:
+            self.first_token = time.perf_counter() - self.started
+        items = self.parser.feed(text)
+        if items:
+            if self.first_result is None:
+                self.first_result = time.perf_counter() - self.started
+            self.items += len(items)
+            if self.listener is not None:
+                _notify(self.listener, self.stage, items)
+
+    def finish(self):
+        if self.message is None:
+            raise ValueError("스트리밍 응답이 비어 있습니다.")
+        record_stream(self.stage, self.model, self.first_token, self.first_result,
+                      time.perf_counter() - self.started, self.items)
+        return self.message
+
+
+def stream_llm(llm, messages, stage: int, model: str, listener=None):
+    """llm.stream으로 호출하고 조각을 합친 응답 메시지 반환 (항목은 완성 즉시 listener로 전달)"""
+    run = _StreamRun(stage, model, listener)
+    for chunk in llm.stream(messages, stream_usage=True):
+        run.add(chunk)
+    return run.finish()
+
+
+async def astream_llm(llm, messages, stage: int, model: str, listener=None):
+    """stream_llm의 비동기 버전 (astream 사용)"""
+    run = _StreamRun(stage, model, listener)
+    async for chunk in llm.astream(messages, stream_usage=True):
+        run.add(chunk)
+    return run.finish()
+
+
+def record_stream(stage, model, first_token, first_result, total, items):
+    """스트리밍 호출 1건의 TTFT/TTFR/전체 시간 기록"""
+    with _LOCK:
+        stats = _STATS.setdefault((stage, model), {"ttft": [], "ttfr": [], "total": [], "items": 0})
+        if first_token is not None:
+            stats["ttft"].append(first_token)
+        if first_result is not None:
+            stats["ttfr"].append(first_result)
+        stats["total"].append(total)
+        stats["items"] += items
+    if LLM_STREAMING_SETTINGS.get("log_each_call", True):
+        ttfr = f"{first_result:.1f}초" if first_result is not None else "없음"
+        print(f"[LLM 스트리밍] {stage}단계 ({model}): 첫 결과 {ttfr}, 전체 {total:.1f}초, 항목 {items}개")
+
+
+def get_stream_stats() -> dict:
+    with _LOCK:
+        return {key: {name: list(value) if isinstance(value, list) else value for name, value in stats.items()}
+                for key, stats in _STATS.items()}
+
+
+def print_streaming_report():
+    """단계/모델별 첫 토큰/첫 결과/전체 응답 시간(p50/p95) 출력"""
+    stats = get_stream_stats()
+    if not stats:
+        return
+    print(f"\n=== LLM 스트리밍 리포트 ===")
+
+    def summary(samples):
+        if not samples:
+            return "표본 없음"
+        p50, p95 = np.percentile(samples, [50, 95])
+        return f"p50 {p50:.1f}초, p95 {p95:.1f}초"
+
+    for (stage, model), values in sorted(stats.items(), key=lambda item: (item[0][0], item[0][1] or "")):
+        print(f"- {stage}단계 ({model}): 호출 {len(values['total'])}회, 항목 {values['items']}개")
+        print(f"  첫 토큰 {summary(values['ttft'])} / 첫 결과 {summary(values['ttfr'])} / 전체 {summary(values['total'])}")
+
+
+class StreamProgress:
+    """
+    스트리밍 항목을 단계/필드별로 중복 없이 세고 render(counts)를 호출하는 수신기
+    (재시도/헤징으로 같은 항목이 다시 와도 한 번만 집계)
+    """
+
+    def __init__(self, render):
+        self.render = render
+        self._lock = threading.Lock()
+        self._seen = {}
+
+    @staticmethod
+    def _item_key(item):
+        if isinstance(item, dict):
+            for key in ("index", "id", "indices", "ids"):
+                if key in item:
+                    return json.dumps(item[key], ensure_ascii=False)
+            return json.dumps(item, ensure_ascii=False, sort_keys=True)
+        return json.dumps(item, ensure_ascii=False)
+
+    def __call__(self, stage, field, item):
+        with self._lock:
+            seen = self._seen.setdefault((stage, field), set())
+            key = self._item_key(item)
+            if key in seen:
+                return
+            seen.add(key)
+            counts = {name: len(values) for name, values in self._seen.items()}
+        self.render(counts)
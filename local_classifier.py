@@ -0,0 +1,500 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Local Stage-1 Classifier
+-----------------------
+LLM 1단계(제외/보류/유지) 판단 로그로 학습하는 CPU 전용 경량 분류기입니다.
+해시된 문자 n-gram 특징과 다항 로지스틱 회귀(NumPy)로 구성되며,
+filter_excluded_news에서 신뢰도가 높은 기사만 로컬에서 판단하고 나머지는 LLM으로 넘깁니다.
+학습 기본값은 현재 설정의 회사별 엄격 제외 기준으로 기록된 로그만 사용하며, 그 기준 해시를 모델에 저장해
+제외 기준이 다른 state(완화된 기준 재평가, 수정된 기준)에는 모델을 적용하지 않습니다.
+
+사용법:
+    python local_classifier.py train [--log=PATH] [--model=PATH] [--criteria-hash=HASH]
+    python local_classifier.py evaluate [--log=PATH] [--model=PATH] [--criteria-hash=HASH]
+"""
+
+import os
+import sys
+import json
+import zlib
+import hashlib
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from config import LOCAL_CLASSIFIER_SETTINGS, COMPANY_CATEGORIES, COMPANY_KEYWORD_MAP
+from title_normalizer import clean_title, normalize_string
+
+# 한국 시간대(KST) 정의
+KST = timezone(timedelta(hours=9))
+
+# 분류 라벨 (모델 출력 순서)
+VERDICTS = ["excluded", "borderline", "retained"]
+
+
+def criteria_hash(criteria: str) -> str:
+    """제외 기준 텍스트의 짧은 해시 (기준이 바뀐 로그를 구분하기 위함)"""
+    return hashlib.sha1((criteria or "").encode("utf-8")).hexdigest()[:12]
+
+
+def stage1_criteria_hash(exclusion_criteria: str, company_criteria: str = "") -> str:
+    """1단계 제외 기준 해시 (prefix 캐시 레이아웃/회사 묶음 호출에서 분리된 회사별 기준 포함)"""
+    return criteria_hash((exclusion_criteria or "") + (company_criteria or ""))
+
+
+def current_criteria_hashes():
+    """현재 설정의 회사별 엄격 기준 제외 기준 해시 목록 (학습 기본 필터, 모델 적용 여부 판단에 사용)"""
+    # auto_news_mail → news_ai → local_classifier 순환 import를 피하기 위해 함수 안에서 import
+    from auto_news_mail import compose_company_exclusion_criteria
+    companies = set(COMPANY_KEYWORD_MAP)
+    for sections in COMPANY_CATEGORIES.values():
+        for section_companies in sections.values():
+            companies.update(section_companies)
+    return sorted({stage1_criteria_hash(*compose_company_exclusion_criteria(company)) for company in companies})
+
+
+def log_stage1_verdicts(state, news_data, classification, model=None):
+    """LLM 1단계 판단 결과를 (제목, 언론사, 회사, 판단, 응답 모델) 형태로 JSONL 로그에 추가하는 함수"""
+    if not LOCAL_CLASSIFIER_SETTINGS.get("log_enabled", False):
+        return
+    log_path = LOCAL_CLASSIFIER_SETTINGS["log_path"]
+    try:
+        news_by_index = {news.get("original_index"): news for news in news_data}
+        company = get_state_company(state)
+        model = model or state.get("model", "")
+        hashed_criteria = stage1_criteria_hash(state.get("exclusion_criteria", ""), state.get("company_criteria_1", ""))
+        timestamp = datetime.now(KST).isoformat()
+
+        lines = []
+        for verdict in VERDICTS:
+            for item in classification.get(verdict, []):
+                news = news_by_index.get(item.get("index"))
+                if news is None:
+                    continue
+                lines.append(json.dumps({
+                    "ts": timestamp,
+                    "company": company,
+                    "title": news.get("content", ""),
+                    "press": news.get("press", ""),
+                    "verdict": verdict,
+                    "model": model,
+                    "criteria_hash": hashed_criteria
+                }, ensure_ascii=False))
+
+        if not lines:
+            return
+        os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+        with open(log_path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        print(f"[로컬 분류기] 1단계 판단 로그 {len(lines)}건 기록: {log_path}")
+    except Exception as e:
+        # 로그 기록 실패는 파이프라인에 영향을 주지 않음
+        print(f"[로컬 분류기] 판단 로그 기록 실패: {str(e)}")
+
+
+def get_state_company(state):
+    """state에서 분석 대상 회사명을 찾는 함수 (company가 없으면 첫 번째 키워드 사용)"""
+    company = state.get("company")
+    if company:
+        return company
+    keyword = state.get("keyword", "")
+    if isinstance(keyword, (list, tuple)):
+        return keyword[0] if keyword else ""
+    return keyword or ""
+
+
+def load_verdict_log(log_path=None, criteria_hashes=None):
+    """JSONL 판단 로그를 읽어 레코드 리스트로 반환하는 함수 (criteria_hashes가 있으면 해당 기준 로그만, 같은 기사는 마지막 판단 사용)"""
+    log_path = log_path or LOCAL_CLASSIFIER_SETTINGS["log_path"]
+    records = {}
+    with open(log_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("verdict") not in VERDICTS:
+                continue
+            if criteria_hashes is not None and record.get("criteria_hash") not in criteria_hashes:
+                continue
+            key = (record.get("company", ""), record.get("title", ""), record.get("press", ""))
+            records[key] = record
+    return list(records.values())
+
+
+def _normalize_title(title):
+    """특징 추출용 제목 정규화 (언론사 표기 제거, 소문자, 공백 정리)"""
+    return normalize_string(clean_title(title or ""))
+
+
+def _hash_feature(token, n_features):
+    """문자열 특징을 해시 인덱스로 변환"""
+    return zlib.crc32(token.encode("utf-8")) % n_features
+
+
+def extract_features(title, press, company, n_features, ngram_range):
+    """제목 문자 n-gram + 언론사/회사 토큰을 해시 인덱스와 가중치로 변환하는 함수"""
+    text = f" {_normalize_title(title)} "
+    min_n, max_n = ngram_range
+
+    counts = {}
+    for n in range(min_n, max_n + 1):
+        for i in range(len(text) - n + 1):
+            idx = _hash_feature(f"c{n}:{text[i:i + n]}", n_features)
+            counts[idx] = counts.get(idx, 0) + 1
+
+    # 언론사/회사 특징 (회사별 판단 경향 반영)
+    press_token = (press or "").strip().lower()
+    for token in (f"press:{press_token}", f"company:{company}", f"company_press:{company}|{press_token}"):
+        idx = _hash_feature(token, n_features)
+        counts[idx] = counts.get(idx, 0) + 1
+
+    indices = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+    values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+    # L2 정규화
+    values /= np.sqrt(np.sum(values ** 2))
+    return indices, values
+
+
+def _build_sparse(records, n_features, ngram_range):
+    """레코드 리스트를 (특징 인덱스, 값, 행 번호) 희소 배열로 변환"""
+    all_indices, all_values, all_rows = [], [], []
+    for row, record in enumerate(records):
+        indices, values = extract_features(
+            record.get("title", ""), record.get("press", ""), record.get("company", ""),
+            n_features, ngram_range
+        )
+        all_indices.append(indices)
+        all_values.append(values)
+        all_rows.append(np.full(len(indices), row, dtype=np.int64))
+    if not all_indices:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, np.zeros(0, dtype=np.float32), empty
+    return np.concatenate(all_indices), np.concatenate(all_values), np.concatenate(all_rows)
+
+
+def _softmax(scores):
+    scores = scores - scores.max(axis=1, keepdims=True)
+    exp_scores = np.exp(scores)
+    return exp_scores / exp_scores.sum(axis=1, keepdims=True)
+
+
+class LocalStage1Classifier:
+    """해시 문자 n-gram + 다항 로지스틱 회귀 기반 1단계 분류기"""
+
+    def __init__(self, weights, bias, n_features, ngram_range, metadata=None):
+        self.weights = weights
+        self.bias = bias
+        self.n_features = n_features
+        self.ngram_range = tuple(ngram_range)
+        self.metadata = metadata or {}
+
+    def _scores(self, indices, values, rows, n_rows):
+        contrib = self.weights[indices] * values[:, None]
+        scores = np.zeros((n_rows, len(VERDICTS)), dtype=np.float64)
+        np.add.at(scores, rows, contrib)
+        return scores + self.bias
+
+    def predict_proba(self, records):
+        """레코드 리스트에 대한 분류별 확률 행렬 반환 (행: 레코드, 열: VERDICTS 순서)"""
+        if not records:
+            return np.zeros((0, len(VERDICTS)))
+        indices, values, rows = _build_sparse(records, self.n_features, self.ngram_range)
+        return _softmax(self._scores(indices, values, rows, len(records)))
+
+    @classmethod
+    def train(cls, records, n_features=None, ngram_range=None, epochs=None,
+              learning_rate=None, l2=None):
+        """판단 로그 레코드로 모델을 학습하는 함수 (전체 배치 Adam)"""
+        n_features = n_features or LOCAL_CLASSIFIER_SETTINGS["n_features"]
+        ngram_range = ngram_range or LOCAL_CLASSIFIER_SETTINGS["ngram_range"]
+        epochs = epochs or LOCAL_CLASSIFIER_SETTINGS["epochs"]
+        learning_rate = learning_rate or LOCAL_CLASSIFIER_SETTINGS["learning_rate"]
+        l2 = LOCAL_CLASSIFIER_SETTINGS["l2"] if l2 is None else l2
+        if not records:
+            raise ValueError("학습할 판단 로그 레코드가 없습니다.")
+
+        n_rows = len(records)
+        n_classes = len(VERDICTS)
+        labels = np.array([VERDICTS.index(r["verdict"]) for r in records], dtype=np.int64)
+        onehot = np.zeros((n_rows, n_classes))
+        onehot[np.arange(n_rows), labels] = 1.0
+
+        indices, values, rows = _build_sparse(records, n_features, ngram_range)
+        model = cls(np.zeros((n_features, n_classes)), np.zeros(n_classes), n_features, ngram_range)
+
+        # Adam 상태
+        m_w, v_w = np.zeros_like(model.weights), np.zeros_like(model.weights)
+        m_b, v_b = np.zeros_like(model.bias), np.zeros_like(model.bias)
+        beta1, beta2, eps = 0.9, 0.999, 1e-8
+
+        for epoch in range(1, epochs + 1):
+            probs = _softmax(model._scores(indices, values, rows, n_rows))
+            dscores = (probs - onehot) / n_rows
+
+            grad_w = np.empty_like(model.weights)
+            for c in range(n_classes):
+                grad_w[:, c] = np.bincount(indices, weights=values * dscores[rows, c], minlength=n_features)
+            grad_w += l2 * model.weights
+            grad_b = dscores.sum(axis=0)
+
+            m_w = beta1 * m_w + (1 - beta1) * grad_w
+            v_w = beta2 * v_w + (1 - beta2) * grad_w ** 2
+            m_b = beta1 * m_b + (1 - beta1) * grad_b
+            v_b = beta2 * v_b + (1 - beta2) * grad_b ** 2
+            correction1 = 1 - beta1 ** epoch
+            correction2 = 1 - beta2 ** epoch
+            model.weights -= learning_rate * (m_w / correction1) / (np.sqrt(v_w / correction2) + eps)
+            model.bias -= learning_rate * (m_b / correction1) / (np.sqrt(v_b / correction2) + eps)
+
+            if epoch % 50 == 0 or epoch == epochs:
+                loss = -np.mean(np.log(probs[np.arange(n_rows), labels] + 1e-12))
+                print(f"[학습] epoch {epoch}/{epochs} - loss: {loss:.4f}")
+
+        return model
+
+    def save(self, path):
+        """모델을 .npz 파일로 저장"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez_compressed(
+            path,
+            weights=self.weights.astype(np.float32),
+            bias=self.bias,
+            n_features=self.n_features,
+            ngram_range=np.array(self.ngram_range),
+            metadata=json.dumps(self.metadata, ensure_ascii=False)
+        )
+
+    @classmethod
+    def load(cls, path):
+        """저장된 .npz 모델을 불러오기"""
+        data = np.load(path)
+        return cls(
+            data["weights"],
+            data["bias"],
+            int(data["n_features"]),
+            tuple(int(n) for n in data["ngram_range"]),
+            json.loads(str(data["metadata"]))
+        )
+
+
+# 프로세스 내 모델 캐시 (회사마다 다시 읽지 않도록)
+_CLASSIFIER_CACHE = {}
+
+
+def get_stage1_classifier(model_path=None):
+    """학습된 로컬 분류기를 불러오는 함수 (없으면 None)"""
+    model_path = model_path or LOCAL_CLASSIFIER_SETTINGS["model_path"]
+    if model_path in _CLASSIFIER_CACHE:
+        return _CLASSIFIER_CACHE[model_path]
+    classifier = None
+    if os.path.exists(model_path):
+        try:
+            classifier = LocalStage1Classifier.load(model_path)
+            print(f"[로컬 분류기] 모델 로드: {model_path}")
+        except Exception as e:
+            print(f"[로컬 분류기] 모델 로드 실패: {str(e)}")
+    else:
+        print(f"[로컬 분류기] 모델 파일이 없습니다: {model_path}")
+    _CLASSIFIER_CACHE[model_path] = classifier
+    return classifier
+
+
+def classifier_matches_criteria(classifier, exclusion_criteria, company_criteria=""):
+    """모델이 이 제외 기준(회사별 기준 포함)으로 기록된 로그로 학습되었는지 여부 (기준 해시가 없는 이전 모델은 적용하지 않음)"""
+    return stage1_criteria_hash(exclusion_criteria, company_criteria) in classifier.metadata.get("criteria_hashes", [])
+
+
+def split_confident_news(news_data, company, classifier, thresholds=None):
+    """
+    로컬 분류기로 신뢰도 높은 기사와 LLM이 판단할 기사를 나누는 함수
+
+    Args:
+        news_data (list): 1단계 대상 뉴스 목록
+        company (str): 회사명
+        classifier (LocalStage1Classifier): 학습된 분류기
+        thresholds (dict): 분류별 최소 신뢰도 (None이면 로컬 판단 안 함)
+
+    Returns:
+        tuple: (로컬 판단 결과 {"excluded": [...], "borderline": [...], "retained": [...]},
+                LLM으로 넘길 뉴스 목록, 기사 인덱스별 로컬 예측 {index: (판단, 신뢰도)})
+    """
+    thresholds = thresholds or LOCAL_CLASSIFIER_SETTINGS["thresholds"]
+    decided = {verdict: [] for verdict in VERDICTS}
+    deferred = []
+    predictions = {}
+
+    records = [
+        {"title": news.get("content", ""), "press": news.get("press", ""), "company": company}
+        for news in news_data
+    ]
+    probs = classifier.predict_proba(records)
+
+    for news, row in zip(news_data, probs):
+        best = int(np.argmax(row))
+        verdict = VERDICTS[best]
+        confidence = float(row[best])
+        index = news.get("original_index")
+        predictions[index] = (verdict, confidence)
+
+        threshold = thresholds.get(verdict)
+        if threshold is not None and confidence >= threshold:
+            decided[verdict].append({
+                "index": index,
+                "title": news.get("content", ""),
+                "reason": f"로컬 분류기 판단 (신뢰도 {confidence:.2f})",
+                "original_index": index,
+                "decided_by": "local"
+            })
+        else:
+            deferred.append(news)
+
+    return decided, deferred, predictions
+
+
+def report_shadow_agreement(predictions, classification, thresholds=None):
+    """shadow 모드에서 로컬 예측과 LLM 판단의 일치율을 출력하는 함수"""
+    thresholds = thresholds or LOCAL_CLASSIFIER_SETTINGS["thresholds"]
+    llm_verdicts = {}
+    for verdict in VERDICTS:
+        for item in classification.get(verdict, []):
+            llm_verdicts[item.get("index")] = verdict
+
+    total = agreed = confident = confident_agreed = 0
+    for index, (verdict, confidence) in predictions.items():
+        if index not in llm_verdicts:
+            continue
+        total += 1
+        match = verdict == llm_verdicts[index]
+        agreed += match
+        threshold = thresholds.get(verdict)
+        if threshold is not None and confidence >= threshold:
+            confident += 1
+            confident_agreed += match
+
+    if total:
+        print(f"[로컬 분류기 shadow] 전체 일치율: {agreed}/{total} ({agreed / total:.1%})")
+        if confident:
+            print(f"[로컬 분류기 shadow] 임계값 이상 {confident}건 (커버리지 {confident / total:.1%}), "
+                  f"일치율: {confident_agreed}/{confident} ({confident_agreed / confident:.1%})")
+        else:
+            print("[로컬 분류기 shadow] 임계값 이상 예측 없음")
+
+
+def compute_agreement_metrics(classifier, records, thresholds=None):
+    """로그 레코드 기준 로컬 분류기와 LLM 판단의 일치율 지표를 계산하는 함수"""
+    thresholds = thresholds or LOCAL_CLASSIFIER_SETTINGS["thresholds"]
+    if not records:
+        return {"total": 0}
+
+    probs = classifier.predict_proba(records)
+    predicted = probs.argmax(axis=1)
+    confidence = probs.max(axis=1)
+    labels = np.array([VERDICTS.index(r["verdict"]) for r in records])
+
+    confident_mask = np.zeros(len(records), dtype=bool)
+    for c, verdict in enumerate(VERDICTS):
+        threshold = thresholds.get(verdict)
+        if threshold is not None:
+            confident_mask |= (predicted == c) & (confidence >= threshold)
+
+    confusion = np.zeros((len(VERDICTS), len(VERDICTS)), dtype=np.int64)
+    np.add.at(confusion, (labels, predicted), 1)
+
+    n_confident = int(confident_mask.sum())
+    return {
+        "total": len(records),
+        "agreement": float(np.mean(predicted == labels)),
+        "coverage": n_confident / len(records),
+        "confident_agreement": float(np.mean(predicted[confident_mask] == labels[confident_mask])) if n_confident else None,
+        "confusion": confusion.tolist()
+    }
+
+
+def print_agreement_metrics(metrics, title):
+    """일치율 지표 출력"""
+    print(f"\n=== {title} ===")
+    print(f"평가 기사 수: {metrics['total']}")
+    if not metrics["total"]:
+        return
+    print(f"전체 일치율: {metrics['agreement']:.1%}")
+    print(f"로컬 판단 커버리지 (임계값 이상): {metrics['coverage']:.1%}")
+    if metrics["confident_agreement"] is not None:
+        print(f"로컬 판단 일치율: {metrics['confident_agreement']:.1%}")
+    print("혼동 행렬 (행: LLM 판단, 열: 로컬 예측) - " + ", ".join(VERDICTS))
+    for verdict, row in zip(VERDICTS, metrics["confusion"]):
+        print(f"  {verdict:>10}: {row}")
+
+
+def _is_holdout(record, holdout_ratio):
+    """제목 해시 기반의 결정적 검증 데이터 분할"""
+    key = f"{record.get('company', '')}|{record.get('title', '')}"
+    return (zlib.crc32(key.encode("utf-8")) % 1000) < holdout_ratio * 1000
+
+
+def main():
+    """학습/평가 명령 처리"""
+    if len(sys.argv) < 2 or sys.argv[1] not in ("train", "evaluate"):
+        print(__doc__)
+        return
+
+    command = sys.argv[1]
+    log_path = LOCAL_CLASSIFIER_SETTINGS["log_path"]
+    model_path = LOCAL_CLASSIFIER_SETTINGS["model_path"]
+    criteria_hashes = None
+    for arg in sys.argv[2:]:
+        if arg.startswith("--log="):
+            log_path = arg.split("=", 1)[1]
+        elif arg.startswith("--model="):
+            model_path = arg.split("=", 1)[1]
+        elif arg.startswith("--criteria-hash="):
+            criteria_hashes = [arg.split("=", 1)[1]]
+    if criteria_hashes is None:
+        # 기본값: 현재 설정의 엄격 기준으로 기록된 로그만 사용 (완화된 기준/이전 기준 판단 제외)
+        criteria_hashes = current_criteria_hashes()
+
+    records = load_verdict_log(log_path, criteria_hashes)
+    print(f"판단 로그 레코드 수: {len(records)}개 ({log_path})")
+    if not records:
+        print("학습/평가할 로그가 없습니다.")
+        return
+
+    holdout_ratio = LOCAL_CLASSIFIER_SETTINGS["holdout_ratio"]
+    train_records = [r for r in records if not _is_holdout(r, holdout_ratio)]
+    holdout_records = [r for r in records if _is_holdout(r, holdout_ratio)]
+
+    if command == "train":
+        print(f"학습 데이터: {len(train_records)}개, 검증 데이터: {len(holdout_records)}개")
+        if train_records:
+            classifier = LocalStage1Classifier.train(train_records)
+            metrics = compute_agreement_metrics(classifier, holdout_records)
+            print_agreement_metrics(metrics, "검증 데이터 일치율")
+        else:
+            print("검증용 학습 데이터가 없어 검증을 건너뜁니다.")
+            metrics = {"total": 0}
+
+        # 배포용 모델은 전체 데이터로 다시 학습
+        classifier = LocalStage1Classifier.train(records)
+        classifier.metadata = {
+            "trained_at": datetime.now(KST).isoformat(),
+            "records": len(records),
+            "criteria_hashes": criteria_hashes,
+            "holdout_metrics": metrics
+        }
+        classifier.save(model_path)
+        print(f"모델 저장 완료: {model_path}")
+    else:
+        classifier = get_stage1_classifier(model_path)
+        if classifier is None:
+            return
+        print_agreement_metrics(compute_agreement_metrics(classifier, holdout_records), "검증 데이터 일치율")
+        print_agreement_metrics(compute_agreement_metrics(classifier, records), "전체 로그 일치율")
+
+
+if __name__ == "__main__":
+    main()
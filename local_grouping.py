@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Local Grouping Engine
+-----------------------
+2단계(유사 뉴스 그룹핑)를 LLM 호출 없이 처리하는 로컬 그룹핑 모듈입니다. (NumPy)
+- 제목 유사도: 정리된 제목(clean_title)의 문자 n-gram TF-IDF 코사인 유사도
+- 숫자 겹침: 금액/비율/분기 등 숫자 표현("3조", "15%", "2분기")의 Jaccard 유사도
+- 개체 겹침: 회사/계열사명(COMPANY_KEYWORD_MAP + 분석 대상 키워드)의 Jaccard 유사도
+- 평균 연결(average linkage) 병합 군집화로 임계값 이상인 기사끼리 묶음
+hybrid 모드에서는 군집 경계가 모호한 기사(다른 군집과의 유사도가 모호 구간에 있는 기사)만 LLM으로 넘깁니다.
+"""
+
+import re
+import math
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+
+from config import COMPANY_KEYWORD_MAP, LOCAL_GROUPING_SETTINGS
+from title_normalizer import clean_title, normalize_string
+
+# 숫자 + 단위 ("3조", "1,200억원", "15.5%", "2분기", "3년")
+_NUMBER_PATTERN = re.compile(r"(\d+(?:[.,]\d+)*)\s*(조|억|만|천|%|퍼센트|배|분기|년|월|일|명|개|위|원|달러)?")
+_NON_WORD_PATTERN = re.compile(r"[^\w%]+")
+
+
+def get_grouping_mode() -> str:
+    """2단계 그룹핑 방식 ("llm" / "local" / "hybrid")"""
+    mode = LOCAL_GROUPING_SETTINGS.get("mode", "llm")
+    return mode if mode in ("llm", "local", "hybrid") else "llm"
+
+
+def extract_numbers(title: str) -> frozenset:
+    """제목의 숫자 표현 집합 (천 단위 구분 기호 제거, 단위 포함)"""
+    numbers = set()
+    for value, unit in _NUMBER_PATTERN.findall(title or ""):
+        numbers.add(value.replace(",", "") + (unit or ""))
+    return frozenset(numbers)
+
+
+@lru_cache(maxsize=64)
+def _compile_entity_pattern(extra_keywords: tuple):
+    """회사/계열사명 패턴 (긴 이름 우선 매칭)"""
+    names = set(extra_keywords)
+    for keywords in COMPANY_KEYWORD_MAP.values():
+        names.update(keywords)
+    names = sorted((normalize_string(name) for name in names if name and name.strip()), key=len, reverse=True)
+    if not names:
+        return None
+    return re.compile("|".join(re.escape(name) for name in names))
+
+
+def extract_entities(title: str, extra_keywords: tuple = ()) -> frozenset:
+    """제목에 등장하는 회사/계열사명 집합"""
+    pattern = _compile_entity_pattern(tuple(extra_keywords))
+    if pattern is None:
+        return frozenset()
+    return frozenset(pattern.findall(normalize_string(title)))
+
+
+@lru_cache(maxsize=4096)
+def title_features(title: str, extra_keywords: tuple = ()):
+    """제목의 (정리된 제목, 숫자 표현 집합, 회사/계열사명 집합) (스트리밍 중 미리 계산한 값 재사용)"""
+    cleaned = clean_title(title)
+    return cleaned, extract_numbers(cleaned), extract_entities(cleaned, extra_keywords)
+
+
+def _char_ngrams(text, ngram_range):
+    compact = _NON_WORD_PATTERN.sub(" ", text).strip()
+    grams = []
+    for n in range(ngram_range[0], ngram_range[1] + 1):
+        for token in compact.split(" "):
+            if len(token) < n:
+                if token and n == ngram_range[0]:
+                    grams.append(token)
+                continue
+            grams.extend(token[i:i + n] for i in range(len(token) - n + 1))
+    return grams
+
+
+def tfidf_similarity(titles: list, ngram_range=(2, 3)) -> np.ndarray:
+    """제목 목록의 문자 n-gram TF-IDF 코사인 유사도 행렬"""
+    docs = [Counter(_char_ngrams(normalize_string(title), ngram_range)) for title in titles]
+    vocab = {}
+    for doc in docs:
+        for gram in doc:
+            vocab.setdefault(gram, len(vocab))
+    if not vocab:
+        return np.eye(len(titles))
+
+    matrix = np.zeros((len(docs), len(vocab)))
+    for row, doc in enumerate(docs):
+        for gram, count in doc.items():
+            matrix[row, vocab[gram]] = 1.0 + math.log(count)
+    df = np.count_nonzero(matrix, axis=0)
+    matrix *= np.log((1 + len(docs)) / (1 + df)) + 1.0
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return np.clip(matrix @ matrix.T, 0.0, 1.0)
+
+
+def _set_similarity(sets, fallback):
+    """집합 Jaccard 유사도 행렬 (한쪽이라도 비어 있으면 fallback 값 사용)"""
+    size = len(sets)
+    sim = fallback.copy()
+    for i in range(size):
+        for j in range(i + 1, size):
+            if sets[i] and sets[j]:
+                sim[i, j] = sim[j, i] = len(sets[i] & sets[j]) / len(sets[i] | sets[j])
+    return sim
+
+
+def build_similarity_matrix(news_list: list, extra_keywords: tuple = (), settings: dict = None) -> np.ndarray:
+    """제목/숫자/개체 유사도를 가중 합산한 기사 간 유사도 행렬"""
+    settings = {**LOCAL_GROUPING_SETTINGS, **(settings or {})}
+    features = [title_features(news.get("content", ""), tuple(extra_keywords)) for news in news_list]
+    text_sim = tfidf_similarity([cleaned for cleaned, _, _ in features], tuple(settings["ngram_range"]))
+    # 숫자/개체 정보가 없는 쌍은 제목 유사도로 대체 (정보 부족으로 점수가 깎이지 않도록)
+    number_sim = _set_similarity([numbers for _, numbers, _ in features], text_sim)
+    entity_sim = _set_similarity([entities for _, _, entities in features], text_sim)
+
+    weights = settings["weights"]
+    total = sum(weights.values()) or 1.0
+    sim = (weights["text"] * text_sim + weights["numbers"] * number_sim + weights["entities"] * entity_sim) / total
+    np.fill_diagonal(sim, 1.0)
+    return sim
+
+
+def agglomerative_cluster(sim: np.ndarray, threshold: float) -> list:
+    """평균 연결 병합 군집화 (군집 간 평균 유사도가 threshold 이상인 동안 병합, 위치 인덱스 목록 반환)"""
+    clusters = [[i] for i in range(sim.shape[0])]
+    if len(clusters) < 2:
+        return clusters
+    linkage = sim.astype(float)
+    np.fill_diagonal(linkage, -np.inf)
+    sizes = np.ones(len(clusters))
+    active = np.ones(len(clusters), dtype=bool)
+
+    while active.sum() > 1:
+        masked = np.where(np.outer(active, active), linkage, -np.inf)
+        a, b = np.unravel_index(np.argmax(masked), masked.shape)
+        if masked[a, b] < threshold:
+            break
+        # b를 a에 병합하고 a와 다른 군집 간 평균 유사도 갱신
+        merged = (linkage[a] * sizes[a] + linkage[b] * sizes[b]) / (sizes[a] + sizes[b])
+        linkage[a, :] = merged
+        linkage[:, a] = merged
+        linkage[a, a] = -np.inf
+        sizes[a] += sizes[b]
+        active[b] = False
+        clusters[a].extend(clusters[b])
+        clusters[b] = []
+
+    return [sorted(cluster) for cluster, alive in zip(clusters, active) if alive]
+
+
+def find_ambiguous_clusters(sim: np.ndarray, clusters: list, band) -> set:
+    """
+    경계가 모호한 군집 번호 집합
+    - 군집 내부에 유사도가 모호 구간 하한보다 낮은 기사 쌍이 있거나
+    - 다른 군집 기사와의 유사도가 모호 구간(band[0] 이상 band[1] 미만)에 있는 경우
+    """
+    low, high = band
+    label = np.empty(sim.shape[0], dtype=int)
+    for cluster_id, members in enumerate(clusters):
+        label[members] = cluster_id
+
+    ambiguous = set()
+    for cluster_id, members in enumerate(clusters):
+        if len(members) > 1 and sim[np.ix_(members, members)].min() < low:
+            ambiguous.add(cluster_id)
+    same = label[:, None] == label[None, :]
+    rows, cols = np.nonzero(~same & (sim >= low) & (sim < high))
+    ambiguous.update(label[rows].tolist())
+    ambiguous.update(label[cols].tolist())
+    return ambiguous
+
+
+def group_news_locally(news_list: list, index_key: str = "current_index", extra_keywords: tuple = (),
+                       settings: dict = None):
+    """
+    기사 목록을 로컬에서 그룹핑하는 함수
+
+    Returns:
+        tuple: (확정 그룹 [{"indices": [...]}, ...], 모호한 기사 목록)
+               hybrid 모드에서는 모호한 군집의 기사를 그룹 대신 두 번째 값으로 반환
+    """
+    settings = {**LOCAL_GROUPING_SETTINGS, **(settings or {})}
+    if not news_list:
+        return [], []
+    sim = build_similarity_matrix(news_list, extra_keywords, settings)
+    clusters = agglomerative_cluster(sim, settings["threshold"])
+
+    ambiguous_ids = set()
+    if settings["mode"] == "hybrid":
+        ambiguous_ids = find_ambiguous_clusters(sim, clusters, settings["ambiguous_band"])
+
+    groups = []
+    ambiguous_news = []
+    for cluster_id, members in enumerate(clusters):
+        if cluster_id in ambiguous_ids:
+            ambiguous_news.extend(news_list[i] for i in members)
+        else:
+            groups.append({"indices": [news_list[i][index_key] for i in members]})
+    print(f"[로컬 그룹핑] 기사 {len(news_list)}개 → 군집 {len(clusters)}개 "
+          f"(확정 {len(groups)}개, 모호 {len(ambiguous_ids)}개 군집/{len(ambiguous_news)}개 기사)")
+    return groups, ambiguous_news
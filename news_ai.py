@@ -1,6 +1,5 @@
 from typing import List, Dict, Any, TypedDict
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
-from langchain_openai import ChatOpenAI
 from langgraph.graph import StateGraph, END
 from googlenews import GoogleNews
 import operator
@@ -11,6 +10,38 @@ import os
 from datetime import datetime, timedelta, timezone
 import streamlit as st
 import time
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from config import (
+    LOCAL_CLASSIFIER_SETTINGS, COMPANY_KEYWORD_MAP, RELEVANCE_FILTER_SETTINGS,
+    REPRESENTATIVE_SELECTION_SETTINGS, STRUCTURED_OUTPUT_SETTINGS, STAGE1_CHUNK_SETTINGS,
+    PROMPT_LAYOUT_SETTINGS, TERSE_RESPONSE_SETTINGS, SINGLE_PASS_SETTINGS, STAGE_MODEL_SETTINGS,
+    STAGE_SHORT_CIRCUIT_SETTINGS, RELAXED_REEVALUATION_SETTINGS, COMPANY_PACKING_SETTINGS,
+    NO_LIMIT, get_max_articles_for_company
+)
+from news_grouping import assign_representatives
+from local_grouping import get_grouping_mode, group_news_locally, title_features
+from llm_pool import get_llm_client
+from llm_limiter import get_llm_limiter, estimate_request_tokens, estimate_tokens
+from llm_cache import (
+    make_cache_key, lookup_cached_response, store_cached_response, invalidate_cached_response
+)
+from title_normalizer import clean_title, normalize_string, annotate_titles
+from llm_stats import record_llm_usage, BATCH_MODEL_SUFFIX
+from llm_batch import build_batch_request, run_batch, to_ai_message
+from llm_hedging import invoke_with_deadline, ainvoke_with_deadline
+from llm_retry import call_with_retry, acall_with_retry, parse_retry_delay
+from llm_streaming import (
+    streaming_enabled, stream_llm, astream_llm, get_stream_listener, combine_listeners, replay_text
+)
+from llm_schemas import get_stage_schema, get_single_pass_schema, decode_cached_result
+from verdict_cache import split_cached_news, store_verdicts, exclusion_criteria_hash
+from local_classifier import (
+    get_stage1_classifier, get_state_company, split_confident_news, classifier_matches_criteria,
+    log_stage1_verdicts, report_shadow_agreement
+)
 
 
 import dotenv #pwc
@@ -67,19 +98,75 @@ TRUSTED_PRESS_ALIASES = {
     "헤럴드경제": ["헤럴드경제", "herald", "heraldcorp", "heraldcorp.com"]
 }
 
+# 헬퍼 함수: 프롬프트/응답 저장
+def _record_prompts(state: AgentState, stage: int, system_prompt: str, user_prompt: str):
+    """단계별 프롬프트를 state에 저장하고 디버그 출력"""
+    if stage == 1:
+        state["system_prompt_1"] = system_prompt
+        state["user_prompt_1"] = user_prompt
+    elif stage == 2:
+        state["system_prompt_2"] = system_prompt
+        state["user_prompt_2"] = user_prompt
+    elif stage == 3:
+        state["system_prompt_3"] = system_prompt
+        state["user_prompt_3"] = user_prompt
+
+    # 디버그 출력
+    print(f"\n=== {stage}단계: 프롬프트 ===")
+    print("\n[System Prompt]:")
+    print(system_prompt)
+    print("\n[User Prompt]:")
+    print(user_prompt)
+
+def _record_response(state: AgentState, stage: int, result: str):
+    """단계별 LLM 응답을 state에 저장하고 디버그 출력"""
+    if stage == 1:
+        state["llm_response_1"] = result
+    elif stage == 2:
+        state["llm_response_2"] = result
+    elif stage == 3:
+        state["llm_response_3"] = result
+        
+    print(f"\n=== {stage}단계: LLM 응답 ===")
+    print(result)
+
+# LLM 호출 temperature (캐시 키에도 사용)
+LLM_TEMPERATURE = 0.1
+
 # 헬퍼 함수: LLM 호출
-def call_llm(state: AgentState, system_prompt: str, user_prompt: str, stage: int = 1) -> str:
-    """LLM을 호출하고 응답을 반환하는 함수"""
+def call_llm(state: AgentState, system_prompt: str, user_prompt: str, stage: int = 1, schema=None, model: str = None, on_item=None):
+    """
+    LLM을 호출하고 응답을 반환하는 함수
+
+    schema(pydantic 모델)가 주어지면 구조화 출력으로 호출하고 검증된 dict를 반환합니다. (검증 실패 시 ValueError)
+    (schema가 없으면 응답 문자열 반환, model이 없으면 state의 기본 모델 사용, API 오류 시 빈 문자열)
+    스트리밍 사용 시 JSON 결과 항목이 완성되는 즉시 on_item(stage, field, item)과 stream_listener 수신기로 전달합니다.
+    """
     try:
-        # LLM 초기화
-        llm = ChatOpenAI(
-            #openai_api_key=os.getenv("OPENAI_API_KEY"), #Test
-            #openai_api_base=os.getenv("OPENAI_BASE_URL"), #Test
-            #model_name = "openai.gpt-4.1-2025-04-14", #Test
-            model_name=state.get("model", "gpt-4o"), #Test
-            temperature=0.1,
-            #max_tokens=2000
+        model = model or state.get("model", "gpt-4o")
+        listener = combine_listeners(on_item, get_stream_listener()) if streaming_enabled(stage) and not schema else None
+
+        # 프롬프트 저장
+        _record_prompts(state, stage, system_prompt, user_prompt)
+
+        # 영속 캐시 조회 (같은 모델/프롬프트 요청이면 API 호출 생략)
+        cache_key, result = lookup_cached_response(model, LLM_TEMPERATURE, system_prompt, user_prompt)
+        if result is not None:
+            decoded = decode_cached_result(schema, result) if schema else result
+            if decoded is not None:
+                print(f"\n[LLM 캐시] {stage}단계 응답 캐시 적중")
+                _record_response(state, stage, result)
+                replay_text(result, stage, listener)
+                return decoded
+
+        # LLM 클라이언트 (프로세스 공유 풀에서 재사용)
+        llm = get_llm_client(
+            model,
+            temperature=LLM_TEMPERATURE,
+            base_url=state.get("base_url")
         )
+        if schema:
+            return _call_structured(state, llm, system_prompt, user_prompt, stage, schema, cache_key, model)
 
         # 메시지 구성
         messages = [
@@ -87,44 +174,363 @@ def call_llm(state: AgentState, system_prompt: str, user_prompt: str, stage: int
             HumanMessage(content=user_prompt)
         ]
 
-        # 프롬프트 저장
-        if stage == 1:
-            state["system_prompt_1"] = system_prompt
-            state["user_prompt_1"] = user_prompt
-        elif stage == 2:
-            state["system_prompt_2"] = system_prompt
-            state["user_prompt_2"] = user_prompt
-        elif stage == 3:
-            state["system_prompt_3"] = system_prompt
-            state["user_prompt_3"] = user_prompt
-
-        # 디버그 출력
-        print(f"\n=== {stage}단계: 프롬프트 ===")
-        print("\n[System Prompt]:")
-        print(system_prompt)
-        print("\n[User Prompt]:")
-        print(user_prompt)
-
-        # LLM 호출
-        result = llm.invoke(messages).content
+        # LLM 호출 (전역 요청 제한기 적용, 단계별 제한 시간/헤징/일시적 오류 재시도는 설정 시에만)
+        if listener is not None:
+            invoke_fn = lambda: stream_llm(llm, messages, stage, model, listener)
+        else:
+            invoke_fn = lambda: llm.invoke(messages)
+        response, seconds = _invoke_llm(
+            invoke_fn, stage, model, estimate_request_tokens(system_prompt, user_prompt)
+        )
+        record_llm_usage(stage, response, seconds, model)
+        result = response.content
         
         # 응답 저장
-        if stage == 1:
-            state["llm_response_1"] = result
-        elif stage == 2:
-            state["llm_response_2"] = result
-        elif stage == 3:
-            state["llm_response_3"] = result
-            
-        print(f"\n=== {stage}단계: LLM 응답 ===")
-        print(result)
+        _record_response(state, stage, result)
+        store_cached_response(cache_key, result, model)
         
         return result
     
+    except (json.JSONDecodeError, ValueError):
+        # 구조화 응답 검증 실패는 run_llm_stage에서 캐시 무효화/재시도하도록 그대로 전달
+        raise
     except Exception as e:
         st.error(f"LLM 호출 중 오류가 발생했습니다: {str(e)}")
         return ""
 
+# 헬퍼 함수: LLM 비동기 호출
+async def acall_llm(state: AgentState, system_prompt: str, user_prompt: str, stage: int = 1, schema=None, model: str = None, on_item=None):
+    """call_llm의 비동기 버전 (ainvoke/astream 사용, 전역 요청 제한기 공유)"""
+    try:
+        model = model or state.get("model", "gpt-4o")
+        listener = combine_listeners(on_item, get_stream_listener()) if streaming_enabled(stage) and not schema else None
+        _record_prompts(state, stage, system_prompt, user_prompt)
+
+        # 캐시 조회는 SQLite 파일 I/O이므로 스레드에서 실행
+        cache_key, result = await asyncio.to_thread(
+            lookup_cached_response, model, LLM_TEMPERATURE, system_prompt, user_prompt
+        )
+        if result is not None:
+            decoded = decode_cached_result(schema, result) if schema else result
+            if decoded is not None:
+                print(f"\n[LLM 캐시] {stage}단계 응답 캐시 적중")
+                _record_response(state, stage, result)
+                replay_text(result, stage, listener)
+                return decoded
+
+        llm = get_llm_client(
+            model,
+            temperature=LLM_TEMPERATURE,
+            base_url=state.get("base_url")
+        )
+        if schema:
+            return await _acall_structured(state, llm, system_prompt, user_prompt, stage, schema, cache_key, model)
+        messages = [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=user_prompt)
+        ]
+
+        if listener is not None:
+            ainvoke_fn = lambda: astream_llm(llm, messages, stage, model, listener)
+        else:
+            ainvoke_fn = lambda: llm.ainvoke(messages)
+        response, seconds = await _ainvoke_llm(
+            ainvoke_fn, stage, model, estimate_request_tokens(system_prompt, user_prompt)
+        )
+        record_llm_usage(stage, response, seconds, model)
+        result = response.content
+
+        _record_response(state, stage, result)
+        await asyncio.to_thread(store_cached_response, cache_key, result, model)
+        return result
+
+    except (json.JSONDecodeError, ValueError):
+        raise
+    except Exception as e:
+        st.error(f"LLM 호출 중 오류가 발생했습니다: {str(e)}")
+        return ""
+
+# 헬퍼 함수: 요청 제한기 → 단계 제한 시간/헤징 순으로 LLM 호출하고, 일시적 오류(429/5xx)는 시도 단위로 재시도
+def _invoke_llm(invoke_fn, stage: int, model: str, request_tokens: int):
+    """(응답, 소요 시간) 반환 (재시도 대기 중에는 요청 제한기 자리를 잡지 않음)"""
+    def attempt():
+        with get_llm_limiter().limit(request_tokens):
+            started = time.perf_counter()
+            response = invoke_with_deadline(invoke_fn, stage, model)
+            return response, time.perf_counter() - started
+    return call_with_retry(attempt, f"{stage}단계 ({model})")
+
+async def _ainvoke_llm(ainvoke_fn, stage: int, model: str, request_tokens: int):
+    """_invoke_llm의 비동기 버전"""
+    async def attempt():
+        async with get_llm_limiter().alimit(request_tokens):
+            started = time.perf_counter()
+            response = await ainvoke_with_deadline(ainvoke_fn, stage, model)
+            return response, time.perf_counter() - started
+    return await acall_with_retry(attempt, f"{stage}단계 ({model})")
+
+# 헬퍼 함수: 구조화 출력 호출 (JSON schema로 응답 형식을 강제하고 pydantic 모델로 바로 디코딩)
+def _structured_llm(llm, schema):
+    # include_raw: 원본 응답(AIMessage)의 토큰 사용량도 함께 받음
+    return llm.with_structured_output(
+        schema,
+        method=STRUCTURED_OUTPUT_SETTINGS.get("method", "json_schema"),
+        strict=STRUCTURED_OUTPUT_SETTINGS.get("strict", True),
+        include_raw=True
+    )
+
+def _store_structured_result(state: AgentState, stage: int, output: dict, seconds: float, cache_key, model: str) -> dict:
+    """구조화 응답을 dict로 변환하고 JSON 문자열로 저장/캐시 (스키마 검증 실패 시 ValueError)"""
+    record_llm_usage(stage, output.get("raw"), seconds, model)
+    parsed = output.get("parsed")
+    if parsed is None:
+        raise ValueError(f"구조화 응답 검증 실패: {output.get('parsing_error')}")
+    result = parsed.model_dump()
+    result_text = json.dumps(result, ensure_ascii=False)
+    _record_response(state, stage, result_text)
+    store_cached_response(cache_key, result_text, model)
+    return result
+
+def _call_structured(state: AgentState, llm, system_prompt: str, user_prompt: str, stage: int, schema, cache_key, model: str) -> dict:
+    messages = [
+        SystemMessage(content=system_prompt),
+        HumanMessage(content=user_prompt)
+    ]
+    output, seconds = _invoke_llm(
+        lambda: _structured_llm(llm, schema).invoke(messages), stage, model,
+        estimate_request_tokens(system_prompt, user_prompt)
+    )
+    return _store_structured_result(state, stage, output, seconds, cache_key, model)
+
+async def _acall_structured(state: AgentState, llm, system_prompt: str, user_prompt: str, stage: int, schema, cache_key, model: str) -> dict:
+    messages = [
+        SystemMessage(content=system_prompt),
+        HumanMessage(content=user_prompt)
+    ]
+    output, seconds = await _ainvoke_llm(
+        lambda: _structured_llm(llm, schema).ainvoke(messages), stage, model,
+        estimate_request_tokens(system_prompt, user_prompt)
+    )
+    return await asyncio.to_thread(_store_structured_result, state, stage, output, seconds, cache_key, model)
+
+def decode_stage_result(result) -> dict:
+    """LLM 단계 결과를 dict로 변환 (구조화 출력 결과는 그대로, 문자열은 JSON 파싱)"""
+    if isinstance(result, dict):
+        return result
+    return parse_json_response(result)
+
+def _invalidate_stage_cache(state: AgentState, ctx: dict, model: str = None):
+    """파싱에 실패한 응답을 캐시에서 삭제 (재시도 시 같은 응답이 반환되지 않도록)"""
+    invalidate_cached_response(make_cache_key(
+        model or state.get("model", "gpt-4o"), LLM_TEMPERATURE, ctx["system_prompt"], ctx["user_prompt"]
+    ))
+
+# 헬퍼 함수: 단계별 모델 (STAGE_MODEL_SETTINGS)
+def get_stage_model(state: AgentState, stage: int) -> str:
+    """단계별 모델 설정이 켜져 있으면 해당 단계 모델, 아니면 기본 모델 반환"""
+    default_model = state.get("model", "gpt-4o")
+    if not STAGE_MODEL_SETTINGS.get("enabled", False):
+        return default_model
+    return STAGE_MODEL_SETTINGS["stages"].get(stage) or default_model
+
+def _escalation_model(state: AgentState, model: str, reason: str):
+    """저가 모델 응답 실패 시 재요청할 기본 모델 (에스컬레이션 대상이 아니면 None)"""
+    default_model = state.get("model", "gpt-4o")
+    if not STAGE_MODEL_SETTINGS.get("enabled", False) or model == default_model:
+        return None
+    if not STAGE_MODEL_SETTINGS["escalation"].get(reason, False):
+        return None
+    return default_model
+
+# 헬퍼 함수: 단계 생략 (STAGE_SHORT_CIRCUIT_SETTINGS)
+def short_circuit_enabled(rule: str) -> bool:
+    """단계 생략 규칙 사용 여부"""
+    return STAGE_SHORT_CIRCUIT_SETTINGS.get("enabled", False) and STAGE_SHORT_CIRCUIT_SETTINGS.get(rule, True)
+
+def skip_stage(state: AgentState, stage: int, reason: str):
+    """LLM 호출 없이 단계를 건너뛴 사유를 state와 로그에 기록"""
+    state.setdefault("skipped_stages", []).append({"stage": stage, "reason": reason})
+    note = f"(단계 생략: {reason})"
+    state[f"user_prompt_{stage}"] = note
+    state[f"llm_response_{stage}"] = note
+    print(f"[단계 생략] {get_state_company(state)} {stage}단계: {reason}")
+
+# 헬퍼 함수: 6단계 증분 재평가 (RELAXED_REEVALUATION_SETTINGS)
+def attach_first_pass(relaxed_state: AgentState, first_state: AgentState) -> AgentState:
+    """완화된 기준 재평가 state에 1차 결과(유지 판단, 그룹)를 연결 (증분 재평가가 꺼져 있거나 단일 호출 모드면 그대로 반환)"""
+    if not RELAXED_REEVALUATION_SETTINGS.get("incremental", False) or SINGLE_PASS_SETTINGS.get("enabled", False):
+        return relaxed_state
+    relaxed_state["first_pass"] = {
+        "indices": [news.get("original_index") for news in first_state.get("news_data", [])],
+        "retained": [dict(item) for item in first_state.get("retained_news", [])],
+        "groups": [dict(group, indices=list(group.get("indices", []))) for group in first_state.get("grouped_news", [])]
+    }
+    return relaxed_state
+
+def split_first_pass_news(state: AgentState, news_data: list):
+    """증분 재평가: (1차 유지 판단 재사용 결과, 다시 판단할 기사 목록) 반환 - 새 언론사 기사와 1차 제외/보류 기사만 재판단"""
+    decided = {"excluded": [], "borderline": [], "retained": []}
+    first_pass = state.get("first_pass")
+    if not first_pass:
+        return decided, news_data
+    retained_by_index = {item["index"]: item for item in first_pass["retained"]}
+    decided["retained"] = [
+        dict(retained_by_index[news["original_index"]]) for news in news_data
+        if news.get("original_index") in retained_by_index
+    ]
+    delta = [news for news in news_data if news.get("original_index") not in retained_by_index]
+    first_indices = set(first_pass["indices"])
+    new_count = sum(1 for news in delta if news.get("original_index") not in first_indices)
+    print(f"\n[증분 재평가] 1차 유지 {len(decided['retained'])}개 재사용, 재판단 {len(delta)}개 "
+          f"(새 언론사 기사 {new_count}개, 1차 제외/보류 {len(delta) - new_count}개)")
+    return decided, delta
+
+def split_reusable_groups(state: AgentState, target_news: list):
+    """증분 재평가: (재사용할 1차 그룹, LLM 그룹핑 대상) 반환 - 그룹핑 대상은 새 기사 + 재사용 그룹의 대표 기사"""
+    first_pass = state.get("first_pass")
+    if not first_pass:
+        return [], target_news
+    target_indices = {news["current_index"] for news in target_news}
+    reused_groups = [
+        dict(group, indices=list(group["indices"])) for group in first_pass["groups"]
+        if group.get("indices") and set(group["indices"]) <= target_indices
+    ]
+    if not reused_groups:
+        return [], target_news
+    members = {index for group in reused_groups for index in group["indices"]}
+    anchors = {group["selected_index"] for group in reused_groups}
+    new_news = [news for news in target_news if news["current_index"] not in members]
+    print(f"[증분 재평가] 1차 그룹 {len(reused_groups)}개 재사용, 새 그룹핑 대상 {len(new_news)}개")
+    if not new_news:
+        return reused_groups, []
+    return reused_groups, [news for news in target_news if news["current_index"] in anchors] + new_news
+
+def merge_reused_groups(groups: list, reused_groups: list, news_by_index: dict, duplicate_handling: str = "") -> list:
+    """재사용 그룹의 대표 기사와 같은 그룹으로 묶인 기사/재사용 그룹을 하나로 합치고 대표 기사를 다시 선택 (나머지 그룹은 그대로)"""
+    if not reused_groups:
+        return groups
+    by_anchor = {group["selected_index"]: group for group in reused_groups}
+    owner = {}  # 재사용 그룹 대표 인덱스 → 합쳐진 그룹
+    merged_groups = []
+    new_groups = []
+    for group in groups:
+        anchors = [index for index in group["indices"] if index in by_anchor]
+        others = [index for index in group["indices"] if index not in by_anchor]
+        if not anchors:
+            if others:
+                new_groups.append(group)
+            continue
+        if len(anchors) == 1 and not others and anchors[0] not in owner:
+            continue  # 대표 기사만 단독으로 묶임: 재사용 그룹 그대로 유지
+        # LLM이 같은 사안으로 묶은 재사용 그룹은 모두 한 그룹으로 합침 (이미 합쳐진 그룹이 있으면 그 그룹에 흡수)
+        targets = list({id(owner[anchor]): owner[anchor] for anchor in anchors if anchor in owner}.values())
+        merged = targets[0] if targets else {"indices": []}
+        if not targets:
+            merged_groups.append(merged)
+        for target in targets[1:]:
+            merged["indices"].extend(target["indices"])
+            merged_groups.remove(target)
+        for anchor in anchors:
+            if anchor not in owner:
+                merged["indices"].extend(by_anchor[anchor]["indices"])
+        merged["indices"].extend(others)
+        merged["indices"] = list(dict.fromkeys(merged["indices"]))
+        for anchor in by_anchor:
+            if anchor in merged["indices"]:
+                owner[anchor] = merged
+    # 구성원이 바뀐 그룹은 1차 대표 기사를 그대로 쓰지 않고 다시 선택
+    assign_representatives(merged_groups, news_by_index, duplicate_handling)
+    unchanged_groups = [group for anchor, group in by_anchor.items() if anchor not in owner]
+    return unchanged_groups + merged_groups + new_groups
+
+# 헬퍼 함수: 스트리밍 중 2단계 사전 준비 (LLM_STREAMING_SETTINGS)
+def make_grouping_prefetch(state: AgentState, news_list: list):
+    """1단계 응답에서 유지/보류 항목이 완성되는 즉시 기사를 조회하고 로컬 그룹핑용 제목 특징을 미리 계산하는 수신기"""
+    news_by_index = {news.get("original_index"): news for news in news_list}
+    warm_features = get_grouping_mode() != "llm"
+    keywords = state.get("keyword", [])
+    keywords = (keywords,) if isinstance(keywords, str) else tuple(keywords)
+
+    def on_item(stage, field, item):
+        if stage != 1 or field not in ("retained", "borderline"):
+            return
+        index = item.get("index") if isinstance(item, dict) else item
+        news = news_by_index.get(index)
+        if news is None:
+            return
+        news["current_index"] = index
+        if warm_features:
+            title_features(news.get("content", ""), keywords)
+    return on_item
+
+# 헬퍼 함수: LLM 단계 실행 (호출 → 응답 반영, 파싱 실패 시 재시도)
+def run_llm_stage(state: AgentState, ctx: dict, apply_fn, max_retries: int = 1, error_label: str = "LLM 응답 파싱") -> bool:
+    """prepare_* 함수가 만든 ctx로 LLM을 호출하고 apply_fn으로 결과를 반영하는 함수 (성공 여부 반환)"""
+    schema = ctx.get("schema")
+    if schema:
+        # 구조화 출력은 스키마 검증을 통과한 응답만 반환하므로 파싱 재시도 불필요
+        max_retries = 1
+    model = ctx.get("model") or get_stage_model(state, ctx["stage"])
+    # 실제로 응답한 모델을 ctx에 기록 (반영 함수의 판단 캐시/로그에 사용)
+    ctx["model"] = model
+    attempt = 0
+    while True:
+        try:
+            result = call_llm(state, ctx["system_prompt"], ctx["user_prompt"], stage=ctx["stage"], schema=schema, model=model,
+                              on_item=ctx.get("on_stream_item"))
+            if not result:
+                # API 오류(빈 응답)도 파싱 실패와 같이 재시도/에스컬레이션
+                raise ValueError("LLM 응답이 비어 있습니다.")
+            apply_fn(state, ctx, result)
+            return True
+        except (json.JSONDecodeError, ValueError) as e:
+            print(f"\n파싱 시도 {attempt + 1} 실패 ({model}): {str(e)}")
+            _invalidate_stage_cache(state, ctx, model)
+            # 저가 모델 응답이 검증에 실패하면 재시도 대신 기본 모델로 재요청
+            escalation_model = _escalation_model(state, model, "on_failure")
+            if escalation_model:
+                print(f"[모델 에스컬레이션] {ctx['stage']}단계: {model} → {escalation_model}")
+                model = escalation_model
+                ctx["model"] = model
+                continue
+            attempt += 1
+            if attempt >= max_retries:  # 마지막 시도에서도 실패
+                st.error(f"{error_label} 중 오류가 발생했습니다: {str(e)}")
+                return False
+            # 다음 시도를 위해 잠시 대기 (재시도 제어 사용 시 지수 백오프 + 지터)
+            time.sleep(parse_retry_delay(attempt - 1))
+
+async def arun_llm_stage(state: AgentState, ctx: dict, apply_fn, max_retries: int = 1, error_label: str = "LLM 응답 파싱") -> bool:
+    """run_llm_stage의 비동기 버전"""
+    schema = ctx.get("schema")
+    if schema:
+        max_retries = 1
+    model = ctx.get("model") or get_stage_model(state, ctx["stage"])
+    ctx["model"] = model
+    attempt = 0
+    while True:
+        try:
+            result = await acall_llm(state, ctx["system_prompt"], ctx["user_prompt"], stage=ctx["stage"], schema=schema, model=model,
+                                     on_item=ctx.get("on_stream_item"))
+            if not result:
+                raise ValueError("LLM 응답이 비어 있습니다.")
+            apply_fn(state, ctx, result)
+            return True
+        except (json.JSONDecodeError, ValueError) as e:
+            print(f"\n파싱 시도 {attempt + 1} 실패 ({model}): {str(e)}")
+            _invalidate_stage_cache(state, ctx, model)
+            escalation_model = _escalation_model(state, model, "on_failure")
+            if escalation_model:
+                print(f"[모델 에스컬레이션] {ctx['stage']}단계: {model} → {escalation_model}")
+                model = escalation_model
+                ctx["model"] = model
+                continue
+            attempt += 1
+            if attempt >= max_retries:
+                st.error(f"{error_label} 중 오류가 발생했습니다: {str(e)}")
+                return False
+            await asyncio.sleep(parse_retry_delay(attempt - 1))
+
 # 헬퍼 함수: JSON 파싱
 def parse_json_response(response: str) -> dict:
     """LLM 응답에서 JSON을 추출하고 파싱하는 함수"""
@@ -164,6 +570,46 @@ def parse_json_response(response: str) -> dict:
         print(f"원본 응답: {response}")
         raise e
 
+# 뉴스 날짜 형식 (우선순위 순)
+NEWS_DATE_FORMATS = [
+    '%a, %d %b %Y %H:%M:%S %Z',      # GMT 형식: Mon, 01 Jan 2024 12:00:00 GMT
+    '%a, %d %b %Y %H:%M:%S GMT',     # GMT 형식 (명시적)
+    '%Y-%m-%d %H:%M:%S',             # YYYY-MM-DD HH:MM:SS
+    '%Y-%m-%d',                      # YYYY-MM-DD
+    '%Y년 %m월 %d일',                # 한국어 형식
+    '%m/%d/%Y',                      # MM/DD/YYYY
+    '%d/%m/%Y',                      # DD/MM/YYYY
+    '%Y.%m.%d',                      # YYYY.MM.DD
+    '%m.%d.%Y',                      # MM.DD.YYYY
+]
+
+# 헬퍼 함수: 뉴스 날짜 파싱
+def parse_news_date(news_date_str: str):
+    """뉴스 날짜 문자열을 KST 기준 datetime으로 변환하는 함수 (파싱 실패 시 None)"""
+    if not news_date_str:
+        return None
+
+    news_date = None
+    for date_format in NEWS_DATE_FORMATS:
+        try:
+            news_date = datetime.strptime(news_date_str, date_format)
+            break
+        except ValueError:
+            continue
+
+    if news_date is None:
+        return None
+
+    # 시간대 처리: GMT 시간을 한국 시간(KST)으로 변환
+    if 'GMT' in news_date_str or 'Z' in news_date_str:
+        # GMT 시간에 9시간 추가하여 KST로 변환
+        news_date = news_date + timedelta(hours=9)
+
+    # 파싱된 날짜에 KST 시간대 추가 (시간대가 없는 경우)
+    if news_date.tzinfo is None:
+        news_date = news_date.replace(tzinfo=KST)
+    return news_date
+
 # 뉴스 수집기 함수
 def collect_news(state: AgentState) -> AgentState:
     """뉴스를 수집하는 함수"""
@@ -234,27 +680,7 @@ def collect_news(state: AgentState) -> AgentState:
                         filtered_news.append(news_item)
                         continue
                     
-                    news_date = None
-                    
-                    # 다양한 날짜 형식 처리 (우선순위 순)
-                    date_formats = [
-                        '%a, %d %b %Y %H:%M:%S %Z',      # GMT 형식: Mon, 01 Jan 2024 12:00:00 GMT
-                        '%a, %d %b %Y %H:%M:%S GMT',     # GMT 형식 (명시적)
-                        '%Y-%m-%d %H:%M:%S',             # YYYY-MM-DD HH:MM:SS
-                        '%Y-%m-%d',                      # YYYY-MM-DD
-                        '%Y년 %m월 %d일',                # 한국어 형식
-                        '%m/%d/%Y',                      # MM/DD/YYYY
-                        '%d/%m/%Y',                      # DD/MM/YYYY
-                        '%Y.%m.%d',                      # YYYY.MM.DD
-                        '%m.%d.%Y',                      # MM.DD.YYYY
-                    ]
-                    
-                    for date_format in date_formats:
-                        try:
-                            news_date = datetime.strptime(news_date_str, date_format)
-                            break
-                        except ValueError:
-                            continue
+                    news_date = parse_news_date(news_date_str)
                     
                     if news_date is None:
                         date_parsing_stats["parse_failed"] += 1
@@ -265,21 +691,6 @@ def collect_news(state: AgentState) -> AgentState:
                     
                     date_parsing_stats["parse_success"] += 1
                     
-                    # GMT 시간대 변환 전 날짜 기록
-                    original_news_date = news_date
-                    
-                    # 시간대 처리: GMT 시간을 한국 시간(KST)으로 변환
-                    if 'GMT' in news_date_str or 'Z' in news_date_str:
-                        # GMT 시간에 9시간 추가하여 KST로 변환
-                        news_date = news_date + timedelta(hours=9)
-                        # 첫 몇 개 뉴스에 대해서만 변환 정보 출력
-                        if date_parsing_stats["parse_success"] <= 3:
-                            print(f"GMT→KST 변환: {original_news_date} → {news_date}")
-                    
-                    # 파싱된 날짜에 KST 시간대 추가 (시간대가 없는 경우)
-                    if news_date.tzinfo is None:
-                        news_date = news_date.replace(tzinfo=KST)
-                    
                     # 시간까지 고려한 정확한 범위 체크 (08:00 기준)
                     if start_datetime <= news_date <= end_datetime:
                         date_parsing_stats["in_range"] += 1
@@ -312,6 +723,8 @@ def collect_news(state: AgentState) -> AgentState:
         # 원래 인덱스 추가
         for i, news_item in enumerate(unique_news_data, 1):
             news_item['original_index'] = i
+        # 정리된 제목/정규화된 제목 저장 (이후 단계에서 재사용)
+        annotate_titles(unique_news_data)
         
         # 원본 뉴스 데이터 저장
         state["original_news_data"] = unique_news_data.copy()
@@ -329,15 +742,10 @@ def collect_news(state: AgentState) -> AgentState:
         print(f"뉴스 수집 중 오류 발생: {e}")
         return state
 
-def filter_valid_press(state: AgentState) -> AgentState:
-    """유효 언론사 필터링"""
-    news_data = state.get("news_data", [])
-    
-    # UI에서 설정한 유효 언론사 목록 가져오기
-    valid_press_dict_str = state.get("valid_press_dict", "")
-    
-    # UI 설정 값이 문자열이면 딕셔너리로 파싱
+def parse_valid_press_config(valid_press_dict_str) -> dict:
+    """UI/상태에서 전달된 유효 언론사 설정을 딕셔너리로 변환하는 함수 (비어있으면 기본값 사용)"""
     valid_press_config = {}
+    # UI 설정 값이 문자열이면 딕셔너리로 파싱
     if isinstance(valid_press_dict_str, str) and valid_press_dict_str.strip():
         #print("\n[DEBUG] UI에서 설정한 언론사 문자열 파싱 시작")
         try:
@@ -365,28 +773,61 @@ def filter_valid_press(state: AgentState) -> AgentState:
     if not valid_press_config:
         #print("\n[DEBUG] 유효한 설정을 찾을 수 없어 기본값 사용")
         valid_press_config = TRUSTED_PRESS_ALIASES
+    return valid_press_config
+
+def normalize_excluded_press_aliases(excluded_press_aliases: dict) -> list:
+    """제외 언론사 별칭을 정규화된 리스트로 변환 (URL 부분 일치 허용)"""
+    normalized_excluded_aliases = []
+    for aliases in excluded_press_aliases.values():
+        for alias in aliases:
+            normalized_excluded_aliases.append(normalize_string(alias))
+    return normalized_excluded_aliases
+
+def match_valid_press(press: str, valid_press_config: dict, verbose: bool = True):
+    """정규화된 언론사명을 유효 언론사 목록과 매칭하여 (언론사, 매칭된 별칭)을 반환 (실패 시 (None, None))"""
+    for main_press, aliases in valid_press_config.items():
+        # 별칭들도 정규화
+        normalized_aliases = [normalize_string(alias) for alias in aliases]
+        
+        # 언론사명 매칭 검사 - 완전 일치 우선, 그 다음 포함 관계 확인
+        for alias in normalized_aliases:
+            # 완전 일치 우선
+            if press == alias:
+                if verbose:
+                    print(f"✓ 언론사명 완전 매칭 성공: '{press}' == '{alias}' (언론사: {main_press})")
+                return main_press, alias
+            # 길이가 3자 이상일 때만 포함 관계 확인 (짧은 별칭으로 인한 오매칭 방지)
+            elif len(alias) >= 3 and len(press) >= 3:
+                if press in alias or alias in press:
+                    if verbose:
+                        print(f"✓ 언론사명 포함 매칭 성공: '{press}' 매칭됨 '{alias}' (언론사: {main_press})")
+                    return main_press, alias
+    return None, None
+
+def is_excluded_press(press: str, url: str, normalized_excluded_aliases: list) -> bool:
+    """정규화된 언론사명/URL이 제외 언론사 별칭과 매칭되는지 확인"""
+    for ex_alias in normalized_excluded_aliases:
+        if len(ex_alias) >= 3 and (ex_alias in press or ex_alias in url):
+            return True
+    return False
+
+def filter_valid_press(state: AgentState) -> AgentState:
+    """유효 언론사 필터링"""
+    news_data = state.get("news_data", [])
+    
+    # UI에서 설정한 유효 언론사 목록 가져오기
+    valid_press_config = parse_valid_press_config(state.get("valid_press_dict", ""))
     
     print(f"\n전체 수집된 뉴스 수: {len(news_data)}")
     
     # 카테고리별 제외 언론사 별칭 가져오기 (선택적으로 전달됨)
     excluded_press_aliases = state.get("excluded_press_aliases", {})
     # 정규화된 제외 별칭 리스트 미리 구성 (URL 부분 일치 허용)
-    normalized_excluded_aliases = []
-    for aliases in excluded_press_aliases.values():
-        for alias in aliases:
-            normalized_excluded_aliases.append(re.sub(r'\s+', ' ', alias.lower().strip()))
+    normalized_excluded_aliases = normalize_excluded_press_aliases(excluded_press_aliases)
     print(f"\n=== 유효 언론사 설정 ===")
     for press, aliases in valid_press_config.items():
         print(f"- {press}: {aliases}")
     
-    # 문자열 정규화 함수
-    def normalize_string(s):
-        """문자열을 정규화하여 비교하기 쉽게 만듭니다."""
-        if not s:
-            return ""
-        # 소문자로 변환, 선행/후행 공백 제거, 연속된 공백을 하나로 변환
-        return re.sub(r'\s+', ' ', s.lower().strip())
-    
     # 유효 언론사 뉴스 필터링 함수
     def filter_news(news_list):
         valid_news = []
@@ -405,44 +846,12 @@ def filter_valid_press(state: AgentState) -> AgentState:
             #print(f"URL: {original_url}")
             
             # 언론사명이 신뢰할 수 있는 언론사 목록에 포함되는지 확인
-            is_valid = False
-            matched_press = None
-            matched_alias = None
-            
-            for main_press, aliases in valid_press_config.items():
-                # 별칭들도 정규화
-                normalized_aliases = [normalize_string(alias) for alias in aliases]
-                
-                # 언론사명 매칭 검사 - 완전 일치 우선, 그 다음 포함 관계 확인
-                for alias in normalized_aliases:
-                    # 완전 일치 우선
-                    if press == alias:
-                        matched_press = main_press
-                        matched_alias = alias
-                        print(f"✓ 언론사명 완전 매칭 성공: '{press}' == '{alias}' (언론사: {main_press})")
-                        is_valid = True
-                        break
-                    # 길이가 3자 이상일 때만 포함 관계 확인 (짧은 별칭으로 인한 오매칭 방지)
-                    elif len(alias) >= 3 and len(press) >= 3:
-                        if press in alias or alias in press:
-                            matched_press = main_press
-                            matched_alias = alias
-                            print(f"✓ 언론사명 포함 매칭 성공: '{press}' 매칭됨 '{alias}' (언론사: {main_press})")
-                            is_valid = True
-                            break
-                
-                if is_valid:
-                    break
+            matched_press, matched_alias = match_valid_press(press, valid_press_config)
             
             # Financial 카테고리 등에서 제외해야 하는 언론사면 제거
-            if is_valid:
+            if matched_press:
                 # 제외 목록과 매칭되는지 확인 (press와 url에 대한 부분 일치 포함)
-                is_excluded_press = False
-                for ex_alias in normalized_excluded_aliases:
-                    if len(ex_alias) >= 3 and (ex_alias in press or ex_alias in url):
-                        is_excluded_press = True
-                        break
-                if is_excluded_press:
+                if is_excluded_press(press, url, normalized_excluded_aliases):
                     print(f"✗ 제외 언론사 매칭되어 제거: press='{original_press}', url='{original_url}'")
                     continue
                 #print(f"✅ 결과: 유효한 언론사 '{matched_press}'로 인식됨 (매칭된 별칭: '{matched_alias}')")
@@ -546,106 +955,594 @@ def filter_excluded_keywords(state: AgentState) -> AgentState:
     
     return state
 
+# 키워드 매칭용 정규식 생성 (영문 키워드는 다른 영단어 일부로 매칭되지 않도록 경계 적용)
+@lru_cache(maxsize=None)
+def _compile_keyword_pattern(keywords: tuple):
+    parts = []
+    for keyword in sorted(set(keywords), key=len, reverse=True):
+        escaped = re.escape(keyword)
+        if re.fullmatch(r"[A-Za-z0-9&\s]+", keyword):
+            escaped = rf"(?<![A-Za-z]){escaped}(?![A-Za-z])"
+        parts.append(escaped)
+    return re.compile("|".join(parts)) if parts else None
+
+@lru_cache(maxsize=None)
+def _get_other_company_keywords(own_keywords: tuple, keyword_map_items: tuple) -> tuple:
+    """다른 회사 키워드 목록 (자사 키워드와 포함 관계인 키워드는 제외)"""
+    others = set()
+    for _, keywords in keyword_map_items:
+        for keyword in keywords:
+            if any(keyword in own or own in keyword for own in own_keywords):
+                continue
+            others.add(keyword)
+    return tuple(others)
+
+def calculate_relevance_score(title: str, own_keywords: tuple, other_keywords: tuple, weights: dict) -> dict:
+    """제목 기준 회사 언급 연관성 점수를 계산하는 함수"""
+    own_pattern = _compile_keyword_pattern(own_keywords)
+    matches = list(own_pattern.finditer(title)) if own_pattern else []
+    if not matches:
+        return {"score": 0.0, "hit_count": 0, "first_position": None, "matched_keywords": [], "other_company_lead": None}
+
+    first_position = matches[0].start()
+    matched_keywords = list(dict.fromkeys(m.group(0) for m in matches))
+
+    score = weights["title_hit"]
+    score += weights["position"] * (1 - first_position / max(len(title), 1))
+    score += weights["hit_count"] * min(len(matches) - 1, 2) / 2
+    score += weights["main_name"] * (1.0 if own_keywords[0] in matched_keywords else 0.5)
+
+    # 다른 회사명이 자사 키워드보다 앞에 오는 경우 감점 (다른 회사가 주체인 기사)
+    other_company_lead = None
+    other_pattern = _compile_keyword_pattern(other_keywords)
+    if other_pattern:
+        other_match = other_pattern.search(title[:first_position])
+        if other_match:
+            other_company_lead = other_match.group(0)
+            score += weights["other_company_lead"]
+
+    return {
+        "score": round(min(max(score, 0.0), 1.0), 3),
+        "hit_count": len(matches),
+        "first_position": first_position,
+        "matched_keywords": matched_keywords,
+        "other_company_lead": other_company_lead
+    }
+
+# 2.7단계: 회사 언급 연관성 점수 기반 사전 필터
+def score_company_relevance(state: AgentState) -> AgentState:
+    """COMPANY_KEYWORD_MAP 기준으로 기사별 연관성 점수를 매기고 기준 미만 기사를 제거/후순위 처리하는 함수"""
+    settings = {**RELEVANCE_FILTER_SETTINGS, **state.get("relevance_filter_settings", {})}
+    if not settings.get("enabled", False):
+        return state
+
+    news_data = state.get("news_data", [])
+    if not news_data:
+        return state
+
+    keywords = state.get("keyword", [])
+    if isinstance(keywords, str):
+        keywords = [keywords]
+    company = state.get("company")
+    keyword_map = state.get("company_keyword_map", COMPANY_KEYWORD_MAP)
+    # 회사명과 키워드 목록을 합쳐 자사 키워드로 사용 (대표명이 첫 번째)
+    own_keywords = tuple(dict.fromkeys(([company] if company and company in keyword_map else []) + list(keywords)))
+    if not own_keywords:
+        return state
+    other_keywords = _get_other_company_keywords(
+        own_keywords, tuple((name, tuple(kws)) for name, kws in keyword_map.items())
+    )
+
+    print("\n=== 회사 언급 연관성 사전 필터 ===")
+    print(f"필터링 전 뉴스 수: {len(news_data)}")
+    print(f"모드: {settings['mode']}, 기준값: {settings['cutoff']}")
+
+    for news in news_data:
+        title = news.get("clean_title") or clean_title(news.get("content", ""))
+        relevance = calculate_relevance_score(title, own_keywords, other_keywords, settings["weights"])
+        news["relevance_score"] = relevance["score"]
+        news["relevance_detail"] = relevance
+
+    relevant_news = [news for news in news_data if news["relevance_score"] >= settings["cutoff"]]
+    low_relevance_news = [news for news in news_data if news["relevance_score"] < settings["cutoff"]]
+
+    if settings.get("sort_by_relevance", True):
+        relevant_news.sort(key=lambda news: news["relevance_score"], reverse=True)
+        low_relevance_news.sort(key=lambda news: news["relevance_score"], reverse=True)
+
+    if settings["mode"] == "drop":
+        filtered_news = relevant_news
+        print(f"연관성 낮아 제거된 뉴스 수: {len(low_relevance_news)}")
+        for news in low_relevance_news:
+            print(f"  - ({news['relevance_score']:.2f}) {news.get('content', '')}")
+    else:
+        for news in low_relevance_news:
+            news["low_relevance"] = True
+        filtered_news = relevant_news + low_relevance_news
+        print(f"연관성 낮아 후순위 처리된 뉴스 수: {len(low_relevance_news)}")
+
+    max_articles = settings.get("max_articles")
+    if max_articles and len(filtered_news) > max_articles:
+        # 후순위 처리 모드에서는 잘린 목록에 연관성 낮은 기사가 이미 포함되어 있으므로 중복 제외
+        dropped_news = filtered_news[max_articles:]
+        dropped_ids = {id(news) for news in dropped_news}
+        low_relevance_news = dropped_news + [news for news in low_relevance_news if id(news) not in dropped_ids]
+        filtered_news = filtered_news[:max_articles]
+        print(f"최대 기사 수 제한으로 상위 {max_articles}개만 유지")
+
+    print(f"필터링 후 뉴스 수: {len(filtered_news)}")
+
+    state["news_data"] = filtered_news
+    # 제거된 뉴스 정보도 저장 (디버깅용)
+    kept_ids = {id(news) for news in filtered_news}
+    state["low_relevance_news"] = [news for news in low_relevance_news if id(news) not in kept_ids]
+    return state
+
 # 1단계: 뉴스 제외 판단
-def filter_excluded_news(state: AgentState) -> AgentState:
-    """뉴스를 제외/보류/유지로 분류하는 함수"""
-    try:
-        # 시스템 프롬프트 설정
-        system_prompt = state.get("system_prompt_1", "당신은 회계법인의 뉴스 분석 전문가입니다. 뉴스의 중요성을 판단하여 제외/보류/유지로 분류하는 작업을 수행합니다. 특히 회계법인의 관점에서 중요하지 않은 뉴스(예: 단순 홍보, CSR 활동, 이벤트 등)를 식별하고, 회계 감리나 재무 관련 이슈는 반드시 유지하도록 합니다.")
-        
-        # 뉴스 데이터 준비
-        news_data = state.get("news_data", [])
-        if not news_data:
-            st.error("분석할 뉴스가 없습니다.")
-            return state
-            
-        # 뉴스 목록 문자열 생성 - 원래 인덱스 사용
-        news_list = ""
-        for news in news_data:
-            press = news.get('press', '알 수 없음')
-            original_index = news.get('original_index')
-            news_list += f"{original_index}. {news['content']} ({press})\n"
-            
-        # 제외 판단 프롬프트
-        exclusion_prompt = f"""아래 뉴스 목록을 회계법인의 관점에서 분석하여 제외/보류/유지로 분류해주세요.
-각 뉴스의 번호는 고유 식별자이므로 변경하지 말고 그대로 응답에 사용해주세요.
+def _format_exclusion_line(news: dict) -> str:
+    """1단계 뉴스 목록 한 줄 (원래 인덱스 사용)"""
+    press = news.get('press', '알 수 없음')
+    return f"{news.get('original_index')}. {news['content']} ({press})\n"
 
-[뉴스 목록]
-{news_list}
+def compose_stage_prompt(instruction: str, news_block: str, static_blocks: list, company_criteria: str = "") -> str:
+    """
+    단계 프롬프트 조립 함수
 
-[제외 기준]
-{state.get("exclusion_criteria", "")}
+    기본 레이아웃: 지시문 → 뉴스 목록 → 기준/요구사항/형식 (→ 회사별 기준, 분리된 경우만)
+    prefix 캐시 레이아웃: 지시문 → 기준/요구사항/형식 → 회사별 기준 → 뉴스 목록
+    (같은 카테고리의 회사들이 바이트 단위로 같은 prefix를 공유하도록 변하는 부분을 맨 뒤에 배치)
+    """
+    criteria_block = []
+    if company_criteria and company_criteria.strip():
+        criteria_block = [f"[분석 대상 기업 기준]\n{company_criteria.strip()}"]
+    if PROMPT_LAYOUT_SETTINGS.get("prefix_cache", False):
+        return "\n\n".join([instruction] + static_blocks + criteria_block + [news_block])
+    return "\n\n".join([instruction, news_block] + static_blocks + criteria_block)
 
-[응답 요구사항]
-1. 제외/보류/유지 사유는 간단명료하게 작성
-2. 각 카테고리별 최대 20개까지만 포함
-3. 응답은 완전한 JSON 형식이어야 함
+def is_terse_stage(stage: int) -> bool:
+    """간결 응답 모드 적용 단계 여부"""
+    return stage in TERSE_RESPONSE_SETTINGS.get("stages", [])
 
-다음과 같은 JSON 형식으로 응답해주세요:
-{{
+def _terse_reason_rule(target: str) -> str:
+    """간결 응답 모드의 사유 작성 규칙 문구"""
+    if not TERSE_RESPONSE_SETTINGS.get("include_reason", True):
+        return "사유는 작성하지 않음 (reasons는 빈 배열 [], reason은 빈 문자열)"
+    return f"{target} 사유는 {TERSE_RESPONSE_SETTINGS.get('max_reason_chars', 30)}자 이내로 작성"
+
+def build_exclusion_prompt(news_list: str, exclusion_criteria: str, chunked: bool = False, company_criteria: str = "", terse: bool = False) -> str:
+    """1단계 제외 판단 프롬프트 (분할 모드에서는 카테고리별 개수 제한 대신 전체 분류 요구)"""
+    if chunked:
+        count_requirement = "2. 목록의 모든 뉴스를 빠짐없이 제외/보류/유지 중 하나에 포함"
+    else:
+        count_requirement = "2. 각 카테고리별 최대 20개까지만 포함"
+    instruction = """아래 뉴스 목록을 회계법인의 관점에서 분석하여 제외/보류/유지로 분류해주세요.
+각 뉴스의 번호는 고유 식별자이므로 변경하지 말고 그대로 응답에 사용해주세요."""
+    if terse:
+        requirements = f"""[응답 요구사항]
+1. 제목은 응답하지 말고 뉴스 번호만 excluded/borderline/retained 목록에 포함
+{count_requirement}
+3. {_terse_reason_rule("제외/보류 뉴스의")} (유지 뉴스는 사유 생략)
+4. 응답은 완전한 JSON 형식이어야 함"""
+        response_format = """다음과 같은 JSON 형식으로 응답해주세요:
+{
+  "excluded": [1],
+  "borderline": [2],
+  "retained": [3, 4],
+  "reasons": [
+    {"index": 1, "reason": "제외 사유"},
+    {"index": 2, "reason": "보류 사유"}
+  ]
+}"""
+        return compose_stage_prompt(
+            instruction,
+            f"[뉴스 목록]\n{news_list}",
+            [f"[제외 기준]\n{exclusion_criteria}", requirements, response_format],
+            company_criteria
+        )
+    requirements = f"""[응답 요구사항]
+1. 제외/보류/유지 사유는 간단명료하게 작성
+{count_requirement}
+3. 응답은 완전한 JSON 형식이어야 함"""
+    response_format = """다음과 같은 JSON 형식으로 응답해주세요:
+{
   "excluded": [
-    {{
+    {
       "index": 1,
       "title": "뉴스 제목",
       "reason": "제외 사유"
-    }}
+    }
   ],
   "borderline": [
-    {{
+    {
       "index": 2,
       "title": "뉴스 제목",
       "reason": "보류 사유"
-    }}
+    }
   ],
   "retained": [
-    {{
+    {
       "index": 3,
       "title": "뉴스 제목",
       "reason": "유지 사유"
-    }}
+    }
   ]
-}}"""
+}"""
+    return compose_stage_prompt(
+        instruction,
+        f"[뉴스 목록]\n{news_list}",
+        [f"[제외 기준]\n{exclusion_criteria}", requirements, response_format],
+        company_criteria
+    )
+
+def split_by_token_budget(item_tokens: list, token_budget: int, max_items: int = 0) -> list:
+    """
+    항목별 토큰 수 목록을 예산 안에 들어가는 연속 구간으로 나누는 함수
+
+    Returns:
+        list: [(시작, 끝), ...] (항목 하나가 예산을 넘으면 단독 구간)
+    """
+    ranges = []
+    start = 0
+    used = 0
+    for i, tokens in enumerate(item_tokens):
+        over_budget = used + tokens > token_budget
+        over_count = max_items and i - start >= max_items
+        if i > start and (over_budget or over_count):
+            ranges.append((start, i))
+            start = i
+            used = 0
+        used += tokens
+    if start < len(item_tokens):
+        ranges.append((start, len(item_tokens)))
+    return ranges
+
+def prepare_exclusion(state: AgentState):
+    """1단계 프롬프트를 구성하는 함수 (LLM 호출이 필요 없으면 None 반환)"""
+    try:
+        # 시스템 프롬프트 설정
+        system_prompt = state.get("system_prompt_1", "당신은 회계법인의 뉴스 분석 전문가입니다. 뉴스의 중요성을 판단하여 제외/보류/유지로 분류하는 작업을 수행합니다. 특히 회계법인의 관점에서 중요하지 않은 뉴스(예: 단순 홍보, CSR 활동, 이벤트 등)를 식별하고, 회계 감리나 재무 관련 이슈는 반드시 유지하도록 합니다.")
+        
+        # 뉴스 데이터 준비
+        news_data = state.get("news_data", [])
+        if not news_data:
+            if short_circuit_enabled("empty_input"):
+                skip_stage(state, 1, "분석할 뉴스 없음")
+            else:
+                st.error("분석할 뉴스가 없습니다.")
+            return None
+
+        # 기사 단위 판단 캐시 (같은 회사/기준/모델로 이미 판단한 기사는 LLM에 보내지 않음)
+        company = get_state_company(state)
+        criteria_hash = exclusion_criteria_hash(
+            system_prompt, state.get("exclusion_criteria", "") + state.get("company_criteria_1", "")
+        )
+        # 증분 재평가: 1차 유지 기사는 재사용하고 나머지만 판단
+        first_pass_decided, news_data = split_first_pass_news(state, news_data)
+        cached_decided, uncached_news = split_cached_news(
+            news_data, company, criteria_hash, get_stage_model(state, 1)
+        )
+
+        # 로컬 분류기 (shadow: 예측만 비교, active: 신뢰도 높은 기사는 로컬에서 판단)
+        local_mode = LOCAL_CLASSIFIER_SETTINGS.get("mode", "off")
+        local_decided = {"excluded": [], "borderline": [], "retained": []}
+        local_predictions = {}
+        llm_news_data = uncached_news
+        if local_mode in ("shadow", "active") and uncached_news:
+            classifier = get_stage1_classifier()
+            if classifier is not None and not classifier_matches_criteria(
+                classifier, state.get("exclusion_criteria", ""), state.get("company_criteria_1", "")
+            ):
+                # 학습 때와 제외 기준이 다르면(완화된 기준 재평가 등) 모델 판단을 사용하지 않음
+                print("[로컬 분류기] 학습 기준과 제외 기준이 달라 로컬 분류기를 사용하지 않습니다.")
+                classifier = None
+            if classifier is not None:
+                decided, deferred, local_predictions = split_confident_news(
+                    uncached_news, company, classifier
+                )
+                if local_mode == "active":
+                    local_decided = decided
+                    llm_news_data = deferred
+                    local_count = len(uncached_news) - len(deferred)
+                    print(f"\n[로컬 분류기] {local_count}개 기사 로컬 판단, {len(deferred)}개 기사 LLM 판단")
+
+        # 1차 재사용/캐시 판단과 로컬 판단을 합쳐 LLM 판단 앞에 배치
+        for verdict in ("excluded", "borderline", "retained"):
+            local_decided[verdict] = first_pass_decided[verdict] + cached_decided[verdict] + local_decided[verdict]
+
+        # 모든 기사를 캐시/로컬에서 판단한 경우 LLM 호출 생략
+        if not llm_news_data:
+            state["excluded_news"] = local_decided["excluded"]
+            state["borderline_news"] = local_decided["borderline"]
+            state["retained_news"] = local_decided["retained"]
+            print("\n[분류 결과] (전체 캐시/로컬 판단)")
+            print(f"제외: {len(state['excluded_news'])}개")
+            print(f"보류: {len(state['borderline_news'])}개")
+            print(f"유지: {len(state['retained_news'])}개")
+            return None
+            
+        # 뉴스 목록 문자열 생성 - 원래 인덱스 사용
+        news_lines = [_format_exclusion_line(news) for news in llm_news_data]
+        exclusion_criteria = state.get("exclusion_criteria", "")
+        company_criteria = state.get("company_criteria_1", "")
+        terse = is_terse_stage(1)
+
+        # 토큰 예산 기반 분할 (분할 시 카테고리별 개수 제한 없이 모든 기사 분류)
+        chunks = None
+        chunked = STAGE1_CHUNK_SETTINGS.get("enabled", False)
+        if chunked:
+            base_tokens = estimate_tokens(system_prompt) + estimate_tokens(
+                build_exclusion_prompt("", exclusion_criteria, chunked=True, company_criteria=company_criteria, terse=terse)
+            )
+            chunk_ranges = split_by_token_budget(
+                [estimate_tokens(line) for line in news_lines],
+                STAGE1_CHUNK_SETTINGS["max_prompt_tokens"] - base_tokens,
+                STAGE1_CHUNK_SETTINGS["max_articles_per_chunk"]
+            )
+            if len(chunk_ranges) > 1:
+                chunks = [
+                    {
+                        "user_prompt": build_exclusion_prompt(
+                            "".join(news_lines[start:end]), exclusion_criteria, chunked=True,
+                            company_criteria=company_criteria, terse=terse
+                        ),
+                        "llm_news_data": llm_news_data[start:end]
+                    }
+                    for start, end in chunk_ranges
+                ]
+                print(f"\n[1단계 분할] {len(llm_news_data)}개 기사를 {len(chunks)}개 청크로 분할 "
+                      f"(청크별 기사 수: {[end - start for start, end in chunk_ranges]})")
+
+        # 제외 판단 프롬프트
+        exclusion_prompt = build_exclusion_prompt(
+            "".join(news_lines), exclusion_criteria, chunked=chunked, company_criteria=company_criteria, terse=terse
+        )
+
+        return {
+            "stage": 1,
+            "system_prompt": system_prompt,
+            "user_prompt": exclusion_prompt,
+            "schema": get_stage_schema(1, terse=terse),
+            "terse": terse,
+            "llm_news_data": llm_news_data,
+            "local_mode": local_mode,
+            "local_decided": local_decided,
+            "local_predictions": local_predictions,
+            "company": company,
+            "criteria_hash": criteria_hash,
+            "chunks": chunks,
+            "on_stream_item": make_grouping_prefetch(state, llm_news_data) if streaming_enabled(1) else None
+        }
+
+    except Exception as e:
+        st.error(f"뉴스 분류 중 오류가 발생했습니다: {str(e)}")
+        return None
+
+def _terse_reason_map(data: dict) -> dict:
+    return {item.get("index"): item.get("reason", "") for item in data.get("reasons", []) or [] if isinstance(item, dict)}
 
+def expand_terse_exclusion(data: dict, news_data: list) -> dict:
+    """간결 1단계 응답({"excluded": [번호], ...})을 기존 형식으로 복원 (제목은 기사 목록에서)"""
+    if not all(key in data for key in ["excluded", "borderline", "retained"]):
+        raise ValueError("필수 필드가 누락되었습니다.")
+    titles = {news.get("original_index"): news.get("content", "") for news in news_data}
+    reasons = _terse_reason_map(data)
+    return {
+        verdict: [
+            {"index": index, "title": titles.get(index, ""), "reason": reasons.get(index, "")}
+            for index in data.get(verdict, []) if isinstance(index, int)
+        ]
+        for verdict in ["excluded", "borderline", "retained"]
+    }
+
+def expand_terse_grouping(data: dict) -> dict:
+    """간결 2단계 응답({"groups": [[대표, ...], ...]})을 기존 형식으로 복원"""
+    groups = []
+    for indices in data.get("groups", []):
+        indices = [index for index in indices if isinstance(index, int)]
+        if indices:
+            groups.append({"indices": indices, "selected_index": indices[0], "reason": ""})
+    return {"groups": groups}
+
+def expand_terse_evaluation(data: dict, selected_news: list) -> dict:
+    """간결 3단계 응답을 기존 형식으로 복원 (제목은 기사 목록에서, 언론사/날짜는 이후 원본으로 채움)"""
+    if not all(key in data for key in ["final_selection", "not_selected"]):
+        raise ValueError("필수 필드가 누락되었습니다.")
+    titles = {news.get("list_index"): news.get("content", "") for news in selected_news}
+    reasons = _terse_reason_map(data)
+    final_selection = []
+    for item in data.get("final_selection", []):
+        final_selection.append({
+            "index": item.get("index"),
+            "title": titles.get(item.get("index"), ""),
+            "importance": item.get("importance", "중"),
+            "reason": item.get("reason", ""),
+            "keywords": item.get("keywords", []),
+            "affiliates": item.get("affiliates", [])
+        })
+    not_selected = [
+        {"index": index, "title": titles.get(index, ""), "importance": "하", "reason": reasons.get(index, "")}
+        for index in data.get("not_selected", []) if isinstance(index, int)
+    ]
+    return {"final_selection": final_selection, "not_selected": not_selected}
+
+def apply_exclusion(state: AgentState, ctx: dict, result: str):
+    """1단계 LLM 응답을 파싱하여 state에 반영하는 함수 (파싱 실패 시 예외 발생)"""
+    # JSON 파싱 (구조화 출력이면 검증된 dict 그대로 사용)
+    classification = decode_stage_result(result)
+    if ctx.get("terse"):
+        classification = expand_terse_exclusion(classification, ctx["llm_news_data"])
+    
+    # 필수 필드 확인
+    if not all(key in classification for key in ["excluded", "borderline", "retained"]):
+        raise ValueError("필수 필드가 누락되었습니다.")
+    
+    # 상태 업데이트 시 원래 인덱스 유지
+    for category in ["excluded", "borderline", "retained"]:
+        for item in classification.get(category, []):
+            original_index = item['index']
+            item['original_index'] = original_index
+    
+    # LLM 판단만 학습 로그로 기록 (로컬 판단은 기록하지 않음)
+    model = ctx.get("model") or get_stage_model(state, 1)
+    log_stage1_verdicts(state, ctx["llm_news_data"], classification, model)
+    store_verdicts(ctx["llm_news_data"], classification, ctx["company"], ctx["criteria_hash"], model)
+    if ctx["local_mode"] == "shadow" and ctx["local_predictions"]:
+        report_shadow_agreement(ctx["local_predictions"], classification)
+    
+    state["excluded_news"] = ctx["local_decided"]["excluded"] + classification.get("excluded", [])
+    state["borderline_news"] = ctx["local_decided"]["borderline"] + classification.get("borderline", [])
+    state["retained_news"] = ctx["local_decided"]["retained"] + classification.get("retained", [])
+    
+    print("\n[분류 결과]")
+    print(f"제외: {len(state['excluded_news'])}개")
+    print(f"보류: {len(state['borderline_news'])}개")
+    print(f"유지: {len(state['retained_news'])}개")
+
+def _chunk_state_and_context(state: AgentState, ctx: dict, chunk: dict):
+    """청크별 state 사본과 ctx (청크 결과는 사본에 기록 후 병합)"""
+    chunk_state = {**state, "excluded_news": [], "borderline_news": [], "retained_news": []}
+    chunk_ctx = {
+        **ctx,
+        "user_prompt": chunk["user_prompt"],
+        "llm_news_data": chunk["llm_news_data"],
+        "local_decided": {"excluded": [], "borderline": [], "retained": []},
+        "chunks": None
+    }
+    return chunk_state, chunk_ctx
+
+def _merge_exclusion_chunks(state: AgentState, ctx: dict, chunk_states: list):
+    """청크별 분류 결과를 캐시/로컬 판단과 합쳐 state에 반영하는 함수"""
+    for key, verdict in (("excluded_news", "excluded"), ("borderline_news", "borderline"), ("retained_news", "retained")):
+        merged = list(ctx["local_decided"][verdict])
+        for chunk_state in chunk_states:
+            merged.extend(chunk_state.get(key, []))
+        state[key] = merged
+    state["system_prompt_1"] = ctx["system_prompt"]
+    state["user_prompt_1"] = "\n\n".join(chunk_state.get("user_prompt_1", "") for chunk_state in chunk_states)
+    state["llm_response_1"] = "\n\n".join(chunk_state.get("llm_response_1", "") for chunk_state in chunk_states)
+
+    print(f"\n[분류 결과] ({len(chunk_states)}개 청크 병합)")
+    print(f"제외: {len(state['excluded_news'])}개")
+    print(f"보류: {len(state['borderline_news'])}개")
+    print(f"유지: {len(state['retained_news'])}개")
+
+def prepare_borderline_escalation(state: AgentState, ctx: dict):
+    """저가 모델이 보류로 판단한 기사만 기본 모델로 다시 판단하는 ctx (대상이 없으면 None)"""
+    model = get_stage_model(state, 1)
+    escalation_model = _escalation_model(state, model, "borderline")
+    if not escalation_model or ctx.get("model") == escalation_model:
+        # 응답 실패로 이미 기본 모델이 판단했으면 재판단 불필요
+        return None
+    # 캐시/로컬 판단은 제외하고 이번 실행에서 LLM이 보류로 판단한 기사만 대상
+    decided_indices = {item.get("index") for item in ctx["local_decided"]["borderline"]}
+    escalated_indices = {
+        item.get("index") for item in state.get("borderline_news", []) if item.get("index") not in decided_indices
+    }
+    escalated_news = [news for news in ctx["llm_news_data"] if news.get("original_index") in escalated_indices]
+    if not escalated_news:
+        return None
+
+    print(f"\n[모델 에스컬레이션] 1단계 보류 기사 {len(escalated_news)}개를 {escalation_model}로 재판단")
+    news_lines = "".join(_format_exclusion_line(news) for news in escalated_news)
+    return {
+        **ctx,
+        "user_prompt": build_exclusion_prompt(
+            news_lines, state.get("exclusion_criteria", ""), chunked=True,
+            company_criteria=state.get("company_criteria_1", ""), terse=ctx.get("terse", False)
+        ),
+        "model": escalation_model,
+        "llm_news_data": escalated_news,
+        "local_mode": "off",
+        "local_predictions": {},
+        "local_decided": {
+            "excluded": list(state.get("excluded_news", [])),
+            "borderline": [item for item in state.get("borderline_news", []) if item.get("index") not in escalated_indices],
+            "retained": list(state.get("retained_news", []))
+        },
+        "chunks": None
+    }
+
+def apply_borderline_escalation(state: AgentState, ctx: dict, result: str):
+    """재판단 결과를 반영하고, 응답에서 빠진 기사는 보류로 유지하는 함수"""
+    apply_exclusion(state, ctx, result)
+    judged = {
+        item.get("index")
+        for key in ("excluded_news", "borderline_news", "retained_news")
+        for item in state.get(key, [])
+    }
+    for news in ctx["llm_news_data"]:
+        original_index = news.get("original_index")
+        if original_index not in judged:
+            state["borderline_news"].append({
+                "index": original_index,
+                "original_index": original_index,
+                "title": news.get("content", ""),
+                "reason": "재판단 응답 누락 (보류 유지)"
+            })
+
+def run_exclusion_stage(state: AgentState, ctx: dict):
+    """1단계 ctx 실행 (분할된 경우 청크별로 병렬 분류 후 병합, 지연 시간은 가장 큰 청크 기준)"""
+    if ctx.get("chunks"):
+        pairs = [_chunk_state_and_context(state, ctx, chunk) for chunk in ctx["chunks"]]
+        max_workers = min(len(pairs), STAGE1_CHUNK_SETTINGS["max_workers"])
+        # 청크 스레드에도 호출한 쪽의 컨텍스트(사용량 집계 범위 등) 전달
+        contexts = [contextvars.copy_context() for _ in pairs]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(
+                lambda pair, context: context.run(
+                    run_llm_stage, pair[0], pair[1], apply_exclusion, max_retries=3, error_label="분류 결과 파싱"
+                ),
+                pairs, contexts
+            ))
+        _merge_exclusion_chunks(state, ctx, [chunk_state for chunk_state, _ in pairs])
+    else:
         # 최대 3번까지 시도
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                # LLM 호출 (헬퍼 함수 사용)
-                result = call_llm(state, system_prompt, exclusion_prompt, stage=1)
-                
-                # JSON 파싱 (헬퍼 함수 사용)
-                classification = parse_json_response(result)
-                
-                # 필수 필드 확인
-                if not all(key in classification for key in ["excluded", "borderline", "retained"]):
-                    raise ValueError("필수 필드가 누락되었습니다.")
-                
-                # 상태 업데이트 시 원래 인덱스 유지
-                for category in ["excluded", "borderline", "retained"]:
-                    for item in classification.get(category, []):
-                        original_index = item['index']
-                        item['original_index'] = original_index
-                
-                state["excluded_news"] = classification.get("excluded", [])
-                state["borderline_news"] = classification.get("borderline", [])
-                state["retained_news"] = classification.get("retained", [])
-                
-                print("\n[분류 결과]")
-                print(f"제외: {len(state['excluded_news'])}개")
-                print(f"보류: {len(state['borderline_news'])}개")
-                print(f"유지: {len(state['retained_news'])}개")
-                
-                # 성공적으로 파싱되면 루프 종료
-                break
-                
-            except (json.JSONDecodeError, ValueError) as e:
-                print(f"\n파싱 시도 {attempt + 1} 실패: {str(e)}")
-                if attempt == max_retries - 1:  # 마지막 시도에서도 실패
-                    st.error(f"분류 결과 파싱 중 오류가 발생했습니다: {str(e)}")
-                    return state
-                # 다음 시도를 위해 잠시 대기
-                time.sleep(1)
+        run_llm_stage(state, ctx, apply_exclusion, max_retries=3, error_label="분류 결과 파싱")
+
+def filter_excluded_news(state: AgentState) -> AgentState:
+    """뉴스를 제외/보류/유지로 분류하는 함수"""
+    # 단일 호출 모드: 1~3단계 결과를 한 번에 채움 (이후 단계는 건너뜀)
+    if SINGLE_PASS_SETTINGS.get("enabled", False):
+        return run_single_pass(state)
+    try:
+        ctx = prepare_exclusion(state)
+        if ctx is None:
+            return state
 
+        run_exclusion_stage(state, ctx)
+
+        # 저가 모델의 보류 판단만 기본 모델로 재판단
+        escalation_ctx = prepare_borderline_escalation(state, ctx)
+        if escalation_ctx is not None:
+            run_llm_stage(state, escalation_ctx, apply_borderline_escalation, max_retries=1, error_label="보류 기사 재판단 결과 파싱")
+        return state
+
+    except Exception as e:
+        st.error(f"뉴스 분류 중 오류가 발생했습니다: {str(e)}")
+        return state
+
+async def afilter_excluded_news(state: AgentState) -> AgentState:
+    """filter_excluded_news의 비동기 버전"""
+    if SINGLE_PASS_SETTINGS.get("enabled", False):
+        return await arun_single_pass(state)
+    try:
+        ctx = prepare_exclusion(state)
+        if ctx is None:
+            return state
+
+        if ctx.get("chunks"):
+            pairs = [_chunk_state_and_context(state, ctx, chunk) for chunk in ctx["chunks"]]
+            await asyncio.gather(*[
+                arun_llm_stage(chunk_state, chunk_ctx, apply_exclusion, max_retries=3, error_label="분류 결과 파싱")
+                for chunk_state, chunk_ctx in pairs
+            ])
+            _merge_exclusion_chunks(state, ctx, [chunk_state for chunk_state, _ in pairs])
+        else:
+            await arun_llm_stage(state, ctx, apply_exclusion, max_retries=3, error_label="분류 결과 파싱")
+
+        escalation_ctx = prepare_borderline_escalation(state, ctx)
+        if escalation_ctx is not None:
+            await arun_llm_stage(state, escalation_ctx, apply_borderline_escalation, max_retries=1, error_label="보류 기사 재판단 결과 파싱")
         return state
 
     except Exception as e:
@@ -653,7 +1550,8 @@ def filter_excluded_news(state: AgentState) -> AgentState:
         return state
 
 # 2단계: 뉴스 그룹핑 + 대표 기사 선택
-def group_and_select_news(state: AgentState) -> AgentState:
+def prepare_grouping(state: AgentState, grouping_mode: str = None, short_circuit: bool = True):
+    """2단계 프롬프트를 구성하는 함수 (그룹핑할 뉴스가 없거나 로컬 그룹핑/단계 생략으로 끝나면 None 반환)"""
     try:
         # 디버깅 정보 출력
         print("\n=== 그룹핑 전 인덱스 정보 ===")
@@ -679,8 +1577,52 @@ def group_and_select_news(state: AgentState) -> AgentState:
         print(f"필터링된 대상 뉴스 수: {len(target_news)}")
         
         if not target_news:
-            print("필터링된 뉴스가 없습니다!")
-            return state
+            if short_circuit and short_circuit_enabled("empty_input"):
+                state["grouped_news"] = []
+                skip_stage(state, 2, "그룹핑할 뉴스 없음")
+            else:
+                print("필터링된 뉴스가 없습니다!")
+            return None
+
+        # 증분 재평가: 구성원이 그대로인 1차 그룹 재사용
+        reusable_news_by_index = {news["current_index"]: news for news in target_news}
+        reused_groups, target_news = split_reusable_groups(state, target_news)
+        if reused_groups and not target_news:
+            state["grouped_news"] = reused_groups
+            skip_stage(state, 2, f"재평가: 1차 그룹 {len(reused_groups)}개 재사용, 새 기사 없음")
+            return None
+
+        # 로컬 그룹핑 (local: LLM 호출 없이 완료 / hybrid: 경계가 모호한 군집의 기사만 LLM으로 그룹핑)
+        local_groups = []
+        grouping_mode = grouping_mode or get_grouping_mode()
+        if grouping_mode != "llm":
+            keywords = state.get("keyword", [])
+            keywords = (keywords,) if isinstance(keywords, str) else tuple(keywords)
+            news_by_index = {news["current_index"]: news for news in target_news}
+            local_groups, target_news = group_news_locally(target_news, "current_index", keywords, {"mode": grouping_mode})
+            assign_representatives(local_groups, news_by_index, state.get("duplicate_handling", ""))
+            if not target_news:
+                state["grouped_news"] = merge_reused_groups(
+                    local_groups, reused_groups, reusable_news_by_index, state.get("duplicate_handling", "")
+                )
+                note = f"(로컬 그룹핑: LLM 호출 없음, {len(local_groups)}개 그룹)"
+                state["user_prompt_2"] = note
+                state["llm_response_2"] = note
+                print("\n=== 그룹핑 결과 (로컬) ===")
+                for group in state["grouped_news"]:
+                    print(f"그룹: {group['indices']}, 선택된 인덱스: {group['selected_index']}")
+                return None
+            print(f"[로컬 그룹핑] 모호한 기사 {len(target_news)}개만 LLM으로 그룹핑")
+
+        # 그룹핑 대상이 1건이면 LLM 호출 없이 단독 그룹 (hybrid 모드의 모호한 기사 1건 포함)
+        if len(target_news) == 1 and short_circuit and short_circuit_enabled("single_grouping"):
+            index = target_news[0]["current_index"]
+            state["grouped_news"] = merge_reused_groups(
+                local_groups + [{"indices": [index], "selected_index": index, "reason": "단독 기사"}], reused_groups,
+                reusable_news_by_index, state.get("duplicate_handling", "")
+            )
+            skip_stage(state, 2, f"그룹핑 대상 1건 (인덱스 {index}, 단독 그룹)")
+            return None
 
         # 뉴스 데이터를 문자열로 변환 (current_index 사용)
         news_text = "\n\n".join([
@@ -691,77 +1633,153 @@ def group_and_select_news(state: AgentState) -> AgentState:
         # 그룹핑 프롬프트
         system_prompt = state.get("system_prompt_2", "당신은 뉴스 분석 전문가입니다. 유사한 뉴스를 그룹화하고 대표성을 갖춘 기사를 선택하는 작업을 수행합니다. 같은 사안에 대해 숫자, 기업 ,계열사, 맥락, 주요 키워드 등이 유사하면 중복으로 판단합니다. 언론사의 신뢰도와 기사의 상세도를 고려하여 대표 기사를 선정합니다.")
         
-        grouping_prompt = f"""유사한 뉴스끼리 그룹으로 묶고, 각 그룹에서 가장 대표성 있는 뉴스 1건만 선택해 주세요.
-주어진 인덱스 번호를 정확히 사용해주세요. 인덱스 번호를 임의로 변경하지 마세요.
-
-[뉴스 목록]
-{news_text}
-
-[중복 처리 기준]
-{state.get("duplicate_handling", "")}
-
-다음과 같은 JSON 형식으로 응답해주세요:
-{{
+        # 대표 기사 로컬 선택 시 LLM은 그룹(indices)만 응답
+        local_representative = REPRESENTATIVE_SELECTION_SETTINGS.get("enabled", False)
+        terse = is_terse_stage(2)
+        if terse:
+            # 간결 응답: 그룹별 인덱스 배열만 응답 (첫 번째 인덱스가 대표 기사)
+            if local_representative:
+                instruction = """유사한 뉴스끼리 그룹으로 묶어 주세요. 대표 기사 선택과 사유 작성은 필요하지 않습니다.
+주어진 인덱스 번호를 정확히 사용해주세요. 인덱스 번호를 임의로 변경하지 마세요."""
+            else:
+                instruction = """유사한 뉴스끼리 그룹으로 묶고, 각 그룹에서 가장 대표성 있는 뉴스 1건을 그룹의 맨 앞에 배치해 주세요. 사유 작성은 필요하지 않습니다.
+주어진 인덱스 번호를 정확히 사용해주세요. 인덱스 번호를 임의로 변경하지 마세요."""
+            response_format = """다음과 같은 JSON 형식으로 응답해주세요 (그룹별 인덱스 배열, 첫 번째 인덱스가 대표 기사):
+{
+  "groups": [[2, 4], [5]]
+}"""
+        elif local_representative:
+            instruction = """유사한 뉴스끼리 그룹으로 묶어 주세요. 대표 기사 선택과 사유 작성은 필요하지 않습니다.
+주어진 인덱스 번호를 정확히 사용해주세요. 인덱스 번호를 임의로 변경하지 마세요."""
+            response_format = """다음과 같은 JSON 형식으로 응답해주세요:
+{
   "groups": [
-    {{
+    {"indices": [2, 4]},
+    {"indices": [5]}
+  ]
+}"""
+        else:
+            instruction = """유사한 뉴스끼리 그룹으로 묶고, 각 그룹에서 가장 대표성 있는 뉴스 1건만 선택해 주세요.
+주어진 인덱스 번호를 정확히 사용해주세요. 인덱스 번호를 임의로 변경하지 마세요."""
+            response_format = """다음과 같은 JSON 형식으로 응답해주세요:
+{
+  "groups": [
+    {
       "indices": [2, 4],
       "selected_index": 2,
       "reason": "동일한 회원권 관련 보도이며, 2번이 더 자세하고 언론사 우선순위가 높음"
-    }},
-    {{
+    },
+    {
       "indices": [5],
       "selected_index": 5,
       "reason": "단독 기사"
-    }}
+    }
   ]
-}}"""
+}"""
+        grouping_prompt = compose_stage_prompt(
+            instruction,
+            f"[뉴스 목록]\n{news_text}",
+            [f"[중복 처리 기준]\n{state.get('duplicate_handling', '')}", response_format],
+            state.get("company_criteria_2", "")
+        )
 
-        try:
-            # LLM 호출 (헬퍼 함수 사용)
-            result = call_llm(state, system_prompt, grouping_prompt, stage=2)
-            
-            # JSON 파싱 (헬퍼 함수 사용)
-            grouping = parse_json_response(result)
-            grouped_news = grouping.get("groups", [])
-            
-            # 그룹핑된 뉴스의 인덱스들을 모두 수집
-            grouped_indices = set()
-            for group in grouped_news:
-                grouped_indices.update(group.get("indices", []))
-            
-            # 그룹핑되지 않은 뉴스들을 찾아서 각각 단일 그룹으로 추가
-            current_indices = set(news["current_index"] for news in target_news)
-            ungrouped_indices = current_indices - grouped_indices
-            
-            # 미그룹 뉴스들을 각각 단일 그룹으로 추가
-            for idx in ungrouped_indices:
-                new_group = {
-                    "indices": [idx],
-                    "selected_index": idx,
-                    "reason": "개별 뉴스로 처리"
-                }
-                grouped_news.append(new_group)
-            
-            # 그룹핑 결과 저장
-            state["grouped_news"] = grouped_news
-            
-            # 디버깅 정보 출력
-            print("\n=== 그룹핑 결과 ===")
-            for group in grouped_news:
-                print(f"그룹: {group['indices']}, 선택된 인덱스: {group['selected_index']}")
-            
+        return {
+            "stage": 2,
+            "system_prompt": system_prompt,
+            "user_prompt": grouping_prompt,
+            "target_news": target_news,
+            "local_groups": local_groups,
+            "reused_groups": reused_groups,
+            "reusable_news_by_index": reusable_news_by_index,
+            "local_representative": local_representative,
+            "schema": get_stage_schema(2, local_representative, terse=terse),
+            "terse": terse
+        }
+
+    except Exception as e:
+        st.error(f"뉴스 그룹핑 중 오류가 발생했습니다: {str(e)}")
+        return None
+
+def apply_grouping(state: AgentState, ctx: dict, result: str):
+    """2단계 LLM 응답을 파싱하여 state에 반영하는 함수 (파싱 실패 시 예외 발생)"""
+    # JSON 파싱 (구조화 출력이면 검증된 dict 그대로 사용)
+    grouping = decode_stage_result(result)
+    if ctx.get("terse"):
+        grouping = expand_terse_grouping(grouping)
+    grouped_news = grouping.get("groups", [])
+    
+    # 그룹핑된 뉴스의 인덱스들을 모두 수집
+    grouped_indices = set()
+    for group in grouped_news:
+        grouped_indices.update(group.get("indices", []))
+    
+    # 그룹핑되지 않은 뉴스들을 찾아서 각각 단일 그룹으로 추가
+    current_indices = set(news["current_index"] for news in ctx["target_news"])
+    ungrouped_indices = current_indices - grouped_indices
+    
+    # 미그룹 뉴스들을 각각 단일 그룹으로 추가
+    for idx in ungrouped_indices:
+        new_group = {
+            "indices": [idx],
+            "selected_index": idx,
+            "reason": "개별 뉴스로 처리"
+        }
+        grouped_news.append(new_group)
+    
+    # 언론사 우선순위 기준 대표 기사 로컬 선택
+    if ctx["local_representative"]:
+        news_by_index = {news["current_index"]: news for news in ctx["target_news"]}
+        assign_representatives(grouped_news, news_by_index, state.get("duplicate_handling", ""))
+    
+    # hybrid 모드: 로컬에서 확정된 그룹과 합치기 (증분 재평가: 재사용 그룹에 새 기사 합치기)
+    grouped_news = merge_reused_groups(
+        ctx.get("local_groups", []) + grouped_news, ctx.get("reused_groups", []),
+        ctx.get("reusable_news_by_index", {}), state.get("duplicate_handling", "")
+    )
+    
+    # 그룹핑 결과 저장
+    state["grouped_news"] = grouped_news
+    
+    # 디버깅 정보 출력
+    print("\n=== 그룹핑 결과 ===")
+    for group in grouped_news:
+        print(f"그룹: {group['indices']}, 선택된 인덱스: {group['selected_index']}")
+
+def group_and_select_news(state: AgentState) -> AgentState:
+    """유사 뉴스를 그룹핑하고 그룹별 대표 기사를 선택하는 함수"""
+    if state.get("single_pass_completed"):
+        return state
+    try:
+        ctx = prepare_grouping(state)
+        if ctx is None:
             return state
 
-        except json.JSONDecodeError as e:
-            st.error(f"그룹핑 결과 파싱 중 오류가 발생했습니다: {str(e)}")
+        run_llm_stage(state, ctx, apply_grouping, max_retries=1, error_label="그룹핑 결과 파싱")
+        return state
+
+    except Exception as e:
+        st.error(f"뉴스 그룹핑 중 오류가 발생했습니다: {str(e)}")
+        return state
+
+async def agroup_and_select_news(state: AgentState) -> AgentState:
+    """group_and_select_news의 비동기 버전"""
+    if state.get("single_pass_completed"):
+        return state
+    try:
+        ctx = prepare_grouping(state)
+        if ctx is None:
             return state
 
+        await arun_llm_stage(state, ctx, apply_grouping, max_retries=1, error_label="그룹핑 결과 파싱")
+        return state
+
     except Exception as e:
         st.error(f"뉴스 그룹핑 중 오류가 발생했습니다: {str(e)}")
         return state
 
 # 3단계: 중요도 평가 + 최종 선정
-def evaluate_importance(state: AgentState) -> AgentState:
+def prepare_evaluation(state: AgentState, short_circuit: bool = True):
+    """3단계 프롬프트를 구성하는 함수 (평가할 뉴스가 없거나 단계 생략으로 끝나면 None 반환)"""
     try:
         # 선택된 뉴스 추출
         selected_news = []
@@ -793,8 +1811,15 @@ def evaluate_importance(state: AgentState) -> AgentState:
                 print(f"그룹 {i}, 선택된 인덱스 {selected_index}: 해당 뉴스를 찾을 수 없음")
         
         if not selected_news:
-            print("선택된 뉴스가 없습니다!")
-            return state
+            if short_circuit and short_circuit_enabled("empty_input"):
+                skip_stage(state, 3, "평가할 뉴스 없음")
+            else:
+                print("선택된 뉴스가 없습니다!")
+            return None
+
+        if short_circuit and short_circuit_enabled("small_evaluation") and _evaluation_unneeded(state):
+            _select_all_without_evaluation(state, selected_news, index_map)
+            return None
 
         # 뉴스 데이터를 문자열로 변환 (list_index 사용)
         news_text = "\n\n".join([
@@ -805,24 +1830,34 @@ def evaluate_importance(state: AgentState) -> AgentState:
         # 중요도 평가 프롬프트
         system_prompt = state.get("system_prompt_3", "당신은 회계법인의 전문 애널리스트입니다. 뉴스의 중요도를 평가하고 최종 선정하는 작업을 수행합니다. 특히 회계 감리, 재무제표, 경영권 변동, 주요 계약, 법적 분쟁 등 회계법인의 관점에서 중요한 이슈를 식별하고, 그 중요도를 '상' 또는 '중'으로 평가합니다. 또한 각 뉴스의 핵심 키워드와 관련 계열사를 식별하여 보고합니다.")
         
-        evaluation_prompt = f"""아래 기사들에 대해 회계법인의 시각으로 중요도를 평가하고, 모든 뉴스에 대해 평가 결과를 알려주세요.
-중요도 '상' 또는 '중'인 뉴스는 최종 선정하고, '하'인 뉴스는 선정하지 않습니다.
-
-[뉴스 목록]
-{news_text}
-
-[선택 기준]
-{state.get("selection_criteria", "")}
-
-[응답 요구사항]
+        instruction = """아래 기사들에 대해 회계법인의 시각으로 중요도를 평가하고, 모든 뉴스에 대해 평가 결과를 알려주세요.
+중요도 '상' 또는 '중'인 뉴스는 최종 선정하고, '하'인 뉴스는 선정하지 않습니다."""
+        terse = is_terse_stage(3)
+        if terse:
+            requirements = f"""[응답 요구사항]
+1. 중요도는 "상", "중", "하" 중 하나로 평가 ('하'인 뉴스는 not_selected에 번호만 포함)
+2. 제목/언론사/발행일은 응답하지 않음
+3. {_terse_reason_rule("선정/미선정")} (미선정 사유는 reasons에 작성)
+4. 응답은 완전한 JSON 형식이어야 함"""
+            response_format = """다음과 같은 JSON 형식으로 응답해주세요:
+{
+  "final_selection": [
+    {"index": 2, "importance": "상", "reason": "선정 사유", "keywords": ["키워드1", "키워드2"], "affiliates": ["계열사1"]}
+  ],
+  "not_selected": [3],
+  "reasons": [
+    {"index": 3, "reason": "미선정 사유"}
+  ]
+}"""
+        else:
+            requirements = """[응답 요구사항]
 1. 중요도는 "상", "중", "하" 중 하나로 평가
 2. 미선정 사유는 간단명료하게 작성
-3. 응답은 완전한 JSON 형식이어야 함
-
-다음과 같은 JSON 형식으로 응답해주세요:
-{{
+3. 응답은 완전한 JSON 형식이어야 함"""
+            response_format = """다음과 같은 JSON 형식으로 응답해주세요:
+{
   "final_selection": [
-        {{
+        {
             "index": 2,
             "title": "뉴스 제목",
             "importance": "상",
@@ -831,87 +1866,152 @@ def evaluate_importance(state: AgentState) -> AgentState:
             "affiliates": ["계열사1", "계열사2"],
             "press": "언론사명",
             "date": "발행일"
-        }}
+        }
   ],
   "not_selected": [
-    {{
+    {
       "index": 3,
       "title": "뉴스 제목",
       "importance": "하",
       "reason": "미선정 사유"
-    }}
+    }
   ]
-}}"""
+}"""
+        evaluation_prompt = compose_stage_prompt(
+            instruction,
+            f"[뉴스 목록]\n{news_text}",
+            [f"[선택 기준]\n{state.get('selection_criteria', '')}", requirements, response_format],
+            state.get("company_criteria_3", "")
+        )
+
+        return {
+            "stage": 3,
+            "system_prompt": system_prompt,
+            "user_prompt": evaluation_prompt,
+            "schema": get_stage_schema(3, terse=terse),
+            "terse": terse,
+            "selected_news": selected_news,
+            "index_map": index_map
+        }
+
+    except Exception as e:
+        st.error(f"중요도 평가 중 오류가 발생했습니다: {str(e)}")
+        return None
+
+def _evaluation_unneeded(state: AgentState) -> bool:
+    """모든 대상이 '유지' 판단이고 그룹 수가 회사별 최대 기사 수 이하인지 (중요도 평가 생략 조건)"""
+    if state.get("borderline_news") or not state.get("retained_news"):
+        return False
+    max_articles = get_max_articles_for_company(get_state_company(state))
+    if max_articles == NO_LIMIT or not isinstance(max_articles, int):
+        return False
+    return len(state["grouped_news"]) <= max_articles
+
+def _select_all_without_evaluation(state: AgentState, selected_news: list, index_map: dict):
+    """중요도 평가 없이 그룹 대표 기사를 모두 최종 선정 (apply_evaluation과 같은 형태)"""
+    importance = STAGE_SHORT_CIRCUIT_SETTINGS.get("default_importance", "중")
+    state["final_selection"] = [
+        {
+            "index": news["list_index"],
+            "title": news.get("content", ""),
+            "importance": importance,
+            "reason": "모든 기사가 유지 판단이고 최대 기사 수 이내라 중요도 평가 생략",
+            "keywords": [],
+            "affiliates": [],
+            "url": news.get("url", ""),
+            "press": news.get("press", ""),
+            "date": news.get("date", ""),
+            "original_index": index_map[news["list_index"]],
+            "group_info": news["group_info"]
+        }
+        for news in selected_news
+    ]
+    state["not_selected_news"] = []
+    skip_stage(state, 3, f"그룹 {len(state['grouped_news'])}개 ≤ 최대 기사 수, 보류 기사 없음 → 전부 선정")
+
+def apply_evaluation(state: AgentState, ctx: dict, result: str):
+    """3단계 LLM 응답을 파싱하여 state에 반영하는 함수 (파싱 실패 시 예외 발생)"""
+    # JSON 파싱 (구조화 출력이면 검증된 dict 그대로 사용)
+    evaluation = decode_stage_result(result)
+    if ctx.get("terse"):
+        evaluation = expand_terse_evaluation(evaluation, ctx["selected_news"])
+    
+    # 필수 필드 확인
+    if not all(key in evaluation for key in ["final_selection", "not_selected"]):
+        raise ValueError("필수 필드가 누락되었습니다.")
+    
+    # 최종 선정된 뉴스 처리
+    for news in evaluation["final_selection"]:
+        list_index = news["index"]
+        if list_index in ctx["index_map"]:
+            original_index = ctx["index_map"][list_index]
+            original_news = next(
+                (n for n in ctx["selected_news"] if n["list_index"] == list_index),
+                None
+            )
+            if original_news:
+                # 원본 데이터의 메타데이터를 그대로 사용
+                news.update({
+                    "url": original_news.get("url", ""),
+                    "press": original_news.get("press", ""),  # LLM이 제공한 press 대신 원본 press 사용
+                    "date": original_news.get("date", ""),
+                    "original_index": original_index,
+                    "group_info": original_news["group_info"]
+                })
+                print(f"최종 선정 뉴스: 인덱스={original_index}, 제목={news['title']}")
+    
+    # 미선정 뉴스도 동일하게 처리
+    for news in evaluation["not_selected"]:
+        list_index = news["index"]
+        if list_index in ctx["index_map"]:
+            original_index = ctx["index_map"][list_index]
+            original_news = next(
+                (n for n in ctx["selected_news"] if n["list_index"] == list_index),
+                None
+            )
+            if original_news:
+                news.update({
+                    "url": original_news.get("url", ""),
+                    "press": original_news.get("press", ""),  # LLM이 제공한 press 대신 원본 press 사용
+                    "date": original_news.get("date", ""),
+                    "original_index": original_index,
+                    "group_info": original_news["group_info"]
+                })
+                print(f"미선정 뉴스: 인덱스={original_index}, 제목={news['title']}")
+    
+    state["final_selection"] = evaluation.get("final_selection", [])
+    state["not_selected_news"] = evaluation.get("not_selected", [])
+    
+    print(f"최종 선정 뉴스 수: {len(state['final_selection'])}")
+    print(f"미선정 뉴스 수: {len(state['not_selected_news'])}")
+
+def evaluate_importance(state: AgentState) -> AgentState:
+    """그룹 대표 기사의 중요도를 평가하고 최종 선정하는 함수"""
+    if state.get("single_pass_completed"):
+        return state
+    try:
+        ctx = prepare_evaluation(state)
+        if ctx is None:
+            return state
 
         # 최대 3번까지 시도
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                # LLM 호출 (헬퍼 함수 사용)
-                result = call_llm(state, system_prompt, evaluation_prompt, stage=3)
-                
-                # JSON 파싱 (헬퍼 함수 사용)
-                evaluation = parse_json_response(result)
-                
-                # 필수 필드 확인
-                if not all(key in evaluation for key in ["final_selection", "not_selected"]):
-                    raise ValueError("필수 필드가 누락되었습니다.")
-                
-                # 최종 선정된 뉴스 처리
-                for news in evaluation["final_selection"]:
-                    list_index = news["index"]
-                    if list_index in index_map:
-                        original_index = index_map[list_index]
-                        original_news = next(
-                            (n for n in selected_news if n["list_index"] == list_index),
-                            None
-                        )
-                        if original_news:
-                            # 원본 데이터의 메타데이터를 그대로 사용
-                            news.update({
-                                "url": original_news.get("url", ""),
-                                "press": original_news.get("press", ""),  # LLM이 제공한 press 대신 원본 press 사용
-                                "date": original_news.get("date", ""),
-                                "original_index": original_index,
-                                "group_info": original_news["group_info"]
-                            })
-                            print(f"최종 선정 뉴스: 인덱스={original_index}, 제목={news['title']}")
-
-                # 미선정 뉴스도 동일하게 처리
-                for news in evaluation["not_selected"]:
-                    list_index = news["index"]
-                    if list_index in index_map:
-                        original_index = index_map[list_index]
-                        original_news = next(
-                            (n for n in selected_news if n["list_index"] == list_index),
-                            None
-                        )
-                        if original_news:
-                            news.update({
-                                "url": original_news.get("url", ""),
-                                "press": original_news.get("press", ""),  # LLM이 제공한 press 대신 원본 press 사용
-                                "date": original_news.get("date", ""),
-                                "original_index": original_index,
-                                "group_info": original_news["group_info"]
-                            })
-                            print(f"미선정 뉴스: 인덱스={original_index}, 제목={news['title']}")
-                
-                state["final_selection"] = evaluation.get("final_selection", [])
-                state["not_selected_news"] = evaluation.get("not_selected", [])
-                
-                print(f"최종 선정 뉴스 수: {len(state['final_selection'])}")
-                print(f"미선정 뉴스 수: {len(state['not_selected_news'])}")
-                
-                return state
+        run_llm_stage(state, ctx, apply_evaluation, max_retries=3, error_label="중요도 평가 결과 파싱")
+        return state
 
-            except (json.JSONDecodeError, ValueError) as e:
-                print(f"\n파싱 시도 {attempt + 1} 실패: {str(e)}")
-                if attempt == max_retries - 1:  # 마지막 시도에서도 실패
-                    st.error(f"중요도 평가 결과 파싱 중 오류가 발생했습니다: {str(e)}")
-                    return state
-                # 다음 시도를 위해 잠시 대기
-                time.sleep(1)
+    except Exception as e:
+        st.error(f"중요도 평가 중 오류가 발생했습니다: {str(e)}")
+        return state
 
+async def aevaluate_importance(state: AgentState) -> AgentState:
+    """evaluate_importance의 비동기 버전"""
+    if state.get("single_pass_completed"):
+        return state
+    try:
+        ctx = prepare_evaluation(state)
+        if ctx is None:
+            return state
+
+        await arun_llm_stage(state, ctx, apply_evaluation, max_retries=3, error_label="중요도 평가 결과 파싱")
         return state
 
     except Exception as e:
@@ -919,6 +2019,652 @@ def evaluate_importance(state: AgentState) -> AgentState:
         return state
 
 
+# 단일 호출 모드: 제외 판단 + 그룹핑 + 중요도 평가를 LLM 1회 호출로 처리
+def prepare_single_pass(state: AgentState):
+    """단일 호출 프롬프트를 구성하는 함수 (분석할 뉴스가 없으면 None 반환)"""
+    news_data = state.get("news_data", [])
+    if not news_data:
+        if short_circuit_enabled("empty_input"):
+            skip_stage(state, 1, "분석할 뉴스 없음")
+        else:
+            st.error("분석할 뉴스가 없습니다.")
+        return None
+
+    system_prompt = "\n\n".join(
+        prompt for prompt in (
+            state.get("system_prompt_1", ""), state.get("system_prompt_2", ""), state.get("system_prompt_3", "")
+        ) if prompt
+    )
+    news_list = "".join(
+        f"{news.get('original_index')}. {news['content']} ({news.get('press', '알 수 없음')}, {news.get('date', '알 수 없음')})\n"
+        for news in news_data
+    )
+    company_criteria = "\n".join(
+        criteria.strip() for criteria in (
+            state.get("company_criteria_1", ""), state.get("company_criteria_2", ""), state.get("company_criteria_3", "")
+        ) if criteria and criteria.strip()
+    )
+
+    instruction = """아래 뉴스 목록을 회계법인의 관점에서 한 번에 분석해주세요.
+1) 제외 기준에 따라 모든 뉴스를 제외/보류/유지로 분류
+2) 보류/유지 뉴스 중 유사한 뉴스끼리 그룹으로 묶고, 중복 처리 기준에 따라 그룹별 대표 기사 1건 선택 (단독 기사도 1개짜리 그룹)
+3) 각 그룹 대표 기사의 중요도를 선택 기준에 따라 평가 ('상'/'중'은 final_selection, '하'는 not_selected)
+각 뉴스의 번호는 고유 식별자이므로 변경하지 말고 그대로 응답에 사용해주세요."""
+    requirements = """[응답 요구사항]
+1. 모든 뉴스를 excluded/borderline/retained 중 하나에 포함
+2. groups에는 보류/유지 뉴스만 포함
+3. final_selection/not_selected의 index는 그룹 대표 기사 번호
+4. 사유는 간단명료하게 작성
+5. 응답은 완전한 JSON 형식이어야 함"""
+    response_format = """다음과 같은 JSON 형식으로 응답해주세요:
+{
+  "excluded": [{"index": 1, "title": "뉴스 제목", "reason": "제외 사유"}],
+  "borderline": [{"index": 2, "title": "뉴스 제목", "reason": "보류 사유"}],
+  "retained": [
+    {"index": 3, "title": "뉴스 제목", "reason": "유지 사유"},
+    {"index": 4, "title": "뉴스 제목", "reason": "유지 사유"}
+  ],
+  "groups": [
+    {"indices": [3, 4], "selected_index": 3, "reason": "대표 기사 선택 사유"},
+    {"indices": [2], "selected_index": 2, "reason": "단독 기사"}
+  ],
+  "final_selection": [
+    {"index": 3, "title": "뉴스 제목", "importance": "상", "reason": "선정 사유", "keywords": ["키워드1"], "affiliates": ["계열사1"]}
+  ],
+  "not_selected": [
+    {"index": 2, "title": "뉴스 제목", "importance": "하", "reason": "미선정 사유"}
+  ]
+}"""
+    user_prompt = compose_stage_prompt(
+        instruction,
+        f"[뉴스 목록]\n{news_list}",
+        [
+            f"[제외 기준]\n{state.get('exclusion_criteria', '')}",
+            f"[중복 처리 기준]\n{state.get('duplicate_handling', '')}",
+            f"[선택 기준]\n{state.get('selection_criteria', '')}",
+            requirements,
+            response_format
+        ],
+        company_criteria
+    )
+    return {
+        "stage": 1,
+        "system_prompt": system_prompt,
+        "user_prompt": user_prompt,
+        "schema": get_single_pass_schema(),
+        # 분류/그룹핑/평가를 한 번에 처리하므로 단계별 모델 설정과 관계없이 기본 모델 사용
+        "model": state.get("model", "gpt-4o"),
+        "news_data": news_data
+    }
+
+def apply_single_pass(state: AgentState, ctx: dict, result: str):
+    """단일 호출 응답을 1~3단계 결과와 같은 형태로 state에 반영하는 함수 (파싱 실패 시 예외 발생)"""
+    data = decode_stage_result(result)
+    required = ["excluded", "borderline", "retained", "groups", "final_selection", "not_selected"]
+    if not all(key in data for key in required):
+        raise ValueError("필수 필드가 누락되었습니다.")
+
+    # 1단계 결과 반영 (판단 로그/캐시 기록 포함)
+    exclusion_ctx = {
+        "llm_news_data": ctx["news_data"],
+        "local_mode": "off",
+        "local_decided": {"excluded": [], "borderline": [], "retained": []},
+        "local_predictions": {},
+        "company": get_state_company(state),
+        "criteria_hash": exclusion_criteria_hash(
+            ctx["system_prompt"], state.get("exclusion_criteria", "") + state.get("company_criteria_1", "")
+        )
+    }
+    apply_exclusion(state, exclusion_ctx, {key: data[key] for key in ["excluded", "borderline", "retained"]})
+
+    # 2단계 결과 반영 (보류/유지 뉴스에 해당하는 인덱스만 사용)
+    state["grouped_news"] = []
+    state["final_selection"] = []
+    state["not_selected_news"] = []
+    grouping_ctx = prepare_grouping(state, grouping_mode="llm", short_circuit=False)
+    if grouping_ctx is None:
+        return
+    target_indices = set(news["current_index"] for news in grouping_ctx["target_news"])
+    groups = []
+    for group in data["groups"]:
+        indices = [idx for idx in group.get("indices", []) if idx in target_indices]
+        if not indices:
+            continue
+        selected_index = group.get("selected_index")
+        groups.append({
+            "indices": indices,
+            "selected_index": selected_index if selected_index in indices else indices[0],
+            "reason": group.get("reason", "")
+        })
+    apply_grouping(state, grouping_ctx, {"groups": groups})
+
+    # 3단계 결과 반영 (그룹 내 어떤 기사 번호로 응답해도 해당 그룹의 대표 기사로 매핑)
+    evaluation_ctx = prepare_evaluation(state, short_circuit=False)
+    if evaluation_ctx is None:
+        return
+    original_to_list = {}
+    for news in evaluation_ctx["selected_news"]:
+        for idx in news["group_info"].get("indices", []):
+            original_to_list.setdefault(idx, news["list_index"])
+    evaluation = {"final_selection": [], "not_selected": []}
+    seen = set()
+    for key in ["final_selection", "not_selected"]:
+        for item in data[key]:
+            list_index = original_to_list.get(item.get("index"))
+            if list_index is None or list_index in seen:
+                continue
+            seen.add(list_index)
+            evaluation[key].append({**item, "index": list_index})
+    apply_evaluation(state, evaluation_ctx, evaluation)
+
+def _finish_single_pass(state: AgentState):
+    """이후 단계(그룹핑/중요도 평가)를 건너뛰도록 표시"""
+    state["single_pass_completed"] = True
+    note = "(단일 호출 모드: 1단계 프롬프트에 포함)"
+    for key in ["user_prompt_2", "llm_response_2", "user_prompt_3", "llm_response_3"]:
+        state[key] = note
+    return state
+
+def run_single_pass(state: AgentState) -> AgentState:
+    """단일 호출 모드 실행"""
+    try:
+        ctx = prepare_single_pass(state)
+        if ctx is not None:
+            run_llm_stage(state, ctx, apply_single_pass, max_retries=3, error_label="단일 호출 결과 파싱")
+    except Exception as e:
+        st.error(f"단일 호출 분석 중 오류가 발생했습니다: {str(e)}")
+    return _finish_single_pass(state)
+
+async def arun_single_pass(state: AgentState) -> AgentState:
+    """run_single_pass의 비동기 버전"""
+    try:
+        ctx = prepare_single_pass(state)
+        if ctx is not None:
+            await arun_llm_stage(state, ctx, apply_single_pass, max_retries=3, error_label="단일 호출 결과 파싱")
+    except Exception as e:
+        st.error(f"단일 호출 분석 중 오류가 발생했습니다: {str(e)}")
+    return _finish_single_pass(state)
+
+
+# 배치 API 실행 (야간 작업용: 모든 회사의 같은 단계 요청을 한 번의 배치로 처리)
+def _apply_batch_text(state: AgentState, ctx: dict, apply_fn, text: str, model: str):
+    """배치/캐시 응답 문자열을 검증 후 반영 (실패 시 ValueError/JSONDecodeError)"""
+    schema = ctx.get("schema")
+    _record_prompts(state, ctx["stage"], ctx["system_prompt"], ctx["user_prompt"])
+    _record_response(state, ctx["stage"], text)
+    result = decode_cached_result(schema, text) if schema else text
+    if result is None:
+        raise ValueError("구조화 응답 검증 실패")
+    ctx["model"] = model
+    apply_fn(state, ctx, result)
+
+def run_batch_items(items: dict, apply_fn, label: str, max_retries: int = 1, error_label: str = "LLM 응답 파싱"):
+    """
+    {custom_id: (state, ctx)} 요청을 한 번의 배치로 실행하고 apply_fn으로 반영하는 함수
+    캐시 적중 요청은 배치에서 제외하고, 배치에서 실패/누락/파싱 실패한 요청은 동기 호출(run_llm_stage)로 재처리
+    """
+    requests = []
+    models = {}
+    for custom_id, (state, ctx) in list(items.items()):
+        model = ctx.get("model") or get_stage_model(state, ctx["stage"])
+        models[custom_id] = model
+        cache_key, cached = lookup_cached_response(model, LLM_TEMPERATURE, ctx["system_prompt"], ctx["user_prompt"])
+        if cached is not None:
+            try:
+                print(f"\n[LLM 캐시] {custom_id} 응답 캐시 적중 (배치 제외)")
+                _apply_batch_text(state, ctx, apply_fn, cached, model)
+                del items[custom_id]
+                continue
+            except (json.JSONDecodeError, ValueError):
+                invalidate_cached_response(cache_key)
+        requests.append(build_batch_request(
+            custom_id, model, LLM_TEMPERATURE, ctx["system_prompt"], ctx["user_prompt"], json_mode=bool(ctx.get("schema"))
+        ))
+
+    results = run_batch(requests, label)
+    for custom_id, (state, ctx) in items.items():
+        model = models[custom_id]
+        result = results.get(custom_id)
+        if result is not None and "error" not in result:
+            try:
+                # 배치 단가가 따로 집계되도록 모델명에 배치 표시
+                record_llm_usage(ctx["stage"], to_ai_message(result), 0.0, f"{model}{BATCH_MODEL_SUFFIX}")
+                _apply_batch_text(state, ctx, apply_fn, result["content"], model)
+                store_cached_response(
+                    make_cache_key(model, LLM_TEMPERATURE, ctx["system_prompt"], ctx["user_prompt"]), result["content"], model
+                )
+                continue
+            except (json.JSONDecodeError, ValueError) as e:
+                print(f"[배치 API] {custom_id} 응답 반영 실패, 동기 호출로 재처리: {str(e)}")
+        elif result is not None:
+            print(f"[배치 API] {custom_id} 요청 실패, 동기 호출로 재처리: {result['error']}")
+        run_llm_stage(state, ctx, apply_fn, max_retries=max_retries, error_label=error_label)
+
+def _batch_exclusion(states: dict):
+    """1단계 배치 (단일 호출 모드면 단일 호출 배치, 분할된 회사는 청크별 요청 후 병합)"""
+    if SINGLE_PASS_SETTINGS.get("enabled", False):
+        items = {}
+        for key, state in states.items():
+            ctx = prepare_single_pass(state)
+            if ctx is not None:
+                items[f"{key}#single"] = (state, ctx)
+        run_batch_items(items, apply_single_pass, "single_pass", max_retries=3, error_label="단일 호출 결과 파싱")
+        for state in states.values():
+            _finish_single_pass(state)
+        return
+
+    items = {}
+    exclusion_ctxs = {}
+    chunk_pairs = {}
+    for key, state in states.items():
+        ctx = prepare_exclusion(state)
+        if ctx is None:
+            continue
+        exclusion_ctxs[key] = ctx
+        if ctx.get("chunks"):
+            chunk_pairs[key] = [_chunk_state_and_context(state, ctx, chunk) for chunk in ctx["chunks"]]
+            for i, pair in enumerate(chunk_pairs[key], 1):
+                items[f"{key}#1-{i}"] = pair
+        else:
+            items[f"{key}#1"] = (state, ctx)
+    run_batch_items(items, apply_exclusion, "stage1", max_retries=3, error_label="분류 결과 파싱")
+    for key, pairs in chunk_pairs.items():
+        _merge_exclusion_chunks(states[key], exclusion_ctxs[key], [chunk_state for chunk_state, _ in pairs])
+
+    # 저가 모델의 보류 판단 재판단도 한 번의 배치로 처리
+    escalation_items = {}
+    for key, ctx in exclusion_ctxs.items():
+        escalation_ctx = prepare_borderline_escalation(states[key], ctx)
+        if escalation_ctx is not None:
+            escalation_items[f"{key}#1-escalation"] = (states[key], escalation_ctx)
+    run_batch_items(escalation_items, apply_borderline_escalation, "stage1_escalation", error_label="보류 기사 재판단 결과 파싱")
+
+def run_llm_stages_batch(states: dict) -> dict:
+    """
+    여러 회사의 1~3단계를 단계별 배치로 실행하는 함수 (단계마다 배치 1개 제출 → 완료 대기 → 다음 단계)
+
+    Args:
+        states (dict): {회사: 규칙 필터까지 끝난 state}
+    """
+    _batch_exclusion(states)
+
+    items = {}
+    for key, state in states.items():
+        if state.get("single_pass_completed"):
+            continue
+        ctx = prepare_grouping(state)
+        if ctx is not None:
+            items[f"{key}#2"] = (state, ctx)
+    run_batch_items(items, apply_grouping, "stage2", error_label="그룹핑 결과 파싱")
+
+    items = {}
+    for key, state in states.items():
+        if state.get("single_pass_completed"):
+            continue
+        ctx = prepare_evaluation(state)
+        if ctx is not None:
+            items[f"{key}#3"] = (state, ctx)
+    run_batch_items(items, apply_evaluation, "stage3", max_retries=3, error_label="중요도 평가 결과 파싱")
+    return states
+
+
+# 회사 묶음 호출 (단계 입력 기사가 적은 회사 여러 곳의 같은 단계를 LLM 1회 호출로 처리)
+# 단계별 묶음 대상 기사 목록 / 기사 번호 키 / 공통 기준 / 회사별 기준
+_PACK_STAGE_SPECS = {
+    1: {"news_key": "llm_news_data", "index_key": "original_index", "criteria": "exclusion_criteria", "criteria_title": "제외 기준"},
+    2: {"news_key": "target_news", "index_key": "current_index", "criteria": "duplicate_handling", "criteria_title": "중복 처리 기준"},
+    3: {"news_key": "selected_news", "index_key": "list_index", "criteria": "selection_criteria", "criteria_title": "선택 기준"}
+}
+_PACK_ID_PATTERN = re.compile(r"^\s*([A-Z])-(\d+)\s*$")
+
+def _pack_label(position: int) -> str:
+    """묶음 안의 회사 기호 (A, B, C, ...)"""
+    return chr(ord("A") + position)
+
+def _parse_pack_id(value):
+    """회사 구분 ID("A-3")를 (회사 기호, 기사 번호)로 변환 (형식이 다르면 None)"""
+    match = _PACK_ID_PATTERN.match(str(value))
+    return (match.group(1), int(match.group(2))) if match else None
+
+def _format_packed_news(stage: int, label: str, news_list: list) -> str:
+    """회사 섹션의 뉴스 목록 (1단계는 한 줄 형식, 2/3단계는 항목 블록 형식)"""
+    index_key = _PACK_STAGE_SPECS[stage]["index_key"]
+    if stage == 1:
+        return "".join(
+            f"{label}-{news.get(index_key)}. {news['content']} ({news.get('press', '알 수 없음')})\n" for news in news_list
+        )
+    return "\n\n".join(
+        f"ID: {label}-{news.get(index_key)}\n제목: {news['content']}\n언론사: {news.get('press', '알 수 없음')}\n발행일: {news.get('date', '알 수 없음')}"
+        for news in news_list
+    )
+
+def _format_pack_section(stage: int, label: str, state: AgentState, ctx: dict) -> str:
+    """회사별 섹션 (회사 기호/이름 → 회사별 기준 → 뉴스 목록)"""
+    blocks = [f"## 기업 {label}: {get_state_company(state)}"]
+    company_criteria = state.get(f"company_criteria_{stage}", "")
+    if company_criteria and company_criteria.strip():
+        blocks.append(f"[분석 대상 기업 기준]\n{company_criteria.strip()}")
+    blocks.append(f"[뉴스 목록]\n{_format_packed_news(stage, label, ctx[_PACK_STAGE_SPECS[stage]['news_key']])}")
+    return "\n".join(blocks)
+
+def build_packed_prompt(stage: int, shared_criteria: str, sections: list, local_representative: bool = False) -> str:
+    """여러 회사의 같은 단계를 묶은 프롬프트 (공통 기준은 한 번만, 회사별 기준/뉴스 목록은 회사 섹션에 배치)"""
+    id_rule = "각 뉴스의 ID(기업 기호-번호, 예: A-3)는 고유 식별자이므로 변경하지 말고 그대로 응답에 사용해주세요."
+    if stage == 1:
+        instruction = f"""아래 여러 기업의 뉴스 목록을 기업별로 회계법인의 관점에서 분석하여 제외/보류/유지로 분류해주세요.
+각 기업의 뉴스는 공통 [제외 기준]과 해당 기업 섹션의 [분석 대상 기업 기준]으로 판단해주세요.
+{id_rule}"""
+        requirements = """[응답 요구사항]
+1. 모든 기업 섹션의 모든 뉴스를 빠짐없이 제외/보류/유지 중 하나에 한 번씩만 포함
+2. 제목은 응답하지 말고 ID와 사유만 작성 (사유는 간단명료하게)
+3. 응답은 완전한 JSON 형식이어야 함"""
+        response_format = """다음과 같은 JSON 형식으로 응답해주세요:
+{
+  "excluded": [{"id": "A-1", "reason": "제외 사유"}],
+  "borderline": [{"id": "A-2", "reason": "보류 사유"}],
+  "retained": [{"id": "A-3", "reason": "유지 사유"}, {"id": "B-1", "reason": "유지 사유"}]
+}"""
+    elif stage == 2:
+        if local_representative:
+            instruction = f"""아래 여러 기업의 뉴스 목록을 기업별로 유사한 뉴스끼리 그룹으로 묶어 주세요. 대표 기사 선택과 사유 작성은 필요하지 않습니다.
+다른 기업 섹션의 뉴스끼리는 묶지 마세요.
+{id_rule}"""
+            response_format = """다음과 같은 JSON 형식으로 응답해주세요:
+{
+  "groups": [
+    {"ids": ["A-2", "A-4"]},
+    {"ids": ["B-1"]}
+  ]
+}"""
+        else:
+            instruction = f"""아래 여러 기업의 뉴스 목록을 기업별로 유사한 뉴스끼리 그룹으로 묶고, 각 그룹에서 가장 대표성 있는 뉴스 1건만 선택해 주세요.
+다른 기업 섹션의 뉴스끼리는 묶지 마세요.
+{id_rule}"""
+            response_format = """다음과 같은 JSON 형식으로 응답해주세요:
+{
+  "groups": [
+    {"ids": ["A-2", "A-4"], "selected_id": "A-2", "reason": "동일한 사안이며 A-2가 더 자세하고 언론사 우선순위가 높음"},
+    {"ids": ["B-1"], "selected_id": "B-1", "reason": "단독 기사"}
+  ]
+}"""
+        requirements = """[응답 요구사항]
+1. 각 뉴스는 하나의 그룹에만 포함
+2. 응답은 완전한 JSON 형식이어야 함"""
+    else:
+        instruction = f"""아래 기업별 기사들에 대해 회계법인의 시각으로 중요도를 평가하고, 모든 뉴스에 대해 평가 결과를 알려주세요.
+중요도 '상' 또는 '중'인 뉴스는 최종 선정하고, '하'인 뉴스는 선정하지 않습니다. 최대 선정 기사 수는 기업별로 적용합니다.
+{id_rule}"""
+        requirements = """[응답 요구사항]
+1. 중요도는 "상", "중", "하" 중 하나로 평가 (모든 뉴스를 final_selection/not_selected 중 한 곳에 한 번씩만 포함)
+2. 제목/언론사/발행일은 응답하지 않음
+3. 선정/미선정 사유는 간단명료하게 작성
+4. 응답은 완전한 JSON 형식이어야 함"""
+        response_format = """다음과 같은 JSON 형식으로 응답해주세요:
+{
+  "final_selection": [
+    {"id": "A-2", "importance": "상", "reason": "선정 사유", "keywords": ["키워드1", "키워드2"], "affiliates": ["계열사1"]}
+  ],
+  "not_selected": [
+    {"id": "A-3", "reason": "미선정 사유"}
+  ]
+}"""
+    title = _PACK_STAGE_SPECS[stage]["criteria_title"]
+    return "\n\n".join(
+        [instruction, f"[{title}]\n{shared_criteria}", requirements, response_format]
+        + ["[기업별 뉴스 목록]"] + sections
+    )
+
+def _pack_group_key(state: AgentState, ctx: dict):
+    """같은 묶음으로 보낼 수 있는 회사 구분 키 (단계/모델/시스템 프롬프트/공통 기준이 같아야 함)"""
+    stage = ctx["stage"]
+    return (
+        stage,
+        ctx.get("model") or get_stage_model(state, stage),
+        ctx["system_prompt"],
+        state.get(_PACK_STAGE_SPECS[stage]["criteria"], ""),
+        ctx.get("local_representative", False)
+    )
+
+def plan_company_packs(items: dict):
+    """
+    {회사: (state, ctx)}를 묶음 호출 목록과 회사별 호출 목록으로 나누는 함수
+
+    Returns:
+        tuple: ([[회사, ...], ...] 묶음 목록, [회사, ...] 회사별 호출 목록)
+    """
+    settings = COMPANY_PACKING_SETTINGS
+    max_companies = min(settings["max_companies_per_pack"], 26)
+    groups = {}
+    singles = []
+    skipped_modes = set()
+    for key, (state, ctx) in items.items():
+        news_list = ctx.get(_PACK_STAGE_SPECS[ctx["stage"]]["news_key"], [])
+        if ctx["stage"] not in settings.get("stages", []) or ctx.get("chunks") or len(news_list) > settings["max_articles_per_company"]:
+            singles.append(key)
+            continue
+        # 묶음 응답은 자유 형식 JSON(전체 형식)만 지원하므로 구조화 출력/간결 응답 단계는 회사별 호출
+        if ctx.get("schema") or ctx.get("terse"):
+            skipped_modes.add((ctx["stage"], "구조화 출력" if ctx.get("schema") else "간결 응답"))
+            singles.append(key)
+            continue
+        groups.setdefault(_pack_group_key(state, ctx), []).append(key)
+
+    packs = []
+    for (stage, _, system_prompt, shared_criteria, local_representative), keys in groups.items():
+        base_tokens = estimate_tokens(system_prompt) + estimate_tokens(
+            build_packed_prompt(stage, shared_criteria, [], local_representative)
+        )
+        section_tokens = [
+            estimate_tokens(_format_pack_section(stage, _pack_label(0), *items[key])) for key in keys
+        ]
+        for start, end in split_by_token_budget(section_tokens, settings["max_prompt_tokens"] - base_tokens, max_companies):
+            if end - start > 1:
+                packs.append(keys[start:end])
+            else:
+                singles.append(keys[start])
+    for stage, mode in sorted(skipped_modes):
+        print(f"[회사 묶음] {stage}단계: {mode} 모드에서는 묶음 호출을 사용하지 않고 회사별로 호출합니다.")
+    return packs, singles
+
+def _collect_packed_entries(data: dict, fields: list, labels: dict) -> dict:
+    """묶음 응답의 ID 항목을 회사별로 분류 ({회사: {필드: [(기사 번호, 항목), ...]}}, 알 수 없는 ID는 무시)"""
+    collected = {key: {field: [] for field in fields} for key in labels.values()}
+    for field in fields:
+        entries = data.get(field)
+        if not isinstance(entries, list):
+            raise ValueError(f"필수 필드가 누락되었습니다: {field}")
+        for entry in entries:
+            parsed = _parse_pack_id(entry.get("id") if isinstance(entry, dict) else entry)
+            if parsed is None or parsed[0] not in labels:
+                print(f"[회사 묶음] 알 수 없는 ID 무시: {entry}")
+                continue
+            collected[labels[parsed[0]]][field].append((parsed[1], entry if isinstance(entry, dict) else {}))
+    return collected
+
+def _check_pack_coverage(indices: list, expected: set, exact: bool):
+    """회사별 응답 ID 검증 (중복/목록 밖 번호, exact면 누락도 실패)"""
+    if len(indices) != len(set(indices)):
+        raise ValueError("ID 중복")
+    if not set(indices) <= expected:
+        raise ValueError(f"목록에 없는 ID {sorted(set(indices) - expected)}")
+    if exact and set(indices) != expected:
+        raise ValueError(f"응답 누락 ID {sorted(expected - set(indices))}")
+
+def split_packed_result(stage: int, data: dict, labels: dict, items: dict) -> dict:
+    """
+    묶음 응답을 회사별 단계 결과(기존 비간결 응답 형식)로 나누는 함수
+
+    Returns:
+        dict: {회사: 결과 dict 또는 검증 실패 사유 문자열}
+    """
+    spec = _PACK_STAGE_SPECS[stage]
+    titles = {
+        key: {news.get(spec["index_key"]): news.get("content", "") for news in ctx[spec["news_key"]]}
+        for key, (_, ctx) in items.items()
+    }
+    results = {}
+    if stage == 2:
+        collected = {key: [] for key in labels.values()}
+        invalid = {}
+        groups = data.get("groups")
+        if not isinstance(groups, list):
+            raise ValueError("필수 필드가 누락되었습니다: groups")
+        for group in groups:
+            ids = [_parse_pack_id(value) for value in group.get("ids", [])] if isinstance(group, dict) else []
+            ids = [parsed for parsed in ids if parsed is not None and parsed[0] in labels]
+            if not ids:
+                continue
+            group_labels = {label for label, _ in ids}
+            if len(group_labels) > 1:
+                # 다른 회사 기사를 한 그룹으로 묶은 경우 관련 회사 모두 회사별 호출로 재처리
+                for label in group_labels:
+                    invalid[labels[label]] = "다른 기업 기사와 그룹핑"
+                continue
+            indices = [index for _, index in ids]
+            selected = _parse_pack_id(group.get("selected_id", ""))
+            selected_index = selected[1] if selected and selected[1] in indices else indices[0]
+            collected[labels[ids[0][0]]].append(
+                {"indices": indices, "selected_index": selected_index, "reason": group.get("reason", "")}
+            )
+        for key, company_groups in collected.items():
+            if key in invalid:
+                results[key] = invalid[key]
+                continue
+            try:
+                _check_pack_coverage([i for group in company_groups for i in group["indices"]], set(titles[key]), exact=False)
+                results[key] = {"groups": company_groups}
+            except ValueError as e:
+                results[key] = str(e)
+        return results
+
+    fields = ["excluded", "borderline", "retained"] if stage == 1 else ["final_selection", "not_selected"]
+    for key, entries in _collect_packed_entries(data, fields, labels).items():
+        try:
+            _check_pack_coverage([index for field in fields for index, _ in entries[field]], set(titles[key]), exact=True)
+        except ValueError as e:
+            results[key] = str(e)
+            continue
+        if stage == 1:
+            results[key] = {
+                field: [
+                    {"index": index, "title": titles[key][index], "reason": entry.get("reason", "")}
+                    for index, entry in entries[field]
+                ]
+                for field in fields
+            }
+        else:
+            results[key] = {
+                "final_selection": [
+                    {
+                        "index": index,
+                        "title": titles[key][index],
+                        "importance": entry.get("importance", "중"),
+                        "reason": entry.get("reason", ""),
+                        "keywords": entry.get("keywords", []),
+                        "affiliates": entry.get("affiliates", [])
+                    }
+                    for index, entry in entries["final_selection"]
+                ],
+                "not_selected": [
+                    {"index": index, "title": titles[key][index], "importance": "하", "reason": entry.get("reason", "")}
+                    for index, entry in entries["not_selected"]
+                ]
+            }
+    return results
+
+def _run_company_pack(keys: list, items: dict, apply_fn) -> list:
+    """묶음 호출 1회 실행 후 회사별로 반영 (검증/반영에 실패한 회사 목록 반환)"""
+    first_state, first_ctx = items[keys[0]]
+    stage = first_ctx["stage"]
+    _, model, system_prompt, shared_criteria, local_representative = _pack_group_key(first_state, first_ctx)
+    labels = {_pack_label(i): key for i, key in enumerate(keys)}
+    sections = [_format_pack_section(stage, label, *items[key]) for label, key in labels.items()]
+    user_prompt = build_packed_prompt(stage, shared_criteria, sections, local_representative)
+    print(f"\n[회사 묶음] {stage}단계: {len(keys)}개 회사 묶음 호출 "
+          f"({', '.join(f'{label}={key}' for label, key in labels.items())})")
+
+    # 묶음 호출용 임시 state (프롬프트/응답 기록 후 회사별 state에 복사)
+    pack_state = {"model": first_state.get("model"), "base_url": first_state.get("base_url")}
+    pack_items = {key: items[key] for key in keys}
+    try:
+        response = call_llm(pack_state, system_prompt, user_prompt, stage=stage, model=model)
+        results = split_packed_result(stage, parse_json_response(response), labels, pack_items)
+    except (json.JSONDecodeError, ValueError, AttributeError) as e:
+        print(f"[회사 묶음] {stage}단계 묶음 응답 파싱 실패, 회사별 호출로 재처리: {str(e)}")
+        invalidate_cached_response(make_cache_key(model, LLM_TEMPERATURE, system_prompt, user_prompt))
+        return list(keys)
+
+    failed = []
+    for key in keys:
+        state, ctx = items[key]
+        state[f"system_prompt_{stage}"] = system_prompt
+        state[f"user_prompt_{stage}"] = user_prompt
+        state[f"llm_response_{stage}"] = response
+        result = results.get(key)
+        try:
+            if not isinstance(result, dict):
+                raise ValueError(result or "응답 없음")
+            apply_fn(state, {**ctx, "terse": False, "model": model}, result)
+        except (json.JSONDecodeError, ValueError, KeyError) as e:
+            print(f"[회사 묶음] {key} 응답 검증 실패, 회사별 호출로 재처리: {str(e)}")
+            failed.append(key)
+    if failed:
+        invalidate_cached_response(make_cache_key(model, LLM_TEMPERATURE, system_prompt, user_prompt))
+    return failed
+
+def run_packed_items(items: dict, apply_fn, fallback_fn):
+    """{회사: (state, ctx)} 중 묶을 수 있는 회사는 묶음 호출로, 나머지와 검증 실패 회사는 fallback_fn(state, ctx)로 처리"""
+    packs, singles = plan_company_packs(items)
+    for keys in packs:
+        singles.extend(_run_company_pack(keys, items, apply_fn))
+    for key in singles:
+        fallback_fn(*items[key])
+
+def run_llm_stages_packed(states: dict) -> dict:
+    """
+    여러 회사의 1~3단계를 단계별로 실행하며 입력 기사가 적은 회사끼리 묶어서 호출하는 함수
+    (단일 호출 모드는 묶지 않고 회사별로 실행)
+
+    Args:
+        states (dict): {회사: 규칙 필터까지 끝난 state}
+    """
+    if SINGLE_PASS_SETTINGS.get("enabled", False):
+        for state in states.values():
+            run_single_pass(state)
+        return states
+
+    exclusion_ctxs = {}
+    for key, state in states.items():
+        ctx = prepare_exclusion(state)
+        if ctx is not None:
+            exclusion_ctxs[key] = ctx
+    run_packed_items({key: (states[key], ctx) for key, ctx in exclusion_ctxs.items()}, apply_exclusion, run_exclusion_stage)
+    # 저가 모델의 보류 판단 재판단은 회사별로 처리
+    for key, ctx in exclusion_ctxs.items():
+        escalation_ctx = prepare_borderline_escalation(states[key], ctx)
+        if escalation_ctx is not None:
+            run_llm_stage(states[key], escalation_ctx, apply_borderline_escalation, max_retries=1, error_label="보류 기사 재판단 결과 파싱")
+
+    items = {}
+    for key, state in states.items():
+        ctx = prepare_grouping(state)
+        if ctx is not None:
+            items[key] = (state, ctx)
+    run_packed_items(items, apply_grouping, lambda state, ctx: run_llm_stage(
+        state, ctx, apply_grouping, max_retries=1, error_label="그룹핑 결과 파싱"
+    ))
+
+    items = {}
+    for key, state in states.items():
+        ctx = prepare_evaluation(state)
+        if ctx is not None:
+            items[key] = (state, ctx)
+    run_packed_items(items, apply_evaluation, lambda state, ctx: run_llm_stage(
+        state, ctx, apply_evaluation, max_retries=3, error_label="중요도 평가 결과 파싱"
+    ))
+    return states
+
+
 # 노드 정의
 def get_nodes():
     return {
@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+News Grouping Helpers
+-----------------------
+중복 뉴스 그룹의 대표 기사를 로컬에서 결정하기 위한 모듈입니다.
+DUPLICATE_HANDLING 텍스트의 "N순위: 분류 (언론사, 언론사)" 항목을 언론사 우선순위 표로 컴파일하고,
+(언론사 우선순위 → 제목 길이 → 발행 시간) 순으로 그룹 대표 기사를 선택합니다.
+"""
+
+import re
+from datetime import datetime
+from functools import lru_cache
+
+from config import (
+    TRUSTED_PRESS_ALIASES_BY_CATEGORY,
+    ADDITIONAL_PRESS_ALIASES,
+    REPRESENTATIVE_SELECTION_SETTINGS,
+)
+
+# "1순위: 경제 전문지 (한국경제, 매일경제)" 형식의 우선순위 항목
+_PRIORITY_LINE_PATTERN = re.compile(r"(\d+)\s*순위\s*:\s*([^(\n]*)(?:\(([^)]*)\))?")
+
+# 정렬용 날짜 형식 (collect_news와 동일)
+_DATE_FORMATS = [
+    '%a, %d %b %Y %H:%M:%S %Z',
+    '%a, %d %b %Y %H:%M:%S GMT',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d',
+    '%Y년 %m월 %d일',
+    '%m/%d/%Y',
+    '%d/%m/%Y',
+    '%Y.%m.%d',
+    '%m.%d.%Y',
+]
+
+
+def _normalize(s):
+    return re.sub(r'\s+', ' ', (s or "").lower().strip())
+
+
+@lru_cache(maxsize=1)
+def _build_alias_map():
+    """언론사 별칭 → 대표 언론사명 매핑 (모든 카테고리 + 추가 언론사)"""
+    alias_map = {}
+    press_configs = list(TRUSTED_PRESS_ALIASES_BY_CATEGORY.values()) + [ADDITIONAL_PRESS_ALIASES]
+    for press_config in press_configs:
+        for main_press, aliases in press_config.items():
+            for alias in [main_press] + list(aliases):
+                alias_map.setdefault(_normalize(alias), main_press)
+    return alias_map
+
+
+@lru_cache(maxsize=32)
+def compile_press_priority(duplicate_handling: str) -> dict:
+    """
+    중복 처리 기준 텍스트에서 언론사 우선순위 표를 만드는 함수
+
+    Returns:
+        dict: {"ranks": {대표 언론사명: 순위}, "default_rank": 목록에 없는 언론사의 순위}
+    """
+    alias_map = _build_alias_map()
+    ranks = {}
+    default_rank = None
+    max_rank = 0
+
+    for match in _PRIORITY_LINE_PATTERN.finditer(duplicate_handling or ""):
+        rank = int(match.group(1))
+        label = match.group(2).strip()
+        press_names = match.group(3)
+        max_rank = max(max_rank, rank)
+        if press_names:
+            for name in press_names.split(","):
+                name = name.strip()
+                if name:
+                    ranks.setdefault(alias_map.get(_normalize(name), name), rank)
+        elif "기타" in label and default_rank is None:
+            default_rank = rank
+
+    if default_rank is None:
+        default_rank = max_rank + 1
+    return {"ranks": ranks, "default_rank": default_rank}
+
+
+def get_press_rank(news: dict, press_priority: dict) -> int:
+    """기사의 언론사 우선순위를 반환 (숫자가 작을수록 우선)"""
+    alias_map = _build_alias_map()
+    ranks = press_priority["ranks"]
+    for candidate in (news.get("matched_press"), news.get("press")):
+        if not candidate:
+            continue
+        if candidate in ranks:
+            return ranks[candidate]
+        main_press = alias_map.get(_normalize(candidate))
+        if main_press in ranks:
+            return ranks[main_press]
+    return press_priority["default_rank"]
+
+
+def _parse_time(date_str):
+    """정렬용 발행 시간 (파싱 실패 시 None)"""
+    for date_format in _DATE_FORMATS:
+        try:
+            return datetime.strptime(date_str, date_format).replace(tzinfo=None)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def _sort_key(news, press_priority, settings):
+    key = []
+    for tiebreaker in settings["tiebreakers"]:
+        if tiebreaker == "press_priority":
+            key.append(get_press_rank(news, press_priority))
+        elif tiebreaker == "title_length":
+            # 더 긴(구체적인) 제목 우선
+            key.append(-len(news.get("content", "")))
+        elif tiebreaker == "time":
+            parsed = _parse_time(news.get("date", ""))
+            if parsed is None:
+                key.append((1, 0))
+            else:
+                timestamp = parsed.timestamp()
+                key.append((0, -timestamp if settings["time_order"] == "latest" else timestamp))
+    # 마지막 기준: 원래 인덱스 (결정적 결과 보장)
+    key.append(news.get("original_index", 0))
+    return key
+
+
+def select_representative(group_news: list, duplicate_handling: str, settings: dict = None) -> dict:
+    """그룹 내 기사 중 대표 기사 1건을 선택하는 함수"""
+    settings = {**REPRESENTATIVE_SELECTION_SETTINGS, **(settings or {})}
+    press_priority = compile_press_priority(duplicate_handling)
+    return min(group_news, key=lambda news: _sort_key(news, press_priority, settings))
+
+
+def assign_representatives(groups: list, news_by_index: dict, duplicate_handling: str, settings: dict = None) -> list:
+    """
+    그룹 목록의 selected_index/reason을 로컬 기준으로 채우는 함수 (LLM/로컬 그룹핑 공통)
+
+    Args:
+        groups (list): [{"indices": [...]}, ...]
+        news_by_index (dict): {original_index: 뉴스}
+        duplicate_handling (str): 중복 처리 기준 텍스트 (언론사 우선순위 포함)
+    """
+    press_priority = compile_press_priority(duplicate_handling)
+    for group in groups:
+        group_news = [news_by_index[idx] for idx in group.get("indices", []) if idx in news_by_index]
+        if not group_news:
+            continue
+        selected = select_representative(group_news, duplicate_handling, settings)
+        rank = get_press_rank(selected, press_priority)
+        group["selected_index"] = selected.get("original_index")
+        if len(group_news) == 1:
+            group["reason"] = "단독 기사"
+        else:
+            group["reason"] = f"언론사 우선순위 기준 로컬 선택 ({rank}순위, {selected.get('press', '알 수 없음')})"
+    return groups
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Selection History
+-----------------------
+회사별 일일 선정 결과(엄격 기준 선정 0개 여부, 최종 선정 기사 수)를 JSON 파일로 기록하는 모듈입니다.
+최근 기록에서 엄격 기준 선정 0개가 잦은 회사를 찾아 완화 기준 재평가의 추측 실행 대상으로 사용합니다.
+(같은 날 여러 번 실행하면 마지막 결과로 갱신)
+"""
+
+import os
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+
+from config import SPECULATIVE_RELAXED_SETTINGS
+
+# 한국 시간대(KST) 정의
+KST = timezone(timedelta(hours=9))
+
+_LOCK = threading.Lock()
+_HISTORY = None
+
+
+def _load():
+    """기록 파일 로드 (프로세스당 1회, 없거나 손상되면 빈 기록)"""
+    global _HISTORY
+    if _HISTORY is None:
+        path = SPECULATIVE_RELAXED_SETTINGS["history_path"]
+        try:
+            with open(path, encoding="utf-8") as f:
+                _HISTORY = json.load(f)
+        except (OSError, ValueError):
+            _HISTORY = {}
+    return _HISTORY
+
+
+def _save(history):
+    path = SPECULATIVE_RELAXED_SETTINGS["history_path"]
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(history, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def record_selection(company: str, strict_zero: bool, selected: int, now=None):
+    """회사의 오늘 선정 결과 기록 (최근 lookback_days일 기록만 보관)"""
+    now = now or datetime.now(KST)
+    today = now.strftime("%Y-%m-%d")
+    cutoff = (now - timedelta(days=SPECULATIVE_RELAXED_SETTINGS["lookback_days"])).strftime("%Y-%m-%d")
+    with _LOCK:
+        history = _load()
+        days = [day for day in history.get(company, []) if day["date"] != today and day["date"] > cutoff]
+        days.append({"date": today, "strict_zero": strict_zero, "selected": selected})
+        history[company] = days
+        try:
+            _save(history)
+        except OSError as e:
+            print(f"[선정 기록] 저장 실패: {str(e)}")
+
+
+def zero_selection_rate(company: str, now=None):
+    """최근 lookback_days일 중 엄격 기준 선정 0개 비율과 기록 일수 (기록이 없으면 (0.0, 0))"""
+    now = now or datetime.now(KST)
+    cutoff = (now - timedelta(days=SPECULATIVE_RELAXED_SETTINGS["lookback_days"])).strftime("%Y-%m-%d")
+    with _LOCK:
+        days = [day for day in _load().get(company, []) if day["date"] > cutoff]
+    if not days:
+        return 0.0, 0
+    return sum(1 for day in days if day["strict_zero"]) / len(days), len(days)
+
+
+def is_zero_yield_prone(company: str) -> bool:
+    """추측 실행 대상 여부 (지정 회사이거나, 기록이 min_days일 이상이고 0개 비율이 기준 이상)"""
+    if company in SPECULATIVE_RELAXED_SETTINGS.get("companies", []):
+        return True
+    rate, days = zero_selection_rate(company)
+    return days >= SPECULATIVE_RELAXED_SETTINGS["min_days"] and rate >= SPECULATIVE_RELAXED_SETTINGS["zero_rate_threshold"]
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Title Normalizer
+-----------------------
+app.py와 auto_news_mail.py가 공통으로 사용하는 뉴스 제목/문자열 정규화 모듈입니다.
+정규식은 모듈 로드 시 한 번만 컴파일하고, 같은 제목은 LRU 캐시로 재사용합니다.
+"""
+
+import re
+from functools import lru_cache
+
+# 0. 대괄호 태그 ([단독], [특징주] 등)
+_LEADING_BRACKET_PATTERN = re.compile(r'^\s*\[.*?\]\s*')  # 제목 맨 앞에만
+_ALL_BRACKETS_PATTERN = re.compile(r'\[.*?\]')  # 제목 안에 있는 모든 대괄호
+# 1. 특정 패턴: "- 조선비즈 - Chosun Biz" (정확히 이 문자열만)
+_CHOSUNBIZ_PATTERN = re.compile(r'\s*-\s*조선비즈\s*-\s*Chosun Biz\s*$', re.IGNORECASE)
+# 1-2. 특정 패턴: "- 조선비즈 - Chosunbiz" (B가 소문자인 경우)
+_CHOSUNBIZ_LOWER_PATTERN = re.compile(r'\s*-\s*조선비즈\s*-\s*Chosunbiz\s*$', re.IGNORECASE)
+# 2. 특정 패턴: "- fnnews.com"
+_FNNEWS_PATTERN = re.compile(r'\s*-\s*fnnews\.com\s*$', re.IGNORECASE)
+# 3. 일반적인 언론사 패턴
+_PRESS_SUFFIX_PATTERN = re.compile(r"\s*-\s*[가-힣A-Za-z0-9\s]+$")
+# 연속 공백
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=8192)
+def clean_title(title, strip_all_brackets=False):
+    """
+    제목 끝의 언론사명 패턴과 대괄호 태그를 제거하는 함수
+
+    Args:
+        title (str): 원본 제목
+        strip_all_brackets (bool): True면 제목 안의 모든 대괄호 제거, False면 맨 앞 대괄호만 제거
+    """
+    if not title:
+        return ""
+    if strip_all_brackets:
+        title = _ALL_BRACKETS_PATTERN.sub('', title).strip()
+    else:
+        title = _LEADING_BRACKET_PATTERN.sub('', title).strip()
+    title = _CHOSUNBIZ_PATTERN.sub('', title)
+    title = _CHOSUNBIZ_LOWER_PATTERN.sub('', title)
+    title = _FNNEWS_PATTERN.sub('', title)
+    title = _PRESS_SUFFIX_PATTERN.sub('', title).strip()
+    return title.strip()
+
+
+@lru_cache(maxsize=8192)
+def normalize_string(s):
+    """문자열을 정규화하여 비교하기 쉽게 만듭니다. (소문자, 앞뒤 공백 제거, 연속 공백 정리)"""
+    if not s:
+        return ""
+    return _WHITESPACE_PATTERN.sub(' ', s.lower().strip())
+
+
+def clean_titles(titles, strip_all_brackets=False):
+    """제목 목록을 한 번에 정리하는 함수 (배치 API)"""
+    return [clean_title(title, strip_all_brackets) for title in titles]
+
+
+def annotate_titles(news_list):
+    """수집된 기사에 정리된 제목(clean_title)과 정규화된 제목(normalized_title)을 저장하는 함수"""
+    for news in news_list:
+        cleaned = clean_title(news.get("content", ""))
+        news["clean_title"] = cleaned
+        news["normalized_title"] = normalize_string(cleaned)
+    return news_list
@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Stage-1 Verdict Cache
+-----------------------
+1단계(제외/보류/유지) 판단을 기사 단위로 저장하는 캐시입니다. (SQLite)
+- 키: (기사 ID, 회사, 제외 기준 해시, 모델)
+- 기사 ID는 정규화된 URL (URL이 없으면 정규화된 제목)
+- 제외 기준 해시는 1단계 시스템 프롬프트 + 제외 기준 텍스트 기준 (기준이 바뀌면 자동으로 미스)
+기사 목록에 새 기사가 하나만 추가되어도 전체 프롬프트 캐시(llm_cache)는 미스가 나므로,
+같은 날 재실행이나 겹치는 수집 기간에서는 이 캐시로 1단계 대부분을 조회로 대체합니다.
+LLM 응답 캐시와 같은 디렉토리(LLM_CACHE_SETTINGS["directory"])를 사용합니다.
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from contextlib import contextmanager
+
+from config import STAGE1_VERDICT_CACHE_SETTINGS
+from llm_cache import get_cache_directory
+from title_normalizer import clean_title, normalize_string
+
+VERDICTS = ("excluded", "borderline", "retained")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS stage1_verdicts (
+    article_id TEXT NOT NULL,
+    company TEXT NOT NULL,
+    criteria_hash TEXT NOT NULL,
+    model TEXT NOT NULL,
+    verdict TEXT NOT NULL,
+    title TEXT,
+    reason TEXT,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (article_id, company, criteria_hash, model)
+);
+CREATE INDEX IF NOT EXISTS idx_stage1_verdicts_created_at ON stage1_verdicts(created_at);
+"""
+
+
+def article_id(news: dict) -> str:
+    """기사 식별자 (정규화된 URL, 없으면 정규화된 제목)"""
+    url = normalize_string(news.get("url", ""))
+    if url:
+        return url
+    return "title:" + normalize_string(clean_title(news.get("content", "")))
+
+
+def exclusion_criteria_hash(system_prompt: str, exclusion_criteria: str) -> str:
+    """1단계 판단 기준 해시 (시스템 프롬프트 + 제외 기준)"""
+    payload = f"{system_prompt or ''}\n---\n{exclusion_criteria or ''}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Stage1VerdictCache:
+    """기사 단위 1단계 판단 캐시"""
+
+    def __init__(self, path, ttl_seconds):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stores": 0}
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def lookup(self, article_ids, company, criteria_hash, model) -> dict:
+        """
+        기사 ID 목록의 캐시된 판단 조회
+
+        Returns:
+            dict: {기사 ID: {"verdict", "title", "reason"}} (캐시에 있는 기사만)
+        """
+        if not article_ids:
+            return {}
+        min_created_at = time.time() - self.ttl_seconds if self.ttl_seconds else 0
+        found = {}
+        unique_ids = list(dict.fromkeys(article_ids))
+        with self._lock, self._connect() as conn:
+            # SQLite 변수 개수 제한을 피하기 위해 나누어 조회
+            for start in range(0, len(unique_ids), 500):
+                chunk = unique_ids[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT article_id, verdict, title, reason FROM stage1_verdicts "
+                    f"WHERE company = ? AND criteria_hash = ? AND model = ? AND created_at >= ? "
+                    f"AND article_id IN ({placeholders})",
+                    [company, criteria_hash, model, min_created_at] + chunk
+                ).fetchall()
+                for row_id, verdict, title, reason in rows:
+                    found[row_id] = {"verdict": verdict, "title": title, "reason": reason}
+        self.stats["hits"] += len(found)
+        self.stats["misses"] += len(unique_ids) - len(found)
+        return found
+
+    def store(self, records, company, criteria_hash, model):
+        """판단 저장 (records: [(기사 ID, 판단, 제목, 사유), ...])"""
+        if not records:
+            return
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO stage1_verdicts"
+                "(article_id, company, criteria_hash, model, verdict, title, reason, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(aid, company, criteria_hash, model, verdict, title, reason, now)
+                 for aid, verdict, title, reason in records]
+            )
+            if self.ttl_seconds:
+                conn.execute("DELETE FROM stage1_verdicts WHERE created_at < ?", (now - self.ttl_seconds,))
+        self.stats["stores"] += len(records)
+
+
+_CACHE = None
+_CACHE_FAILED = False
+_CACHE_LOCK = threading.Lock()
+
+
+def get_verdict_cache():
+    """프로세스 전역 판단 캐시 반환 (비활성화 또는 초기화 실패 시 None)"""
+    global _CACHE, _CACHE_FAILED
+    if not STAGE1_VERDICT_CACHE_SETTINGS["enabled"] or _CACHE_FAILED:
+        return None
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                try:
+                    _CACHE = Stage1VerdictCache(
+                        os.path.join(get_cache_directory(), STAGE1_VERDICT_CACHE_SETTINGS["filename"]),
+                        STAGE1_VERDICT_CACHE_SETTINGS["ttl_seconds"]
+                    )
+                except (sqlite3.Error, OSError) as e:
+                    print(f"[판단 캐시] 초기화 실패, 캐시 없이 진행: {str(e)}")
+                    _CACHE_FAILED = True
+                    return None
+    return _CACHE
+
+
+def split_cached_news(news_data, company, criteria_hash, model):
+    """
+    캐시된 판단이 있는 기사와 없는 기사를 분리하는 함수
+
+    Returns:
+        tuple: (decided {"excluded"/"borderline"/"retained": [항목]}, 캐시에 없는 기사 목록)
+    """
+    decided = {verdict: [] for verdict in VERDICTS}
+    cache = get_verdict_cache()
+    if cache is None or not news_data:
+        return decided, news_data
+    try:
+        cached = cache.lookup([article_id(news) for news in news_data], company, criteria_hash, model)
+    except sqlite3.Error as e:
+        print(f"[판단 캐시] 조회 실패: {str(e)}")
+        return decided, news_data
+
+    uncached = []
+    for news in news_data:
+        entry = cached.get(article_id(news))
+        if entry is None or entry["verdict"] not in decided:
+            uncached.append(news)
+            continue
+        # 인덱스는 실행마다 달라지므로 현재 original_index로 다시 부여
+        original_index = news.get("original_index")
+        decided[entry["verdict"]].append({
+            "index": original_index,
+            "original_index": original_index,
+            "title": entry["title"] or news.get("content", ""),
+            "reason": entry["reason"] or "",
+            "cached": True
+        })
+    print(f"[판단 캐시] {len(news_data) - len(uncached)}개 기사 캐시 사용, {len(uncached)}개 기사 미캐시")
+    return decided, uncached
+
+
+def store_verdicts(news_data, classification, company, criteria_hash, model):
+    """LLM 1단계 판단을 기사 단위로 저장하는 함수 (캐시 오류는 무시)"""
+    cache = get_verdict_cache()
+    if cache is None:
+        return
+    news_by_index = {news.get("original_index"): news for news in news_data}
+    records = []
+    for verdict in VERDICTS:
+        for item in classification.get(verdict, []):
+            news = news_by_index.get(item.get("index"))
+            if news is None:
+                continue
+            records.append((article_id(news), verdict, item.get("title", ""), item.get("reason", "")))
+    try:
+        cache.store(records, company, criteria_hash, model)
+    except sqlite3.Error as e:
+        print(f"[판단 캐시] 저장 실패: {str(e)}")
+
+
+def print_verdict_cache_summary():
+    """판단 캐시 적중/미스 통계 출력"""
+    cache = get_verdict_cache()
+    if cache is None:
+        return
+    lookups = cache.stats["hits"] + cache.stats["misses"]
+    hit_rate = (cache.stats["hits"] / lookups * 100) if lookups else 0.0
+    print(f"\n=== 1단계 판단 캐시 통계 ===")
+    print(f"적중: {cache.stats['hits']}개 기사, 미스: {cache.stats['misses']}개 기사 (적중률 {hit_rate:.1f}%)")
+    print(f"저장: {cache.stats['stores']}개 기사")